@@ -1,22 +1,41 @@
 import argparse
+from typing import Optional
 import logging
 import os
 from constants import VectorDatabaseConst
 from llm.llm_client import LLMClient
 from chunking.manager import ChunkingManager
+from chunking.text_utils import get_token_counter
 from database.redisMemoryMessageQueue import RedisMessageQueue
+from database.asyncRedisMessageQueue import AsyncRedisMessageQueue
+from database.MemoryMessageQueue import MemoryMessageQueue
+from database.asyncMemoryMessageQueue import AsyncMemoryMessageQueue
 from database.MilvusHybridStore import MilvusHybridStore
 from enrich.EnrichmentMaster import EnrichmentMaster
+from enrich.EnrichmentCache import SqliteEnrichmentCache, RedisEnrichmentCache
+from enrich.Deduplicator import NearDuplicateDetector
 from enrich.manager import EnrichmentManager
 from index.manager import IngestionManager
 from embedding.TextEmbeddingsInference import TextEmbeddingService
+from embedding.EmbeddingCache import EmbeddingCache, CachedEmbeddingService
 from database.memoryRegistry_impl import MemoryStatusRegistry
+from database.redisRegistry_impl import RedisStatusRegistry
+from database.sqliteRegistry_impl import SqliteStatusRegistry
+from files.PayloadTransport import PayloadTransport
+from files.ObjectStore import S3ClientPool
+from files.ContentLoaderFactory import ContentLoader
 from database.tagmanger import TagManager
 from logfilter.logging_context import TraceIdFilter
+from metrics.server import start_metrics_server
+from metrics.pipeline import track_cache, track_queue, track_stream_lag
+from metrics.tracing import JsonlSpanExporter, configure_exporter
 import sys
 import asyncio
 
 from rawclean.manager import CleanManager
+from rawclean.CleanerFactory import CleanerFactory
+from rawclean.strategies.ExcelClean import ExcelCleaner
+from rawclean.strategies.JsonClean import JsonCleaner
 
 clean_topic = "clean_flow"
 chunk_topic = "chunk_flow"
@@ -30,6 +49,83 @@ index_group = "index_group"
 
 worker_name = "worker"
 
+# 每次轮询最多拉取的消息条数
+consume_batch_size = int(os.getenv('Consume_Batch_Size', '1'))
+# 队列为空时服务端阻塞等待的时长（毫秒）
+consume_block_ms = int(os.getenv('Consume_Block_MS', '1000'))
+# 消费端故障恢复：
+# - 空闲超过 Reclaim_Idle_MS 的 Pending 消息由存活的消费者接管（0 关闭），每 Reclaim_Interval_MS 检查一次
+# - 处理失败的消息按 Retry_Backoff_MS 指数退避重投（上限 Retry_Backoff_Max_MS），
+#   投递 Max_Deliveries 次仍失败转入 <topic>_dlq 死信流（0 表示不限次数）
+recovery_config = {
+    'reclaim_idle_ms': int(os.getenv('Reclaim_Idle_MS', '600000')),
+    'reclaim_interval_ms': int(os.getenv('Reclaim_Interval_MS', '30000')),
+    'max_deliveries': int(os.getenv('Max_Deliveries', '5')),
+    'retry_backoff_ms': int(os.getenv('Retry_Backoff_MS', '1000')),
+    'retry_backoff_max_ms': int(os.getenv('Retry_Backoff_Max_MS', '60000'))
+}
+# 生产端流控：下游积压达到 Stream_High_Water 时暂停发布，回落到 Stream_Low_Water 后继续（0 关闭）；
+# 单次暂停不超过 Stream_Max_Pause_MS（需小于 Reclaim_Idle_MS，避免正在处理的上游消息被其它 worker 接管）；
+# Stream_Trim_Acked=1 时修剪下游已确认的条目；Stream_Max_Len 为兜底长度上限（会丢弃未消费消息，默认关闭）
+flow_config = {
+    'high_water': int(os.getenv('Stream_High_Water', '10000')),
+    'low_water': int(os.getenv('Stream_Low_Water', '5000')),
+    'max_pause_ms': int(os.getenv('Stream_Max_Pause_MS', '300000')),
+    'trim_acked': os.getenv('Stream_Trim_Acked', '1') == '1',
+    'maxlen': int(os.getenv('Stream_Max_Len', '0'))
+}
+
+def build_payload_transport() -> PayloadTransport:
+    """
+    Inline_Payload_Max_KB 为 0 时分片始终落盘；Inline_Payload_Compress=1 时内联载荷做 zlib 压缩；
+    Artifact_Format 指定落盘格式 json / json.gz / msgpack / msgpack.zst
+    """
+    return PayloadTransport(
+        inline_max_bytes=int(os.getenv('Inline_Payload_Max_KB', '0')) * 1024,
+        compress=os.getenv('Inline_Payload_Compress', '0') == '1',
+        artifact_format=os.getenv('Artifact_Format', 'json')
+    )
+
+def configure_object_store():
+    # S3_Endpoint_Url 指向 MinIO 等兼容服务；凭证沿用 boto3 的标准来源（AWS_ACCESS_KEY_ID 等环境变量）
+    S3ClientPool.configure(
+        endpoint_url=os.getenv('S3_Endpoint_Url') or None,
+        region_name=os.getenv('S3_Region') or None,
+        max_pool_connections=int(os.getenv('S3_Max_Pool_Connections', '32')),
+        multipart_threshold=int(os.getenv('S3_Multipart_Threshold_MB', '8')) * 1024 * 1024,
+        multipart_chunksize=int(os.getenv('S3_Multipart_Chunk_MB', '8')) * 1024 * 1024,
+        max_concurrency=int(os.getenv('S3_Max_Concurrency', '8'))
+    )
+
+def track_stage_queues(stage: str, consume, publish, topic: str, group: str,
+                       redis_host: str, redis_port: int):
+    """在 /metrics 中暴露本阶段两端队列的计数，以及所消费 Stream 的消费者组积压"""
+    track_queue(consume, stage, "consumer")
+    track_queue(publish, stage, "publisher")
+    track_stream_lag({'host': redis_host, 'port': redis_port}, topic, group)
+
+def configure_tracing(worker_type: str, work_id: int):
+    """Trace_Export_Dir 不为空时把各阶段 span 导出为 JSON Lines，每个 Worker 写各自的文件"""
+    export_dir = os.getenv('Trace_Export_Dir')
+    if export_dir:
+        configure_exporter(JsonlSpanExporter(os.path.join(export_dir, f"trace_{worker_type}_{work_id}.jsonl")))
+
+def configure_cleaners():
+    # Clean_Workers > 1 时 Excel 行清洗分发到进程池；0 表示使用全部 CPU
+    # Clean_Html_Extractor: newspaper / lxml；Clean_Excel_Streaming=1 时逐行流式读取 Excel
+    CleanerFactory.configure(
+        ExcelCleaner,
+        workers=int(os.getenv('Clean_Workers', '1')),
+        batch_rows=int(os.getenv('Clean_Batch_Rows', '200')),
+        extractor=os.getenv('Clean_Html_Extractor', 'newspaper'),
+        streaming=os.getenv('Clean_Excel_Streaming', '0') == '1'
+    )
+    # Clean_Json_Streaming=1 时 JSON 顶层数组按元素增量解析
+    CleanerFactory.configure(
+        JsonCleaner,
+        streaming=os.getenv('Clean_Json_Streaming', '0') == '1'
+    )
+
 async def run_clean_pipeline(work_id: str, redis_host: str, redis_port: int):
     # 实例化并连接
     # 假设 RedisMessageQueue 是您之前实现的类
@@ -40,7 +136,8 @@ async def run_clean_pipeline(work_id: str, redis_host: str, redis_port: int):
         'port': redis_port,               # 端口
         'topic': clean_topic,       # Stream 名称 (Topic)
         'group': clean_group,       # 消费者组名称
-        'consumer_name': clean_worker_name # 当前消费者标识
+        'consumer_name': clean_worker_name, # 当前消费者标识
+        **recovery_config
     }
     consume.connect(consume_config)
 
@@ -49,14 +146,20 @@ async def run_clean_pipeline(work_id: str, redis_host: str, redis_port: int):
         'host': redis_host,        # Redis 服务器地址
         'port': redis_port,               # 端口
         'topic': chunk_topic,       # Stream 名称 (Topic)
-        'group': clean_group,       # 消费者组名称
-        'consumer_name': clean_worker_name # 当前消费者标识
+        'group': chunk_group,       # 下游消费者组：据此计算积压与修剪进度
+        'consumer_name': clean_worker_name, # 当前消费者标识
+        **flow_config
     }
     publish.connect(publish_config)
+    track_stage_queues("clean", consume, publish, clean_topic, clean_group, redis_host, redis_port)
 
+    configure_cleaners()
     manager = CleanManager(
         consumer=consume,
-        publisher=publish
+        publisher=publish,
+        batch_size=consume_batch_size,
+        block_ms=consume_block_ms,
+        transport=build_payload_transport()
     )
 
     manager.start()
@@ -69,7 +172,8 @@ async def run_chunk_pipeline(work_id: str, redis_host: str, redis_port: int):
         'port': redis_port,               # 端口
         'topic': chunk_topic,       # Stream 名称 (Topic)
         'group': chunk_group,       # 消费者组名称
-        'consumer_name': chunk_worker_name # 当前消费者标识
+        'consumer_name': chunk_worker_name, # 当前消费者标识
+        **recovery_config
     }
     consume.connect(consume_config)
 
@@ -78,41 +182,97 @@ async def run_chunk_pipeline(work_id: str, redis_host: str, redis_port: int):
         'host': redis_host,        # Redis 服务器地址
         'port': redis_port,               # 端口
         'topic': enrich_topic,       # Stream 名称 (Topic)
-        'group': chunk_group,       # 消费者组名称
-        'consumer_name': chunk_worker_name # 当前消费者标识
+        'group': enrich_group,       # 下游消费者组：据此计算积压与修剪进度
+        'consumer_name': chunk_worker_name, # 当前消费者标识
+        **flow_config
     }
     publish.connect(publish_config)
+    track_stage_queues("chunk", consume, publish, chunk_topic, chunk_group, redis_host, redis_port)
+    # 启动时加载分词器：路径配置错误在启动时暴露，不拖到第一条消息
+    get_token_counter()
 
     manager = ChunkingManager(
         consumer=consume,
         publisher=publish,
+        batch_size=consume_batch_size,
+        block_ms=consume_block_ms,
+        embed_service=build_embedding_service(),
+        transport=build_payload_transport()
     )
     manager.start()
 
+def build_enrichment_cache(redis_host: str, redis_port: int):
+    """Enrich_Cache_Backend: sqlite / redis，为空时不启用丰富化缓存"""
+    backend = os.getenv('Enrich_Cache_Backend', '').lower()
+    ttl = int(os.getenv('Enrich_Cache_TTL', '0')) or None
+    max_entries = int(os.getenv('Enrich_Cache_Max_Entries', '200000'))
+    if backend == 'sqlite':
+        return SqliteEnrichmentCache(
+            db_path=os.getenv('Enrich_Cache_Path', '/data/cache/enrichment.db'),
+            ttl_seconds=ttl,
+            max_entries=max_entries
+        )
+    if backend == 'redis':
+        return RedisEnrichmentCache(
+            {'host': redis_host, 'port': redis_port},
+            ttl_seconds=ttl,
+            max_entries=max_entries
+        )
+    return None
+
+def build_deduplicator():
+    """Dedup_DB_Path 为空时不启用近似去重"""
+    db_path = os.getenv('Dedup_DB_Path')
+    if not db_path:
+        return None
+    return NearDuplicateDetector(
+        db_path=db_path,
+        threshold=float(os.getenv('Dedup_Threshold', '0.8')),
+        mode=os.getenv('Dedup_Mode', 'copy'),
+        ttl_seconds=int(os.getenv('Dedup_TTL', '0')) or None,
+        max_entries=int(os.getenv('Dedup_Max_Entries', '500000'))
+    )
+
 #1,000,000 cost
 async def run_enrich_pipeline(work_id: str, redis_host: str, redis_port: int):
     enrich_worker_name = f"{worker_name}_enrich_{work_id}"
-    consume = RedisMessageQueue()
+    consume = AsyncRedisMessageQueue()
     consume_config = {
         'host': redis_host,        # Redis 服务器地址
         'port': redis_port,               # 端口
         'topic': enrich_topic,       # Stream 名称 (Topic)
         'group': enrich_group,       # 消费者组名称
-        'consumer_name': enrich_worker_name # 当前消费者标识
+        'consumer_name': enrich_worker_name, # 当前消费者标识
+        **recovery_config
     }
-    consume.connect(consume_config)
+    await consume.connect(consume_config)
 
-    publish = RedisMessageQueue()
+    publish = AsyncRedisMessageQueue()
     publish_config = {
         'host': redis_host,        # Redis 服务器地址
         'port': redis_port,               # 端口
         'topic': index_topic,       # Stream 名称 (Topic)
-        'group': enrich_group,       # 消费者组名称
-        'consumer_name': enrich_worker_name # 当前消费者标识
+        'group': index_group,       # 下游消费者组：据此计算积压与修剪进度
+        'consumer_name': enrich_worker_name, # 当前消费者标识
+        **flow_config
     }
-    publish.connect(publish_config)
-    
-    master = EnrichmentMaster(LLMClient())
+    await publish.connect(publish_config)
+    track_stage_queues("enrich", consume, publish, enrich_topic, enrich_group, redis_host, redis_port)
+
+    manager = build_enrichment_manager(consume, publish, redis_host, redis_port, build_payload_transport())
+    await manager.start()
+
+def build_enrichment_manager(consume, publish, redis_host: str, redis_port: int,
+                             transport: PayloadTransport) -> EnrichmentManager:
+    cache = build_enrichment_cache(redis_host, redis_port)
+    if cache is not None:
+        track_cache("enrichment", cache)
+    # 所有在途分片共享同一个 LLM 并发信号量
+    master = EnrichmentMaster(
+        LLMClient(),
+        max_concurrency=int(os.getenv('Enrich_Max_Concurrency', '5')),
+        cache=cache
+    )
 
     storage_config = {
         "uri":os.getenv('Milvus_Server_URL'),
@@ -121,18 +281,28 @@ async def run_enrich_pipeline(work_id: str, redis_host: str, redis_port: int):
     }
     tag_manager = TagManager(storage_config)
 
-    manager = EnrichmentManager(
+    return EnrichmentManager(
         consumer=consume,
         publisher=publish,
         enrich_master=master,
-        tag_manager=tag_manager
+        tag_manager=tag_manager,
+        batch_size=consume_batch_size,
+        block_ms=consume_block_ms,
+        max_inflight=int(os.getenv('Enrich_Max_Inflight', '4')),
+        deduplicator=build_deduplicator(),
+        transport=transport
     )
-    await manager.start()
+
+def build_embedding_service() -> CachedEmbeddingService:
+    """TEI 向量服务 + 内容寻址缓存（Embed_Cache_Path 为空时仅启用内存层）"""
+    cache = EmbeddingCache(
+        max_bytes=int(os.getenv('Embed_Cache_Max_MB', '256')) * 1024 * 1024,
+        db_path=os.getenv('Embed_Cache_Path')
+    )
+    track_cache("embedding", cache)
+    return CachedEmbeddingService(TextEmbeddingService(), cache)
 
 async def run_ingestion_pipeline(work_id: str, redis_host: str, redis_port: int):
-    # 1. 组装依赖 (DI)
-    registry = MemoryStatusRegistry()
-    emb_model = TextEmbeddingService()
     mq = RedisMessageQueue()
     index_worker_name = f"{worker_name}_index_{work_id}"
     mq_config = {
@@ -140,10 +310,30 @@ async def run_ingestion_pipeline(work_id: str, redis_host: str, redis_port: int)
         'port': redis_port,               # 端口
         'topic': index_topic,       # Stream 名称 (Topic)
         'group': index_group,       # 消费者组名称
-        'consumer_name': index_worker_name # 当前消费者标识
+        'consumer_name': index_worker_name, # 当前消费者标识
+        **recovery_config
     }
     mq.connect(mq_config)
+    track_queue(mq, "index", "consumer")
+    track_stream_lag({'host': redis_host, 'port': redis_port}, index_topic, index_group)
 
+    manager = build_ingestion_manager(mq, build_payload_transport(), redis_host, redis_port)
+    manager.start_listening()
+
+def build_status_registry(redis_host: str, redis_port: int):
+    """Index_Registry_Backend: memory / sqlite / redis；sqlite 与 redis 在重启后保留入库进度"""
+    backend = os.getenv('Index_Registry_Backend', 'memory').lower()
+    if backend == 'sqlite':
+        return SqliteStatusRegistry(os.getenv('Index_Registry_Path', '/data/registry/index_status.db'))
+    if backend == 'redis':
+        return RedisStatusRegistry({'host': redis_host, 'port': redis_port})
+    return MemoryStatusRegistry()
+
+def build_ingestion_manager(mq, transport: PayloadTransport, redis_host: str, redis_port: int,
+                            emb_model: Optional[CachedEmbeddingService] = None) -> IngestionManager:
+    # 组装依赖 (DI)
+    registry = build_status_registry(redis_host, redis_port)
+    emb_model = emb_model or build_embedding_service()
     storage_config = {
         "uri":os.getenv('Milvus_Server_URL'),
         "token":os.getenv('Milvus_Server_TOKEN'),
@@ -154,14 +344,104 @@ async def run_ingestion_pipeline(work_id: str, redis_host: str, redis_port: int)
         "collection_name":"product_knowledge_base1"
     }
     v_storage = MilvusHybridStore(storage_config, emb_model.embed_model)
-    manager = IngestionManager(
+    return IngestionManager(
         mq=mq,
-        embed_model=emb_model.embed_model,
+        embed_service=emb_model,
         vector_store=v_storage, 
-        registry=registry
+        registry=registry,
+        batch_size=consume_batch_size,
+        block_ms=consume_block_ms,
+        transport=transport
     )
 
-    manager.start_listening()
+async def run_fused_pipeline(work_id: str, redis_host: str, redis_port: int, checkpoint: bool = False):
+    """
+    单进程融合模式：clean 仍从 Redis 的 clean_flow 接收任务，
+    之后的 chunk -> enrich -> index 通过有界的进程内队列串联。
+    同步阶段各占一个线程，enrich 运行在事件循环中；
+    未开启 checkpoint 时 RAGTaskPayload 对象直接在阶段间传递，不做任何序列化与落盘。
+    投递语义：clean_flow 的消息在其全部分片写入进程内队列后即确认，融合模式对源文件是 at-most-once，
+    进程退出或崩溃时尚未入库的分片随之丢失（checkpoint 只保留载荷文件，不保留消息）；
+    阶段内处理失败的分片由进程内队列按 Max_Deliveries / Retry_Backoff_MS 重投，用尽后记录日志并丢弃。
+    需要 at-least-once 的部署请按阶段分进程运行，各阶段经 Redis Stream 传递。
+    """
+    clean_worker_name = f"{worker_name}_all_{work_id}"
+    consume = RedisMessageQueue()
+    consume.connect({
+        'host': redis_host,
+        'port': redis_port,
+        'topic': clean_topic,
+        'group': clean_group,
+        'consumer_name': clean_worker_name,
+        **recovery_config
+    })
+
+    # 队列满时上游阶段阻塞，避免 clean 远远跑在 enrich 前面堆积内存；失败消息沿用 Redis 队列的重投配置
+    queue_size = int(os.getenv('Fused_Queue_Size', '16'))
+    def memory_queue(topic: str) -> MemoryMessageQueue:
+        mq = MemoryMessageQueue()
+        mq.connect({'topic': f"{topic}_{work_id}", 'max_size': queue_size, **recovery_config})
+        return mq
+
+    async def async_memory_queue(topic: str) -> AsyncMemoryMessageQueue:
+        mq = AsyncMemoryMessageQueue()
+        await mq.connect({'topic': f"{topic}_{work_id}", 'max_size': queue_size, **recovery_config})
+        return mq
+
+    transport = build_payload_transport() if checkpoint else PayloadTransport(in_memory=True)
+    logging.info(f"融合模式启动，checkpoint={'on' if checkpoint else 'off'}")
+
+    # chunk 与 index 共享同一个向量缓存
+    embed_service = build_embedding_service()
+
+    configure_cleaners()
+    get_token_counter()
+    clean_manager = CleanManager(
+        consumer=consume,
+        publisher=memory_queue(chunk_topic),
+        batch_size=consume_batch_size,
+        block_ms=consume_block_ms,
+        transport=transport
+    )
+    chunk_manager = ChunkingManager(
+        consumer=memory_queue(chunk_topic),
+        publisher=memory_queue(enrich_topic),
+        batch_size=consume_batch_size,
+        block_ms=consume_block_ms,
+        embed_service=embed_service,
+        transport=transport
+    )
+    enrich_manager = build_enrichment_manager(
+        await async_memory_queue(enrich_topic),
+        await async_memory_queue(index_topic),
+        redis_host, redis_port, transport
+    )
+    index_manager = build_ingestion_manager(memory_queue(index_topic), transport, redis_host, redis_port, embed_service)
+
+    # 进程内队列只暴露积压长度；Redis 端只有 clean 的消费者组
+    track_stage_queues("clean", consume, clean_manager.publisher, clean_topic, clean_group, redis_host, redis_port)
+    track_queue(chunk_manager.consumer, "chunk", "consumer")
+    track_queue(enrich_manager.consumer, "enrich", "consumer")
+    track_queue(index_manager.mq, "index", "consumer")
+
+    stages = [
+        asyncio.create_task(asyncio.to_thread(clean_manager.start)),
+        asyncio.create_task(asyncio.to_thread(chunk_manager.start)),
+        asyncio.create_task(enrich_manager.start()),
+        asyncio.create_task(asyncio.to_thread(index_manager.start_listening)),
+    ]
+    try:
+        await asyncio.wait(stages, return_when=asyncio.FIRST_COMPLETED)
+    finally:
+        # 任一阶段退出或进程被中断时通知所有阶段停止，线程在 block_ms 内退出；
+        # 关闭进程内队列使阻塞在 produce 上的上游阶段也能返回
+        for manager in (clean_manager, chunk_manager, enrich_manager, index_manager):
+            manager.stop()
+        for mq in (clean_manager.publisher, chunk_manager.consumer, chunk_manager.publisher, index_manager.mq):
+            mq.close()
+        await enrich_manager.consumer.close()
+        await enrich_manager.publisher.close()
+        await asyncio.gather(*stages, return_exceptions=True)
 
 async def main():
     # 1. 配置命令行参数解析
@@ -169,9 +449,9 @@ async def main():
     
     parser.add_argument(
         "--type", 
-        choices=['clean', 'chunk', 'enrich', 'index'], 
+        choices=['clean', 'chunk', 'enrich', 'index', 'all'], 
         required=True, 
-        help="指定启动的 Worker 类型"
+        help="指定启动的 Worker 类型；all 表示在单进程内运行全部阶段"
     )
     
     parser.add_argument(
@@ -181,6 +461,19 @@ async def main():
         help="Worker 的实例 ID，用于区分并发消费者 (默认: 1)"
     )
 
+    parser.add_argument(
+        "--metrics-port",
+        type=int,
+        default=int(os.getenv('Metrics_Port', '9400')),
+        help="Prometheus 指标端口，0 表示不启动 (默认: Metrics_Port 或 9400)"
+    )
+
+    parser.add_argument(
+        "--checkpoint",
+        action="store_true",
+        help="仅对 --type all 生效：阶段间照常写出中间文件，便于排查与断点续跑"
+    )
+
     args = parser.parse_args()
 
     # 2. 配置日志
@@ -193,6 +486,11 @@ async def main():
         handler.addFilter(TraceIdFilter())
 
     logging.info(f"正在启动 Worker 类型: {args.type}, 实例 ID: {args.id}")
+    configure_object_store()
+    track_cache("object_prefetch", ContentLoader.prefetcher)
+    configure_tracing(args.type, args.id)
+    if args.metrics_port:
+        start_metrics_server(args.metrics_port)
 
     # 3. 根据类型跳转到对应的 pipeline
     # 注意：你可以修改你的函数接收 args.id，从而动态生成 worker_name
@@ -206,6 +504,8 @@ async def main():
         await run_enrich_pipeline(args.id,redis_host, redis_port)
     elif args.type == 'index':
         await run_ingestion_pipeline(args.id,redis_host, redis_port)
+    elif args.type == 'all':
+        await run_fused_pipeline(args.id, redis_host, redis_port, args.checkpoint)
 
 if __name__ == "__main__":
     try:
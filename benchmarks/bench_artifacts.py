@@ -0,0 +1,78 @@
+"""
+中间产物格式基准：python -m benchmarks.bench_artifacts --nodes 50 --fragments 200
+
+构造带丰富化元数据的 RAGTaskPayload，对每种格式报告单个分片的平均字节数、
+编码与解码（含 pydantic 校验）耗时，并与当前 JSON 格式对比。
+"""
+import argparse
+import json
+import random
+import time
+from typing import Any, Dict, List
+
+from files.ArtifactCodec import ArtifactCodecFactory
+from files.DocumentFormat import ContentBody, Node, PipelineInstructions, RAGTaskPayload
+from benchmarks.corpus import article, sentence
+
+def enriched_payload(rng: random.Random, num_nodes: int, fragment_index: int) -> RAGTaskPayload:
+    """模拟 _enriched 阶段的分片：正文 + 摘要、关键词、标签、事实等元数据"""
+    nodes = []
+    for i in range(num_nodes):
+        text = article(rng, 5, 20)
+        nodes.append(Node(page_content=text, metadata={
+            "internal_id": f"part{fragment_index}_{i}",
+            "author": f"记者{rng.randint(1, 99)}",
+            "publishTime": "2026-01-01 08:00:00",
+            "summary": sentence(rng) + sentence(rng),
+            "keywords": [sentence(rng)[:4] for _ in range(5)],
+            "tags": [{"tag": sentence(rng)[:4], "score": round(rng.random(), 3)} for _ in range(3)],
+            "facts": [sentence(rng) for _ in range(3)],
+            "event_type": "经济",
+        }))
+    return RAGTaskPayload(
+        content=ContentBody(pipeline_instructions=PipelineInstructions(), nodes=nodes),
+        metadata={"fragment_index": fragment_index, "source": "bench.xlsx"}
+    )
+
+def main():
+    parser = argparse.ArgumentParser(description="中间产物格式基准")
+    parser.add_argument("--nodes", type=int, default=50)
+    parser.add_argument("--fragments", type=int, default=200)
+    parser.add_argument("--formats", nargs="+", default=["json", "json.gz", "msgpack", "msgpack.zst"])
+    args = parser.parse_args()
+
+    rng = random.Random(42)
+    payloads: List[RAGTaskPayload] = [enriched_payload(rng, args.nodes, i) for i in range(args.fragments)]
+
+    results: Dict[str, Any] = {"nodes_per_fragment": args.nodes, "fragments": args.fragments, "formats": {}}
+    for name in args.formats:
+        try:
+            codec = ArtifactCodecFactory.get_codec(name)
+        except ImportError as e:
+            results["formats"][name] = {"skipped": str(e)}
+            continue
+
+        start = time.perf_counter()
+        blobs = [codec.encode(p) for p in payloads]
+        encode_s = time.perf_counter() - start
+
+        start = time.perf_counter()
+        decoded = [codec.decode(b) for b in blobs]
+        decode_s = time.perf_counter() - start
+
+        results["formats"][name] = {
+            "avg_bytes": round(sum(len(b) for b in blobs) / len(blobs)),
+            "encode_ms": round(encode_s * 1000 / len(blobs), 3),
+            "decode_ms": round(decode_s * 1000 / len(blobs), 3),
+            "round_trip_ok": decoded == payloads,
+        }
+
+    baseline = results["formats"].get("json", {}).get("avg_bytes")
+    if baseline:
+        for entry in results["formats"].values():
+            if "avg_bytes" in entry:
+                entry["size_ratio"] = round(entry["avg_bytes"] / baseline, 3)
+    print(json.dumps(results, ensure_ascii=False, indent=2))
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,70 @@
+"""
+分块策略微基准：python -m benchmarks.bench_chunking --docs 2000
+
+对比 token 感知分块器与"逐句拼接 + 重复分词"的朴素实现，输出一行 JSON。
+分词器由 Chunk_Tokenizer 指定（tokenizer.json 路径），未指定且默认路径不存在时 TokenCounter 回退为正则近似。
+"""
+import argparse
+import json
+import time
+from typing import Any, Dict, List
+
+from chunking.strategies import FixedSizeChunker, SentenceChunker
+from chunking.text_utils import TokenCounter, get_token_counter, sentence_spans
+from benchmarks.corpus import news_corpus
+
+def naive_sentence_split(text: str, counter: TokenCounter, chunk_size: int) -> List[str]:
+    """基线：每追加一句就对整个候选块重新分词"""
+    chunks, current = [], ""
+    for s, e in sentence_spans(text):
+        candidate = current + text[s:e]
+        if current and len(counter.offsets(candidate)) > chunk_size:
+            chunks.append(current.strip())
+            current = text[s:e]
+        else:
+            current = candidate
+    if current.strip():
+        chunks.append(current.strip())
+    return chunks
+
+def run(docs: List[str], options: Dict[str, Any]) -> Dict[str, Any]:
+    counter = get_token_counter()
+    total_tokens = sum(len(counter.offsets(d)) for d in docs)
+    results: Dict[str, Any] = {
+        "docs": len(docs),
+        "chars": sum(len(d) for d in docs),
+        "tokens": total_tokens,
+        "tokenizer": "approx" if counter.tokenizer is None else "hf",
+        "options": options,
+    }
+
+    cases = {
+        "sentence": lambda d, c=SentenceChunker(counter): c.split(d, options),
+        "fixed_size": lambda d, c=FixedSizeChunker(counter): c.split(d, options),
+        "naive_sentence": lambda d: naive_sentence_split(d, counter, options["chunk_size"]),
+    }
+    for name, fn in cases.items():
+        start = time.perf_counter()
+        chunks = sum(len(fn(d)) for d in docs)
+        elapsed = time.perf_counter() - start
+        results[name] = {
+            "seconds": round(elapsed, 4),
+            "chunks": chunks,
+            "tokens_per_sec": round(total_tokens / elapsed) if elapsed else None,
+        }
+    return results
+
+def main():
+    parser = argparse.ArgumentParser(description="分块策略微基准")
+    parser.add_argument("--docs", type=int, default=2000)
+    parser.add_argument("--chunk-size", type=int, default=256)
+    parser.add_argument("--chunk-overlap", type=int, default=32)
+    parser.add_argument("--seed", type=int, default=42)
+    args = parser.parse_args()
+
+    docs = news_corpus(args.docs, seed=args.seed)
+    options = {"chunk_size": args.chunk_size, "chunk_overlap": args.chunk_overlap}
+    print(json.dumps(run(docs, options), ensure_ascii=False))
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,82 @@
+"""
+Excel 解析内存基准：python -m benchmarks.bench_excel_parse --rows 20000 50000
+
+为每个行数生成一份带多余列的 xlsx，分别在独立子进程中用 pandas 模式与流式模式
+完整遍历所有行，报告峰值 RSS 增量（MB）与耗时。流式模式的峰值应基本不随行数增长。
+"""
+import argparse
+import json
+import os
+import random
+import resource
+import subprocess
+import sys
+import tempfile
+import time
+from io import BytesIO
+
+from openpyxl import Workbook
+
+from benchmarks.corpus import article, html_article, sentence
+
+def write_workbook(path: str, num_rows: int, seed: int = 42, html: bool = False):
+    """write_only 模式逐行写入，生成文件本身不受内存限制；html=True 时正文为 HTML，可被 newspaper 提取"""
+    rng = random.Random(seed)
+    body = html_article if html else article
+    workbook = Workbook(write_only=True)
+    sheet = workbook.create_sheet()
+    sheet.append(["title", "summary", "content", "author", "publishTime", "rawHtml", "extra1", "extra2"])
+    for i in range(num_rows):
+        sheet.append([
+            sentence(rng), sentence(rng), body(rng, 4, 12), f"记者{i % 97}",
+            f"2026-01-{i % 28 + 1:02d} 08:00:00", body(rng, 4, 12), i, rng.random(),
+        ])
+    workbook.save(path)
+
+def _peak_rss_mb() -> float:
+    # Linux 下 ru_maxrss 单位为 KB
+    return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024
+
+def child(path: str, streaming: bool):
+    from files.ExcelParser import ExcelParser
+    from rawclean.strategies.ExcelClean import ExcelCleaner
+
+    baseline = _peak_rss_mb()
+    with open(path, "rb") as f:
+        stream = BytesIO(f.read())
+    parser = ExcelParser(**{**ExcelCleaner().parser_options(), "streaming": streaming})
+    start = time.perf_counter()
+    count = sum(1 for _ in parser.parse(stream))
+    print(json.dumps({
+        "rows": count,
+        "seconds": round(time.perf_counter() - start, 2),
+        "peak_rss_delta_mb": round(_peak_rss_mb() - baseline, 1),
+    }))
+
+def main():
+    parser = argparse.ArgumentParser(description="Excel 解析内存基准")
+    parser.add_argument("--rows", type=int, nargs="+", default=[20000, 50000])
+    parser.add_argument("--child", nargs=2, metavar=("PATH", "MODE"), help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.child:
+        child(args.child[0], args.child[1] == "streaming")
+        return
+
+    results = []
+    with tempfile.TemporaryDirectory() as tmp:
+        for num_rows in args.rows:
+            path = os.path.join(tmp, f"bench_{num_rows}.xlsx")
+            write_workbook(path, num_rows)
+            entry = {"rows": num_rows, "file_mb": round(os.path.getsize(path) / 1024 / 1024, 1)}
+            for mode in ("pandas", "streaming"):
+                out = subprocess.run(
+                    [sys.executable, "-m", "benchmarks.bench_excel_parse", "--child", path, mode],
+                    capture_output=True, text=True, check=True
+                )
+                entry[mode] = json.loads(out.stdout.strip().splitlines()[-1])
+            results.append(entry)
+    print(json.dumps(results, ensure_ascii=False))
+
+if __name__ == "__main__":
+    main()
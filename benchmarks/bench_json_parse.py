@@ -0,0 +1,80 @@
+"""
+JSON 解析内存基准：python -m benchmarks.bench_json_parse --docs 20000 80000
+
+为每个规模生成一份顶层数组的 JSON 文件，分别在独立子进程中用 json.load 模式与流式模式
+经 JsonCleaner 产出全部分片，报告峰值 RSS 增量（MB）、耗时与首个分片的产出延迟。
+"""
+import argparse
+import json
+import os
+import resource
+import subprocess
+import sys
+import tempfile
+import time
+
+from benchmarks.corpus import news_corpus
+
+def write_json(path: str, num_docs: int, seed: int = 42):
+    """逐条写入，生成文件本身不受内存限制"""
+    with open(path, "w", encoding="utf-8") as f:
+        f.write("[")
+        for i, text in enumerate(news_corpus(num_docs, seed)):
+            if i:
+                f.write(",")
+            json.dump({"id": i, "title": text[:20], "content": text}, f, ensure_ascii=False)
+        f.write("]")
+
+def _peak_rss_mb() -> float:
+    # Linux 下 ru_maxrss 单位为 KB
+    return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024
+
+def child(path: str, streaming: bool):
+    from files.ContentLoaderFactory import ContentLoader
+    from files.JsonFileParser import JsonParser
+    from rawclean.strategies.JsonClean import JsonCleaner
+
+    baseline = _peak_rss_mb()
+    cleaner = JsonCleaner(streaming=streaming)
+    start = time.perf_counter()
+    first_fragment = None
+    fragments = 0
+    with ContentLoader.open_stream(path) as stream:
+        for _ in cleaner.clean(JsonParser(**cleaner.parser_options()).parse(stream)):
+            if first_fragment is None:
+                first_fragment = time.perf_counter() - start
+            fragments += 1
+    print(json.dumps({
+        "fragments": fragments,
+        "seconds": round(time.perf_counter() - start, 2),
+        "first_fragment_ms": round((first_fragment or 0) * 1000, 1),
+        "peak_rss_delta_mb": round(_peak_rss_mb() - baseline, 1),
+    }))
+
+def main():
+    parser = argparse.ArgumentParser(description="JSON 解析内存基准")
+    parser.add_argument("--docs", type=int, nargs="+", default=[20000, 80000])
+    parser.add_argument("--child", nargs=2, metavar=("PATH", "MODE"), help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.child:
+        child(args.child[0], args.child[1] == "streaming")
+        return
+
+    results = []
+    with tempfile.TemporaryDirectory() as tmp:
+        for num_docs in args.docs:
+            path = os.path.join(tmp, f"bench_{num_docs}.json")
+            write_json(path, num_docs)
+            entry = {"docs": num_docs, "file_mb": round(os.path.getsize(path) / 1024 / 1024, 1)}
+            for mode in ("json_load", "streaming"):
+                out = subprocess.run(
+                    [sys.executable, "-m", "benchmarks.bench_json_parse", "--child", path, mode],
+                    capture_output=True, text=True, check=True
+                )
+                entry[mode] = json.loads(out.stdout.strip().splitlines()[-1])
+            results.append(entry)
+    print(json.dumps(results, ensure_ascii=False))
+
+if __name__ == "__main__":
+    main()
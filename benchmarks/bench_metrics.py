@@ -0,0 +1,54 @@
+"""
+指标开销基准：python -m benchmarks.bench_metrics --iterations 200000
+
+报告热路径上各操作的单次耗时（微秒）：计数、直方图 observe、with 计时块，
+以及一次 /metrics 抓取渲染的耗时，用于确认埋点相对于消息处理耗时可以忽略。
+"""
+import argparse
+import json
+import time
+
+from prometheus_client import CollectorRegistry, Counter, Histogram, generate_latest
+
+from metrics.registry import DEFAULT_BUCKETS
+
+def per_call_us(fn, iterations: int) -> float:
+    start = time.perf_counter()
+    for _ in range(iterations):
+        fn()
+    return round((time.perf_counter() - start) / iterations * 1e6, 2)
+
+def main():
+    parser = argparse.ArgumentParser(description="指标开销基准")
+    parser.add_argument("--iterations", type=int, default=200000)
+    args = parser.parse_args()
+
+    registry = CollectorRegistry()
+    counter = Counter("bench_messages_total", "bench", ("stage", "outcome"), registry=registry)
+    histogram = Histogram("bench_step_seconds", "bench", ("stage", "step"), buckets=DEFAULT_BUCKETS,
+                          registry=registry)
+
+    def timed_block():
+        with histogram.labels("index", "embed").time():
+            pass
+
+    results = {
+        "baseline_call_us": per_call_us(lambda: None, args.iterations),
+        "counter_inc_us": per_call_us(lambda: counter.labels("index", "ok").inc(), args.iterations),
+        "histogram_observe_us": per_call_us(lambda: histogram.labels("index", "embed").observe(0.01), args.iterations),
+        "timer_block_us": per_call_us(timed_block, args.iterations),
+    }
+
+    # 4 个阶段 x 8 个子步骤的直方图，接近实际的序列数
+    for stage in ("clean", "chunk", "enrich", "index"):
+        for step in ("load", "parse", "clean", "chunk", "llm", "embed", "insert", "publish"):
+            histogram.labels(stage, step).observe(0.1)
+    start = time.perf_counter()
+    body = generate_latest(registry)
+    results["render_ms"] = round((time.perf_counter() - start) * 1000, 2)
+    results["render_bytes"] = len(body)
+
+    print(json.dumps(results, ensure_ascii=False, indent=2))
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,123 @@
+"""
+对象存储吞吐基准：python -m benchmarks.bench_object_store --objects 40 --size-kb 512 --large-mb 32
+
+默认在本进程内启动 moto server 作为 S3 兼容服务（需要 pip install "moto[server]"）；
+--endpoint 指定已有的 MinIO 等服务时直接使用（凭证取自 AWS_ACCESS_KEY_ID 等环境变量）。
+报告 ContentSaver/ContentLoader 的小对象读写吞吐、逐条处理时预取下一对象带来的耗时变化，
+以及大对象分片上传、并发分段下载与流式读取的吞吐。
+"""
+import argparse
+import json
+import os
+import time
+import uuid
+
+from files.ContentLoaderFactory import ContentLoader
+from files.ContentSaverFactory import ContentSaver
+from files.ObjectStore import S3ClientPool, split_s3_path
+
+def start_moto() -> str:
+    from moto.server import ThreadedMotoServer
+
+    server = ThreadedMotoServer(ip_address="127.0.0.1", port=0)
+    server.start()
+    host, port = server.get_host_and_port()
+    return f"http://{host}:{port}"
+
+def mb_per_s(num_bytes: int, seconds: float) -> float:
+    return round(num_bytes / 1024 / 1024 / seconds, 1) if seconds > 0 else 0.0
+
+def process_all(paths, work_s: float, prefetch: bool) -> float:
+    """模拟 Manager 逐条处理：加载载荷后做 work_s 秒计算"""
+    start = time.perf_counter()
+    for i, path in enumerate(paths):
+        if prefetch and i + 1 < len(paths):
+            ContentLoader.prefetch(paths[i + 1])
+        ContentLoader.load_content(path).getvalue()
+        time.sleep(work_s)
+    return time.perf_counter() - start
+
+def main():
+    parser = argparse.ArgumentParser(description="对象存储吞吐基准")
+    parser.add_argument("--endpoint", help="S3 兼容服务地址；不指定时启动本地 moto server")
+    parser.add_argument("--bucket", default="rag-bench")
+    parser.add_argument("--objects", type=int, default=40)
+    parser.add_argument("--size-kb", type=int, default=512)
+    parser.add_argument("--large-mb", type=int, default=32)
+    parser.add_argument("--work-ms", type=float, default=20.0, help="每条消息模拟的处理耗时")
+    args = parser.parse_args()
+
+    endpoint = args.endpoint
+    if not endpoint:
+        os.environ.setdefault("AWS_ACCESS_KEY_ID", "testing")
+        os.environ.setdefault("AWS_SECRET_ACCESS_KEY", "testing")
+        endpoint = start_moto()
+    S3ClientPool.configure(endpoint_url=endpoint, region_name="us-east-1")
+    client = S3ClientPool.get_client()
+    try:
+        client.create_bucket(Bucket=args.bucket)
+    except client.exceptions.BucketAlreadyOwnedByYou:
+        pass
+
+    prefix = f"s3://{args.bucket}/bench-{uuid.uuid4().hex[:8]}"
+    body = os.urandom(args.size_kb * 1024)
+    paths = [f"{prefix}/small_{i}.bin" for i in range(args.objects)]
+    total = len(body) * len(paths)
+    results = {"endpoint": endpoint, "objects": args.objects, "size_kb": args.size_kb}
+
+    start = time.perf_counter()
+    for path in paths:
+        ContentSaver.save_content(body, path)
+    results["small_upload_mb_s"] = mb_per_s(total, time.perf_counter() - start)
+
+    start = time.perf_counter()
+    for path in paths:
+        assert ContentLoader.load_content(path).getvalue() == body
+    results["small_download_mb_s"] = mb_per_s(total, time.perf_counter() - start)
+
+    work_s = args.work_ms / 1000
+    results["process_s"] = {
+        "no_prefetch": round(process_all(paths, work_s, prefetch=False), 2),
+        "prefetch_next": round(process_all(paths, work_s, prefetch=True), 2),
+        "compute_only": round(work_s * len(paths), 2),
+    }
+
+    if args.large_mb:
+        large = os.urandom(args.large_mb * 1024 * 1024)
+        large_path = f"{prefix}/large.bin"
+        start = time.perf_counter()
+        ContentSaver.save_content(large, large_path)
+        upload_s = time.perf_counter() - start
+
+        bucket, key = split_s3_path(large_path)
+        etag = client.head_object(Bucket=bucket, Key=key)["ETag"].strip('"')
+        # 分片上传的 ETag 形如 <md5>-<分片数>
+        parts = int(etag.split("-")[1]) if "-" in etag else 1
+
+        start = time.perf_counter()
+        assert ContentLoader.load_content(large_path).getvalue() == large
+        download_s = time.perf_counter() - start
+
+        start = time.perf_counter()
+        read = 0
+        with ContentLoader.open_stream(large_path) as stream:
+            while True:
+                chunk = stream.read(1024 * 1024)
+                if not chunk:
+                    break
+                read += len(chunk)
+        assert read == len(large)
+        stream_s = time.perf_counter() - start
+
+        results["large"] = {
+            "size_mb": args.large_mb,
+            "multipart_parts": parts,
+            "upload_mb_s": mb_per_s(len(large), upload_s),
+            "ranged_download_mb_s": mb_per_s(len(large), download_s),
+            "streaming_read_mb_s": mb_per_s(len(large), stream_s),
+        }
+
+    print(json.dumps(results, ensure_ascii=False, indent=2))
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,366 @@
+"""
+端到端流水线基准：python -m benchmarks.bench_pipeline --format excel --files 4 --docs 200 --output result.json
+
+按融合模式的方式组装真实的 CleanManager / ChunkingManager / EnrichmentManager / IngestionManager，
+外部依赖全部替换为 benchmarks.fakes 中的本地替身（LLM 延迟与抖动可配置、确定性向量、内存或 Milvus Lite 存储），
+阶段间走进程内队列，或 --queue redis 时走本地 Redis Stream。
+
+输出 JSON：各阶段与端到端的耗时分位数和吞吐、阶段间排队耗时、LLM 调用与 token 数、
+向量缓存命中率、峰值 RSS。--baseline 指定上一次的输出文件时附带关键指标的变化百分比。
+"""
+import argparse
+import asyncio
+import json
+import os
+import resource
+import subprocess
+import tempfile
+import time
+import uuid
+from typing import Any, Dict, List, Optional, Tuple
+
+from benchmarks.bench_excel_parse import write_workbook
+from benchmarks.bench_json_parse import write_json
+from benchmarks.fakes import (FakeEmbeddingService, FakeLLM, FakeLLMClient,
+                              MemoryVectorStore, StaticTagManager)
+from chunking.manager import ChunkingManager
+from database.MemoryMessageQueue import MemoryMessageQueue
+from database.asyncMemoryMessageQueue import AsyncMemoryMessageQueue
+from database.memoryRegistry_impl import MemoryStatusRegistry
+from database.message import TaskMessage
+from embedding.EmbeddingCache import CachedEmbeddingService, EmbeddingCache
+from enrich.EnrichmentMaster import EnrichmentMaster
+from enrich.manager import EnrichmentManager
+from files.PayloadTransport import PayloadTransport
+from index.manager import IngestionManager
+from metrics.registry import sample_value
+from metrics.trace_report import build_report, read_records
+from metrics.tracing import JsonlSpanExporter, configure_exporter
+from rawclean.CleanerFactory import CleanerFactory
+from rawclean.manager import CleanManager
+from rawclean.strategies.ExcelClean import ExcelCleaner
+from rawclean.strategies.JsonClean import JsonCleaner
+
+STAGES = ("clean", "chunk", "enrich", "index")
+TAGS = ["经济", "科技", "体育", "社会", "国际", "文化"]
+
+# 与基线比较的关键指标：(路径, 数值越大越好)
+KEY_METRICS = [
+    ("docs_per_s", True),
+    ("fragments_per_s", True),
+    ("end_to_end_ms.p50", False),
+    ("end_to_end_ms.p99", False),
+    *[(f"stage_ms.{stage}.p99", False) for stage in STAGES],
+    *[(f"stage_throughput_per_s.{stage}", True) for stage in STAGES],
+    ("peak_rss_mb", False),
+]
+
+def _peak_rss_mb() -> float:
+    # Linux 下 ru_maxrss 单位为 KB
+    return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024
+
+def _git_revision() -> Optional[str]:
+    try:
+        return subprocess.run(["git", "rev-parse", "--short", "HEAD"], capture_output=True,
+                              text=True, check=True).stdout.strip()
+    except Exception:
+        return None
+
+def build_corpus(directory: str, fmt: str, files: int, docs: int) -> Tuple[List[str], int]:
+    """每个文件使用不同的种子，避免向量缓存与去重把后续文件全部命中"""
+    paths = []
+    for i in range(files):
+        if fmt == "excel":
+            path = os.path.join(directory, f"news_{i}.xlsx")
+            write_workbook(path, docs, seed=i, html=True)
+        else:
+            path = os.path.join(directory, f"news_{i}.json")
+            write_json(path, docs, seed=i)
+        paths.append(path)
+    return paths, sum(os.path.getsize(p) for p in paths)
+
+def build_transport(args) -> PayloadTransport:
+    if args.transport == "memory":
+        return PayloadTransport(in_memory=True)
+    # inline：分片载荷随消息传递；artifact：始终落盘
+    inline_max_bytes = 64 * 1024 * 1024 if args.transport == "inline" else 0
+    return PayloadTransport(inline_max_bytes=inline_max_bytes, artifact_format=args.artifact_format)
+
+def build_store(args, embed_service: CachedEmbeddingService, workdir: str):
+    if args.store == "memory":
+        return MemoryVectorStore()
+    # Milvus Lite 以本地文件运行，覆盖向量写入与 BM25 稀疏索引的真实开销
+    from database.MilvusHybridStore import MilvusHybridStore
+    return MilvusHybridStore({
+        "uri": os.path.join(workdir, "milvus.db"),
+        "enable_sparse": True,
+        "enable_dense": True,
+        "dim": args.embed_dim,
+        "embedding_field": "embedding",
+        "collection_name": "bench_pipeline",
+        "overwrite": True
+    }, embed_service.embed_model)
+
+class QueueFactory:
+    """按 --queue 创建阶段间队列；Redis 模式下所有 Stream 使用本次运行独有的前缀，结束后删除"""
+    def __init__(self, args):
+        self.args = args
+        self.prefix = f"bench_{uuid.uuid4().hex[:8]}_"
+        self.redis_config = None
+        if args.queue == "redis":
+            host, _, port = args.redis.partition(":")
+            self.redis_config = {'host': host, 'port': int(port or 6379)}
+
+    def _redis_config(self, topic: str, group: str) -> Dict[str, Any]:
+        return {**self.redis_config, 'topic': self.prefix + topic, 'group': self.prefix + group,
+                'consumer_name': "bench", 'block_ms': self.args.block_ms}
+
+    def sync(self, topic: str, group: str, max_size: Optional[int] = None):
+        if self.redis_config is None:
+            mq = MemoryMessageQueue()
+            mq.connect({'topic': self.prefix + topic,
+                        'max_size': self.args.queue_size if max_size is None else max_size})
+            return mq
+        from database.redisMemoryMessageQueue import RedisMessageQueue
+        mq = RedisMessageQueue()
+        mq.connect(self._redis_config(topic, group))
+        return mq
+
+    async def async_(self, topic: str, group: str):
+        if self.redis_config is None:
+            mq = AsyncMemoryMessageQueue()
+            await mq.connect({'topic': self.prefix + topic, 'max_size': self.args.queue_size})
+            return mq
+        from database.asyncRedisMessageQueue import AsyncRedisMessageQueue
+        mq = AsyncRedisMessageQueue()
+        await mq.connect(self._redis_config(topic, group))
+        return mq
+
+    def cleanup(self):
+        if self.redis_config is None:
+            return
+        import redis
+        client = redis.Redis(**self.redis_config)
+        keys = list(client.scan_iter(match=self.prefix + "*"))
+        if keys:
+            client.delete(*keys)
+        client.close()
+
+def _stage_messages(stage: str, outcome: str) -> float:
+    return sample_value("rag_stage_messages_total", {"stage": stage, "outcome": outcome})
+
+def _published_fragments() -> int:
+    return int(sample_value("rag_stage_step_seconds_count", {"stage": "clean", "step": "publish"}))
+
+def _processed(stage: str) -> int:
+    return int(_stage_messages(stage, "ok") + _stage_messages(stage, "failed"))
+
+def _pipeline_drained(files: int) -> bool:
+    """每个阶段处理完上游成功发出的全部消息时视为结束；失败的消息不会流向下游"""
+    if _processed("clean") < files:
+        return False
+    fragments = _published_fragments()
+    return (_processed("chunk") >= fragments
+            and _processed("enrich") >= _stage_messages("chunk", "ok")
+            and _processed("index") >= _stage_messages("enrich", "ok"))
+
+async def run_pipeline(args, paths: List[str], workdir: str) -> Dict[str, Any]:
+    queues = QueueFactory(args)
+    transport = build_transport(args)
+
+    llm = FakeLLM(args.llm_latency_ms, args.llm_jitter_ms, args.llm_tail_ratio, args.llm_tail_factor)
+    fake_embed = FakeEmbeddingService(args.embed_dim, args.embed_latency_ms)
+    embed_cache = EmbeddingCache(max_bytes=args.embed_cache_mb * 1024 * 1024)
+    # chunk 与 index 共享同一个向量缓存，与融合模式一致
+    embed_service = CachedEmbeddingService(fake_embed, embed_cache)
+    store = build_store(args, embed_service, workdir)
+
+    CleanerFactory.configure(ExcelCleaner, workers=args.clean_workers, streaming=args.streaming,
+                             extractor=args.extractor)
+    CleanerFactory.configure(JsonCleaner, streaming=args.streaming)
+
+    # 源队列不限长度，所有任务一次性投递
+    source = queues.sync("clean_flow", "clean_group", max_size=0)
+    clean_manager = CleanManager(
+        consumer=queues.sync("clean_flow", "clean_group"),
+        publisher=queues.sync("chunk_flow", "chunk_group"),
+        batch_size=args.batch_size,
+        block_ms=args.block_ms,
+        transport=transport
+    )
+    chunk_manager = ChunkingManager(
+        consumer=queues.sync("chunk_flow", "chunk_group"),
+        publisher=queues.sync("enrich_flow", "enrich_group"),
+        batch_size=args.batch_size,
+        block_ms=args.block_ms,
+        embed_service=embed_service,
+        transport=transport
+    )
+    enrich_manager = EnrichmentManager(
+        consumer=await queues.async_("enrich_flow", "enrich_group"),
+        publisher=await queues.async_("index_flow", "index_group"),
+        enrich_master=EnrichmentMaster(FakeLLMClient(llm), max_concurrency=args.llm_concurrency),
+        tag_manager=StaticTagManager(TAGS),
+        batch_size=args.batch_size,
+        block_ms=args.block_ms,
+        max_inflight=args.enrich_inflight,
+        transport=transport
+    )
+    index_manager = IngestionManager(
+        mq=queues.sync("index_flow", "index_group"),
+        embed_service=embed_service,
+        vector_store=store,
+        registry=MemoryStatusRegistry(),
+        batch_size=args.batch_size,
+        block_ms=args.block_ms,
+        transport=transport
+    )
+
+    rss_before = _peak_rss_mb()
+    start = time.time()
+    for i, path in enumerate(paths):
+        source.produce(TaskMessage(file_path=path, stage="upload", trace_id=f"file{i}"))
+
+    stages = [
+        asyncio.create_task(asyncio.to_thread(clean_manager.start)),
+        asyncio.create_task(asyncio.to_thread(chunk_manager.start)),
+        asyncio.create_task(enrich_manager.start()),
+        asyncio.create_task(asyncio.to_thread(index_manager.start_listening)),
+    ]
+    timed_out = False
+    try:
+        deadline = start + args.timeout_s
+        while not _pipeline_drained(len(paths)):
+            if any(task.done() for task in stages):
+                raise RuntimeError("有阶段提前退出，检查日志中的异常")
+            if time.time() > deadline:
+                timed_out = True
+                break
+            await asyncio.sleep(0.02)
+        wall = time.time() - start
+    finally:
+        for manager in (clean_manager, chunk_manager, enrich_manager, index_manager):
+            manager.stop()
+        for mq in (source, clean_manager.consumer, clean_manager.publisher,
+                   chunk_manager.consumer, chunk_manager.publisher, index_manager.mq):
+            mq.close()
+        await enrich_manager.consumer.close()
+        await enrich_manager.publisher.close()
+        await asyncio.gather(*stages, return_exceptions=True)
+        queues.cleanup()
+
+    fragments = _published_fragments()
+    docs = args.files * args.docs
+    cache_stats = embed_cache.stats()
+    return {
+        "timed_out": timed_out,
+        "wall_s": round(wall, 3),
+        "docs_per_s": round(docs / wall, 2),
+        "fragments": fragments,
+        "fragments_per_s": round(fragments / wall, 2),
+        "nodes_indexed": len(store.ids) if isinstance(store, MemoryVectorStore) else None,
+        "llm": {
+            "calls": llm.calls,
+            "prompt_tokens": llm.prompt_tokens,
+            "completion_tokens": llm.completion_tokens,
+        },
+        "embedding": {
+            "batches": fake_embed.batches,
+            "cache_hit_rate": round(cache_stats["hit_rate"], 4),
+        },
+        "rss_before_run_mb": round(rss_before, 1),
+        "peak_rss_mb": round(_peak_rss_mb(), 1),
+    }
+
+def _lookup(result: Dict[str, Any], path: str) -> Optional[float]:
+    value: Any = result
+    for key in path.split("."):
+        if not isinstance(value, dict) or key not in value:
+            return None
+        value = value[key]
+    return value if isinstance(value, (int, float)) else None
+
+def compare(result: Dict[str, Any], baseline: Dict[str, Any]) -> Dict[str, Any]:
+    """关键指标相对基线的变化；regression 表示朝不利方向变化"""
+    changes = {}
+    for path, higher_is_better in KEY_METRICS:
+        current, previous = _lookup(result, path), _lookup(baseline, path)
+        if current is None or not previous:
+            continue
+        change = (current - previous) / previous * 100
+        changes[path] = {
+            "baseline": previous,
+            "current": current,
+            "change_pct": round(change, 1),
+            "regression": change < 0 if higher_is_better else change > 0,
+        }
+    return changes
+
+def main():
+    parser = argparse.ArgumentParser(description="端到端流水线基准")
+    parser.add_argument("--format", choices=["json", "excel"], default="json", help="合成语料格式")
+    parser.add_argument("--files", type=int, default=4, help="源文件数")
+    parser.add_argument("--docs", type=int, default=100, help="每个文件的新闻条数")
+    parser.add_argument("--queue", choices=["memory", "redis"], default="memory")
+    parser.add_argument("--redis", default="localhost:6379", help="--queue redis 时的 host:port")
+    parser.add_argument("--queue-size", type=int, default=16, help="进程内队列长度上限")
+    parser.add_argument("--batch-size", type=int, default=1, help="每次轮询拉取的消息条数")
+    parser.add_argument("--block-ms", type=int, default=100)
+    parser.add_argument("--transport", choices=["memory", "inline", "artifact"], default="memory",
+                        help="memory 仅适用于进程内队列：载荷对象直接传递")
+    parser.add_argument("--artifact-format", default="json")
+    parser.add_argument("--streaming", action="store_true", help="Excel / JSON 流式解析")
+    parser.add_argument("--clean-workers", type=int, default=1)
+    parser.add_argument("--extractor", default="newspaper", choices=["newspaper", "lxml"])
+    parser.add_argument("--llm-latency-ms", type=float, default=200)
+    parser.add_argument("--llm-jitter-ms", type=float, default=50)
+    parser.add_argument("--llm-tail-ratio", type=float, default=0.0, help="长尾请求比例")
+    parser.add_argument("--llm-tail-factor", type=float, default=5.0, help="长尾请求的延迟倍数")
+    parser.add_argument("--llm-concurrency", type=int, default=5)
+    parser.add_argument("--enrich-inflight", type=int, default=4)
+    parser.add_argument("--embed-dim", type=int, default=512)
+    parser.add_argument("--embed-latency-ms", type=float, default=5, help="每批向量请求的固定延迟")
+    parser.add_argument("--embed-cache-mb", type=int, default=256)
+    parser.add_argument("--store", choices=["memory", "milvus-lite"], default="memory")
+    parser.add_argument("--timeout-s", type=float, default=600)
+    parser.add_argument("--top", type=int, default=5, help="结果中列出端到端最慢的 trace 数量")
+    parser.add_argument("--output", help="结果 JSON 的写入路径")
+    parser.add_argument("--baseline", help="上一次的结果 JSON，用于比较")
+    args = parser.parse_args()
+    if args.queue == "redis" and args.transport == "memory":
+        parser.error("--queue redis 需要 --transport inline 或 artifact")
+
+    with tempfile.TemporaryDirectory() as workdir:
+        paths, corpus_bytes = build_corpus(workdir, args.format, args.files, args.docs)
+        trace_path = os.path.join(workdir, "trace.jsonl")
+        exporter = JsonlSpanExporter(trace_path)
+        configure_exporter(exporter)
+        try:
+            run = asyncio.run(run_pipeline(args, paths, workdir))
+        finally:
+            configure_exporter(None)
+            exporter.close()
+        report = build_report(read_records([trace_path]), args.top)
+
+    config = {k: v for k, v in vars(args).items() if k not in ("output", "baseline")}
+    result = {
+        "benchmark": "pipeline",
+        "revision": _git_revision(),
+        "timestamp": round(time.time(), 3),
+        "config": config,
+        "corpus": {"files": args.files, "docs_per_file": args.docs, "bytes": corpus_bytes},
+        **run,
+        **report,
+    }
+    if args.baseline:
+        with open(args.baseline, encoding="utf-8") as f:
+            result["vs_baseline"] = compare(result, json.load(f))
+
+    text = json.dumps(result, ensure_ascii=False, indent=2)
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as f:
+            f.write(text)
+    print(text)
+
+if __name__ == "__main__":
+    main()
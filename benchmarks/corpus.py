@@ -0,0 +1,40 @@
+import random
+from typing import List
+
+# 合成中文新闻语料：不依赖外部数据，固定 seed 保证多次运行结果可比
+_SUBJECTS = ["国家统计局", "新华社记者", "市政府", "央行", "多家车企", "科研团队", "气象部门", "交通运输部", "教育部", "消费者协会"]
+_VERBS = ["发布", "宣布", "披露", "表示", "通报", "召开会议研究", "启动", "公布了", "提出", "完成"]
+_OBJECTS = [
+    "第三季度国内生产总值同比增长5.2%的数据",
+    "新能源汽车下乡活动的具体方案",
+    "关于进一步优化营商环境的若干措施",
+    "全国大部地区将迎来大范围降温的预报",
+    "城市轨道交通新线路的开通计划",
+    "人工智能大模型在医疗领域的应用成果",
+    "春运期间铁路客流预计突破5亿人次的消息",
+    "LPR 报价保持不变的决定",
+    "义务教育阶段课后服务的实施情况",
+    "电商平台促销活动中的价格欺诈问题",
+]
+_TAILS = ["。", "。", "。", "！", "；", "？"]
+
+def sentence(rng: random.Random) -> str:
+    return f"{rng.choice(_SUBJECTS)}{rng.choice(_VERBS)}{rng.choice(_OBJECTS)}{rng.choice(_TAILS)}"
+
+def article(rng: random.Random, min_sentences: int = 10, max_sentences: int = 60) -> str:
+    paragraphs = []
+    remaining = rng.randint(min_sentences, max_sentences)
+    while remaining > 0:
+        n = min(remaining, rng.randint(2, 6))
+        paragraphs.append("".join(sentence(rng) for _ in range(n)))
+        remaining -= n
+    return "\n".join(paragraphs)
+
+def html_article(rng: random.Random, min_sentences: int = 10, max_sentences: int = 60) -> str:
+    """与抓取导出的 rawHtml / content 列相近的 HTML 正文，每段一个 <p>"""
+    body = "".join(f"<p>{p}</p>" for p in article(rng, min_sentences, max_sentences).split("\n"))
+    return f"<html><body><article>{body}</article></body></html>"
+
+def news_corpus(num_docs: int, seed: int = 42) -> List[str]:
+    rng = random.Random(seed)
+    return [article(rng) for _ in range(num_docs)]
@@ -0,0 +1,147 @@
+"""
+端到端基准使用的本地替身：不访问 DeepSeek、TEI、Milvus 等外部服务，行为可复现。
+"""
+import asyncio
+import hashlib
+import json
+import random
+import struct
+import threading
+import time
+from types import SimpleNamespace
+from typing import Any, Dict, List
+
+from llama_index.core.bridge.pydantic import PrivateAttr
+from llama_index.core.embeddings import BaseEmbedding
+
+from database.interfaces import BaseStore
+from embedding.interfaces import EmbeddingService
+
+class FakeLLM:
+    """
+    模拟 DeepSeek 的 acomplete：延迟为 latency_ms ± jitter_ms 的均匀分布，
+    以 tail_ratio 的概率额外乘以 tail_factor 模拟长尾；返回可被 EnrichmentMaster 解析的 JSON。
+    """
+    def __init__(self, latency_ms: float = 200, jitter_ms: float = 50,
+                 tail_ratio: float = 0.0, tail_factor: float = 5.0, seed: int = 42):
+        self.latency_ms = latency_ms
+        self.jitter_ms = jitter_ms
+        self.tail_ratio = tail_ratio
+        self.tail_factor = tail_factor
+        self._rng = random.Random(seed)
+        self.calls = 0
+        self.prompt_tokens = 0
+        self.completion_tokens = 0
+
+    def _delay_s(self) -> float:
+        delay = self.latency_ms + self._rng.uniform(-self.jitter_ms, self.jitter_ms)
+        if self.tail_ratio and self._rng.random() < self.tail_ratio:
+            delay *= self.tail_factor
+        return max(delay, 0.0) / 1000
+
+    async def acomplete(self, prompt: str) -> Any:
+        self.calls += 1
+        await asyncio.sleep(self._delay_s())
+        digest = hashlib.md5(prompt.encode("utf-8")).hexdigest()
+        body = {
+            "summary": f"摘要{digest[:12]}",
+            "keywords": [f"关键词{digest[i:i + 2]}" for i in range(0, 10, 2)],
+            "tags": ["经济"],
+            "facts": [f"事实{digest[12:20]}"],
+            "metadata": {"publish_date": "2026-01-01", "source": "基准", "location": "", "event_type": "其他"},
+        }
+        text = json.dumps(body, ensure_ascii=False)
+        usage = {"prompt_tokens": len(prompt) // 2, "completion_tokens": len(text) // 2}
+        self.prompt_tokens += usage["prompt_tokens"]
+        self.completion_tokens += usage["completion_tokens"]
+        # 与 llama_index OpenAI 兼容实现一致，token 用量放在 additional_kwargs 中
+        return SimpleNamespace(text=text, additional_kwargs=usage)
+
+class FakeLLMClient:
+    """替代 llm.llm_client.LLMClient：get_llm() 返回共享的 FakeLLM"""
+    def __init__(self, llm: FakeLLM):
+        self._llm = llm
+
+    def get_llm(self, **kwargs) -> FakeLLM:
+        return self._llm
+
+class HashEmbedding(BaseEmbedding):
+    """确定性向量：由文本的 sha256 展开为 dim 维 [-1, 1) 浮点数，相同文本总得到相同向量"""
+    _dim: int = PrivateAttr()
+
+    def __init__(self, dim: int = 512, **kwargs: Any):
+        super().__init__(model_name=f"hash-{dim}", **kwargs)
+        self._dim = dim
+
+    @classmethod
+    def class_name(cls) -> str:
+        return "HashEmbedding"
+
+    def _vector(self, text: str) -> List[float]:
+        values: List[float] = []
+        counter = 0
+        while len(values) < self._dim:
+            block = hashlib.sha256(f"{counter}\x00{text}".encode("utf-8")).digest()
+            values.extend(v / 2 ** 31 for v in struct.unpack("<8i", block))
+            counter += 1
+        return values[: self._dim]
+
+    def _get_query_embedding(self, query: str) -> List[float]:
+        return self._vector(query)
+
+    async def _aget_query_embedding(self, query: str) -> List[float]:
+        return self._vector(query)
+
+    def _get_text_embedding(self, text: str) -> List[float]:
+        return self._vector(text)
+
+class FakeEmbeddingService(EmbeddingService):
+    """HashEmbedding + 每批 latency_ms 的固定延迟，模拟 TEI 的一次 HTTP 往返"""
+    def __init__(self, dim: int = 512, latency_ms: float = 0.0):
+        self._embed_model = HashEmbedding(dim)
+        self.latency_ms = latency_ms
+        self.batches = 0
+
+    def get_embeddings(self, docs: List[str]) -> List[List[float]]:
+        self.batches += 1
+        if self.latency_ms:
+            time.sleep(self.latency_ms / 1000)
+        return [self._embed_model.get_text_embedding(d) for d in docs]
+
+    @property
+    def embed_model(self) -> BaseEmbedding:
+        return self._embed_model
+
+class MemoryVectorStore(BaseStore):
+    """只记录写入的节点 ID，满足 IngestionManager 的 insert / delete_batch 调用"""
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.ids: Dict[str, int] = {}
+
+    def connect(self, config: Dict[str, Any]):
+        pass
+
+    def insert(self, chunks: List[Any]) -> bool:
+        with self._lock:
+            for chunk in chunks:
+                self.ids[chunk.id_] = len(chunk.embedding or [])
+        return True
+
+    def delete_batch(self, ids: List[str]):
+        with self._lock:
+            for chunk_id in ids:
+                self.ids.pop(chunk_id, None)
+
+class StaticTagManager:
+    """替代 TagManager：固定标签列表，不连接 Milvus"""
+    def __init__(self, tags: List[str]):
+        self._tags = tags
+
+    async def start_background_refresh(self):
+        await asyncio.Event().wait()
+
+    def stop_background_refresh(self):
+        pass
+
+    def get_all_tags(self) -> List[str]:
+        return list(self._tags)
@@ -1,17 +1,31 @@
+import logging
+from typing import Optional
+
 from constants import ChunkMethod
+from embedding.interfaces import EmbeddingService
 from .interfaces import ChunkerInterface
 from .strategies.no_split_chunker import NoSplitChunker
 from .strategies.semantic_chunker import SemanticChunker
+from .strategies.sentence_chunker import SentenceChunker
+from .strategies.fixed_size_chunker import FixedSizeChunker
 # 此处可继续导入新增加的策略类
 
 class ChunkerFactory:
     @staticmethod
-    def get_chunker(instructions: ChunkMethod) -> ChunkerInterface:
+    def get_chunker(instructions: ChunkMethod, embed_service: Optional[EmbeddingService] = None) -> ChunkerInterface:
         """
         根据 pipeline_instructions 中的参数决定使用哪种分块器
+        :param embed_service: 语义分块所需的向量服务，未注入时语义分块回退为不分块
         """
         # 假设指令中包含具体的算法选择，默认使用 sentence        
         if instructions == ChunkMethod.SEMANTIC:
-            return SemanticChunker()
+            if embed_service is None:
+                logging.getLogger(__name__).warning("未注入 EmbeddingService，语义分块回退为不分块")
+                return NoSplitChunker()
+            return SemanticChunker(embed_service)
+        elif instructions == ChunkMethod.SENTENCE:
+            return SentenceChunker()
+        elif instructions == ChunkMethod.FIXED_SIZE:
+            return FixedSizeChunker()
         else:
             return NoSplitChunker() # 默认回退
\ No newline at end of file
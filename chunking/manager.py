@@ -1,16 +1,14 @@
-from contextlib import closing
 import json
 import logging
-import os
-import time
-from typing import Dict, Any, List
+from typing import Dict, Any, List, Optional
 
 # 导入工具类
 from constants import ChunkMethod, EnrichmentMethod
 from database.message import TaskMessage,QueueMessage
-from files.ContentLoaderFactory import ContentLoader
-from files.ContentSaverFactory import ContentSaver
+from files.PayloadTransport import PayloadTransport
 from database.interfaces import MessageQueueInterface
+from embedding.interfaces import EmbeddingService
+from metrics.tracing import stamp_message, trace_message, trace_step
 from .chunker_factory import ChunkerFactory
 from files.DocumentFormat import Node, RAGTaskPayload
 
@@ -19,12 +17,22 @@ class ChunkingManager:
         self, 
         consumer: MessageQueueInterface,  # 监听队列：接收来自 Clean 的消息
         publisher: MessageQueueInterface, # 发送队列：发送给 Enrich 的消息
-        poll_interval: float = 1.0
+        batch_size: int = 1,
+        block_ms: int = 1000,
+        embed_service: Optional[EmbeddingService] = None,  # 语义分块使用的向量服务
+        transport: Optional[PayloadTransport] = None  # 分片载荷内联或落盘的策略
     ):
         self.logger = logging.getLogger(__name__)
         self.consumer = consumer
         self.publisher = publisher
-        self.poll_interval = poll_interval
+        self.batch_size = batch_size
+        # 无消息时由队列服务端阻塞等待的时长（毫秒），Manager 不再额外 sleep
+        self.block_ms = block_ms
+        self.embed_service = embed_service
+        self.transport = transport or PayloadTransport()
+        self.running = False
+        # 处理本批最后一条消息时预读的下一批，下一轮 process_task 直接使用
+        self._read_ahead: List[QueueMessage] = []
 
     def start(self):
         """启动持续监听循环"""
@@ -32,13 +40,10 @@ class ChunkingManager:
         self.logger.info("ChunkingManager 已启动，正在监听消息队列...")
         
         try:
-            while self.running:
-                # 尝试处理单条消息
-                success = self.process_task()
-                
-                # 如果没有消息被处理，则进入休眠，避免 CPU 占用过高
-                if not success:
-                    time.sleep(self.poll_interval)
+            # 停止后仍处理完已预读的批次，内存队列中的消息不会因此丢失
+            while self.running or self._read_ahead:
+                # 拉取并处理一批消息；队列为空时 consume_batch 自身阻塞 block_ms
+                self.process_task()
         except KeyboardInterrupt:
             self.stop()
         except Exception as e:
@@ -52,44 +57,71 @@ class ChunkingManager:
 
     def process_task(self) -> bool:
         """
-        处理单个分块任务
+        拉取一批分块任务（最多 batch_size 条）并逐条处理
         返回 True 表示处理了消息，False 表示队列为空
         """
-        # 1. 从 MQ 获取消息
-        message = self.consumer.consume()
-        if not message:
+        # 1. 从 MQ 获取消息；上一轮已预读的批次直接使用
+        if self._read_ahead:
+            messages, self._read_ahead = self._read_ahead, []
+        else:
+            messages = self.consumer.consume_batch(self.batch_size, self.block_ms)
+        if not messages:
             return False
 
-        task = TaskMessage.from_json(message.data)
-        self.logger.info(f"监听到新消息，处理路径: {task.file_path}")
+        acked_ids = []
+        for i, message in enumerate(messages):
+            # 处理当前消息时，后台预取下一条消息引用的远程载荷；
+            # 本批最后一条的载荷需要远程下载时，不阻塞地预读下一批，预取跨越两次拉取（batch_size 为 1 时同样生效）
+            if i + 1 < len(messages):
+                self.transport.prefetch(messages[i + 1].data)
+            elif self.running and self.transport.prefetchable(message.data):
+                self._read_ahead = self.consumer.consume_batch(self.batch_size, 0)
+                if self._read_ahead:
+                    self.transport.prefetch(self._read_ahead[0].data)
+            with trace_message("chunk", message) as trace:
+                trace.error = self._process_message(message)
+                if trace.error is None:
+                    acked_ids.append(message.id)
+                else:
+                    # 失败消息由队列按投递次数退避重投，超过上限转入死信
+                    self.consumer.nack(message, trace.error, stage="chunk")
+        self.consumer.ack_batch(acked_ids)
+        return True
 
+    def _process_message(self, message: QueueMessage) -> Optional[str]:
+        """
+        处理单个分块任务，返回 None 表示可以确认该消息，失败时返回错误信息
+        """
         try:
-            # 1. 加载内容
-            raw_stream = ContentLoader.load_content(task.file_path)
+            task = TaskMessage.from_json(message.data)
+            self.logger.info(f"监听到新消息，处理路径: {task.file_path}")
 
-            # 2. 核心：使用 closing 确保 stream 无论成功失败都会被关闭
-            with closing(raw_stream) as stream:
-                payload = RAGTaskPayload.model_validate_json(raw_stream.getvalue())
+            # 1-2. 加载内容：内联载荷直接解码，否则从 file_path 读取
+            with trace_step("chunk", "load"):
+                payload = self.transport.load(task)
 
             # 3. 解析与分块 (基于 step2_part0.json 结构)
             instr = payload.content.pipeline_instructions
             
             # 使用工厂获取策略
-            chunker = ChunkerFactory.get_chunker(instr.chunk_method)
+            chunker = ChunkerFactory.get_chunker(instr.chunk_method, self.embed_service)
             new_nodes: List[Node] = []
 
             # 4. 更新数据模型
-            for original_node in payload.content.nodes:
-                # 对单个 Node 的内容进行切分
-                # split 应当返回 List[Dict]，包含 chunk_content 和该块特有的 metadata
-                chunks = chunker.split(original_node.page_content, instr.model_dump())
-                
-                for c in chunks:
-                    # 构造新 Node，继承并合并元数据
-                    new_nodes.append(Node(
-                        page_content=c["chunk_content"],
-                        metadata={**original_node.metadata, **c.get("metadata", {})}
-                    ))
+            with trace_step("chunk", "chunk"):
+                for original_node in payload.content.nodes:
+                    # 对单个 Node 的内容进行切分
+                    # split 应当返回 List[Dict]，包含 chunk_content 和该块特有的 metadata
+                    chunks = chunker.split(original_node.page_content, instr.model_dump())
+
+                    parent_id = original_node.metadata.get("internal_id")
+                    for j, c in enumerate(chunks):
+                        # 构造新 Node，继承并合并元数据
+                        metadata = {**original_node.metadata, **c.get("metadata", {})}
+                        # 入库以 file_path:internal_id 作为 chunk_id，切成多块时每块需要各自的 ID
+                        if parent_id and len(chunks) > 1:
+                            metadata["internal_id"] = f"{parent_id}_c{j}"
+                        new_nodes.append(Node(page_content=c["chunk_content"], metadata=metadata))
 
             # 5. 更新 Payload 数据结构
             payload.content.nodes = new_nodes
@@ -106,23 +138,18 @@ class ChunkingManager:
                 ]
             
             # 7. 持久化并发送下一阶段消息
-            base_path, ext = os.path.splitext(task.file_path)
-            output_path = f"{base_path}_chunked{ext}"
-            ContentSaver.save_content(
-                content=payload.model_dump_json(ensure_ascii=False), # 序列化整个对象
-                path=output_path,
-                metadata=payload.metadata
-            )
-
-            # 发送下一阶段的消息
-            next_msg = TaskMessage(
-                file_path=output_path,
-                stage="chunking_complete",
-                trace_id=task.trace_id
-            )
-            self.publisher.produce(next_msg.to_json())
-            self.consumer.ack(message.id)
-            return True
+            output_path = self.transport.artifact_path(task.file_path, "_chunked")
+            # 发送下一阶段的消息；载荷按大小内联或写入 output_path
+            with trace_step("chunk", "publish"):
+                next_msg = self.transport.publish(
+                    payload,
+                    path=output_path,
+                    stage="chunking_complete",
+                    trace_id=task.trace_id
+                )
+                stamp_message(next_msg)
+                self.publisher.produce(next_msg)
+            return None
         except Exception as e:
             self.logger.error(f"处理失败: {task.file_path if 'task' in locals() else 'unknown'}, 错误: {e}")
-            return True # 坏消息不再重试
\ No newline at end of file
+            return f"{type(e).__name__}: {e}"
\ No newline at end of file
@@ -1,7 +1,11 @@
 from .no_split_chunker import NoSplitChunker
 from .semantic_chunker import SemanticChunker
+from .sentence_chunker import SentenceChunker
+from .fixed_size_chunker import FixedSizeChunker
 
 __all__ = [
     "NoSplitChunker",
-    "SemanticChunker"
+    "SemanticChunker",
+    "SentenceChunker",
+    "FixedSizeChunker"
 ]
\ No newline at end of file
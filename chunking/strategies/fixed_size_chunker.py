@@ -0,0 +1,33 @@
+from ..interfaces import ChunkerInterface
+from ..text_utils import TokenCounter, get_token_counter
+from typing import List, Dict, Any, Optional
+
+class FixedSizeChunker(ChunkerInterface):
+    """
+    固定窗口分块器：每块 chunk_size 个 token，相邻块重叠 chunk_overlap 个 token
+    整篇文本只分词一次，窗口直接在 token 偏移上滑动，按偏移切原文。
+    """
+    def __init__(self, token_counter: Optional[TokenCounter] = None):
+        self.token_counter = token_counter or get_token_counter()
+
+    def split(self, text: str, options: Dict[str, Any]) -> List[Dict[str, Any]]:
+        chunk_size = options.get("chunk_size") or 500
+        chunk_overlap = options.get("chunk_overlap") or 0
+        # 重叠不小于窗口时窗口无法前进，至少前进 1 个 token
+        step = max(chunk_size - chunk_overlap, 1)
+
+        offsets = self.token_counter.offsets(text)
+        if len(offsets) <= chunk_size:
+            return [self._make_chunk(text.strip())]
+
+        chunks = []
+        for i in range(0, len(offsets), step):
+            j = min(i + chunk_size, len(offsets))
+            chunks.append(self._make_chunk(text[offsets[i][0]:offsets[j - 1][1]]))
+            if j == len(offsets):
+                break
+        return chunks
+
+    @staticmethod
+    def _make_chunk(content: str) -> Dict[str, Any]:
+        return {"chunk_content": content, "metadata": {"strategy": "fixed_size"}}
@@ -1,8 +1,64 @@
 from ..interfaces import ChunkerInterface
-from typing import List, Dict, Any
+from ..text_utils import TokenCounter, sentence_spans, fit_spans, pack_spans, overlap_start, get_token_counter
+from embedding.interfaces import EmbeddingService
+from typing import List, Dict, Any, Optional, Tuple
+import numpy as np
 
 class SemanticChunker(ChunkerInterface):
-    """语义分块器：根据向量相似度寻找断句点"""
+    """
+    语义分块器：根据相邻句子的向量相似度寻找断句点
+    1. 按中文标点切句，所有句子一次批量计算向量
+    2. 向量化计算相邻句子的余弦距离，距离高于 breakpoint_percentile 分位数处断开
+    3. 每个语义段再按 chunk_size 装箱，并按 chunk_overlap 携带上一块末尾的句子（均以 token 计）
+    传入带缓存的 EmbeddingService 时，句子向量写入本进程的缓存，重复处理同一文档时不再请求向量服务。
+    句子向量只用于断句，不随块下发：句向量均值与查询向量不在同一空间，index 阶段对块原文重新计算向量。
+    """
+    def __init__(
+        self,
+        embed_service: EmbeddingService,
+        breakpoint_percentile: float = 95.0,
+        token_counter: Optional[TokenCounter] = None
+    ):
+        self.embed_service = embed_service
+        self.breakpoint_percentile = breakpoint_percentile
+        self.token_counter = token_counter or get_token_counter()
+
     def split(self, text: str, options: Dict[str, Any]) -> List[Dict[str, Any]]:
-        # TODO: 后续接入 Embedding 模型逻辑
-        return [{"chunk_content": text, "metadata": {"strategy": "semantic_pending"}}]
\ No newline at end of file
+        chunk_size = options.get("chunk_size") or 500
+        chunk_overlap = options.get("chunk_overlap") or 0
+        percentile = options.get("breakpoint_percentile") or self.breakpoint_percentile
+
+        # 重叠部分计入块长度，装箱时预留出 chunk_overlap
+        budget = max(chunk_size - chunk_overlap, 1)
+
+        spans, lengths = fit_spans(sentence_spans(text), self.token_counter.offsets(text), budget)
+        if len(spans) <= 1:
+            return [self._make_chunk(text.strip())]
+
+        # 1. 一次批量计算全部句子向量
+        sentences = [text[s:e].strip() for s, e in spans]
+        embeddings = np.asarray(self.embed_service.get_embeddings(sentences), dtype=np.float32)
+
+        # 2. 相邻句子余弦距离，一次向量化计算
+        norms = np.linalg.norm(embeddings, axis=1, keepdims=True)
+        embeddings = embeddings / np.maximum(norms, 1e-12)
+        distances = 1.0 - np.einsum("ij,ij->i", embeddings[:-1], embeddings[1:])
+        threshold = np.percentile(distances, percentile)
+        breakpoints = (np.flatnonzero(distances > threshold) + 1).tolist()
+
+        # 3. 语义段内按 token 数装箱
+        bounds = [0] + breakpoints + [len(spans)]
+        groups: List[Tuple[int, int]] = []
+        for seg_start, seg_end in zip(bounds[:-1], bounds[1:]):
+            groups.extend(pack_spans(lengths, seg_start, seg_end, budget))
+
+        chunks = []
+        for idx, (first, last) in enumerate(groups):
+            if idx > 0 and chunk_overlap > 0:
+                first = overlap_start(lengths, first, chunk_overlap, groups[idx - 1][0])
+            chunks.append(self._make_chunk(text[spans[first][0]:spans[last - 1][1]].strip()))
+        return chunks
+
+    @staticmethod
+    def _make_chunk(content: str) -> Dict[str, Any]:
+        return {"chunk_content": content, "metadata": {"strategy": "semantic"}}
@@ -0,0 +1,34 @@
+from ..interfaces import ChunkerInterface
+from ..text_utils import TokenCounter, sentence_spans, fit_spans, pack_spans, overlap_start, get_token_counter
+from typing import List, Dict, Any, Optional
+
+class SentenceChunker(ChunkerInterface):
+    """
+    句子分块器：按句子边界装箱，chunk_size / chunk_overlap 以嵌入模型的 token 计
+    单句超过 chunk_size 时按 token 窗口切开，保证每块都不会被向量模型截断。
+    """
+    def __init__(self, token_counter: Optional[TokenCounter] = None):
+        self.token_counter = token_counter or get_token_counter()
+
+    def split(self, text: str, options: Dict[str, Any]) -> List[Dict[str, Any]]:
+        chunk_size = options.get("chunk_size") or 500
+        chunk_overlap = options.get("chunk_overlap") or 0
+
+        # 重叠部分计入块长度，装箱时预留出 chunk_overlap
+        budget = max(chunk_size - chunk_overlap, 1)
+
+        spans, lengths = fit_spans(sentence_spans(text), self.token_counter.offsets(text), budget)
+        if len(spans) <= 1:
+            return [self._make_chunk(text.strip())]
+
+        groups = pack_spans(lengths, 0, len(spans), budget)
+        chunks = []
+        for idx, (first, last) in enumerate(groups):
+            if idx > 0 and chunk_overlap > 0:
+                first = overlap_start(lengths, first, chunk_overlap, groups[idx - 1][0])
+            chunks.append(self._make_chunk(text[spans[first][0]:spans[last - 1][1]].strip()))
+        return chunks
+
+    @staticmethod
+    def _make_chunk(content: str) -> Dict[str, Any]:
+        return {"chunk_content": content, "metadata": {"strategy": "sentence"}}
@@ -0,0 +1,128 @@
+import logging
+import os
+import re
+import threading
+from typing import List, Optional, Tuple
+
+# 中文句末标点（可跟随右引号/右括号）、换行，以及英文句点后的空白
+_SENTENCE_END = re.compile(r'[。！？!?；;…]+[”’"」』）)]*|\n+|(?<=\.)\s+')
+
+# 分词器不可用时的近似切分：单个汉字、连续字母数字、其它非空白字符各算一个 token，
+# 与 BERT 类中文分词器的 BasicTokenizer 行为接近
+_APPROX_TOKEN = re.compile(r'[\u3400-\u9fff\uf900-\ufaff]|[A-Za-z0-9]+|[^\sA-Za-z0-9\u3400-\u9fff\uf900-\ufaff]')
+
+# 镜像构建时写入的 tokenizer.json（见 dockerfile），运行时不访问 Hugging Face Hub
+DEFAULT_TOKENIZER = "/opt/models/chunk_tokenizer.json"
+
+def sentence_spans(text: str) -> List[Tuple[int, int]]:
+    """
+    按句切分，返回每个句子在原文中的 (start, end) 偏移。
+    只返回偏移而不复制子串，调用方按需切片，保证分块结果是原文的连续片段。
+    """
+    spans = []
+    start = 0
+    for m in _SENTENCE_END.finditer(text):
+        end = m.end()
+        if text[start:end].strip():
+            spans.append((start, end))
+        start = end
+    if text[start:].strip():
+        spans.append((start, len(text)))
+    return spans
+
+class TokenCounter:
+    """
+    按嵌入模型的分词器计算 token 在原文中的偏移，使 chunk_size / chunk_overlap 以 token 计。
+    整篇文本只分词一次，后续分块都在偏移数组上完成。
+    分词器只从本地 tokenizer.json 加载：显式指定的路径不可用时直接抛出异常；
+    使用默认路径且文件不存在时记录一次警告，回退为正则近似。
+    """
+    def __init__(self, tokenizer_path: Optional[str] = None):
+        self.logger = logging.getLogger(__name__)
+        self.tokenizer = self._load(tokenizer_path) if tokenizer_path else self._load_default()
+
+    def _load(self, path: str):
+        if not os.path.isfile(path):
+            raise FileNotFoundError(f"分词器文件不存在: {path}（Chunk_Tokenizer 需为 tokenizer.json 的路径）")
+        from tokenizers import Tokenizer
+        tokenizer = Tokenizer.from_file(path)
+        # 模型自带的截断配置（通常为 512）会丢掉长文本的偏移
+        tokenizer.no_truncation()
+        tokenizer.no_padding()
+        self.logger.info(f"分词器已加载: {path}")
+        return tokenizer
+
+    def _load_default(self):
+        if not os.path.isfile(DEFAULT_TOKENIZER):
+            self.logger.warning(
+                f"未找到分词器 {DEFAULT_TOKENIZER}，chunk_size / chunk_overlap 按字符近似计算 token；"
+                f"设置 Chunk_Tokenizer 指定 tokenizer.json 路径"
+            )
+            return None
+        return self._load(DEFAULT_TOKENIZER)
+
+    def offsets(self, text: str) -> List[Tuple[int, int]]:
+        """返回每个 token 的 (start, end) 字符偏移"""
+        if self.tokenizer is not None:
+            return self.tokenizer.encode(text, add_special_tokens=False).offsets
+        return [m.span() for m in _APPROX_TOKEN.finditer(text)]
+
+_token_counter: Optional[TokenCounter] = None
+_token_counter_lock = threading.Lock()
+
+def get_token_counter() -> TokenCounter:
+    """进程内共享的 TokenCounter，分词器由环境变量 Chunk_Tokenizer 指定（tokenizer.json 路径）"""
+    global _token_counter
+    with _token_counter_lock:
+        if _token_counter is None:
+            _token_counter = TokenCounter(os.getenv('Chunk_Tokenizer'))
+        return _token_counter
+
+def fit_spans(
+    spans: List[Tuple[int, int]],
+    offsets: List[Tuple[int, int]],
+    max_tokens: int
+) -> Tuple[List[Tuple[int, int]], List[int]]:
+    """
+    单次线性扫描，为每个区间统计 token 数；超过 max_tokens 的区间按 token 窗口继续切开。
+    返回新的区间列表及对应的 token 数。
+    """
+    fitted, counts = [], []
+    t, n = 0, len(offsets)
+    for start, end in spans:
+        while t < n and offsets[t][0] < start:
+            t += 1
+        first = t
+        while t < n and offsets[t][0] < end:
+            t += 1
+
+        if t - first <= max_tokens:
+            fitted.append((start, end))
+            counts.append(t - first)
+            continue
+
+        for i in range(first, t, max_tokens):
+            j = min(i + max_tokens, t)
+            fitted.append((start if i == first else offsets[i][0], end if j == t else offsets[j - 1][1]))
+            counts.append(j - i)
+    return fitted, counts
+
+def pack_spans(lengths: List[int], start: int, end: int, max_len: int) -> List[Tuple[int, int]]:
+    """把 [start, end) 区间的句子贪心装入总长度不超过 max_len 的块，返回句子下标区间"""
+    groups = []
+    group_start, size = start, 0
+    for i in range(start, end):
+        if size and size + lengths[i] > max_len:
+            groups.append((group_start, i))
+            group_start, size = i, 0
+        size += lengths[i]
+    groups.append((group_start, end))
+    return groups
+
+def overlap_start(lengths: List[int], first: int, overlap: int, floor: int) -> int:
+    """从 first 向前回溯上一块末尾的句子，总长度不超过 overlap，且不越过上一块的起点 floor"""
+    size = 0
+    while first - 1 > floor and size + lengths[first - 1] <= overlap:
+        first -= 1
+        size += lengths[first]
+    return first
@@ -1,46 +1,152 @@
+import dataclasses
+import heapq
+import itertools
 import queue
 import logging
-from typing import Any, Optional, Dict
+import threading
+import time
+from typing import Any, List, Optional, Dict, Tuple
+
+from .message import QueueMessage
 from .interfaces import MessageQueueInterface
+from .retryPolicy import RetryPolicy
 
 class MemoryMessageQueue(MessageQueueInterface):
+    """
+    进程内队列：同一 Topic 在所有实例间共享，可用于单进程内串联多个阶段。
+    max_size > 0 时为有界队列，队列满时 produce 阻塞，形成阶段间背压。
+    max_deliveries > 0 时 nack 的消息按 RetryPolicy 退避后由本实例重新投递，投递满 max_deliveries 次后丢弃
+    （没有死信流）；为 0 时出队即删除，失败消息直接丢弃。待重投的消息只保存在本进程内存中，进程退出即丢失。
+    """
+
+    # 按 Topic 共享的队列，生产者与消费者实例各自 connect 到同一 Topic
+    _topic_queues: Dict[str, queue.Queue] = {}
+    _topic_lock = threading.Lock()
+    _id_seq = itertools.count(1)
+
+    # 阻塞 put 时检查连接状态的间隔（秒），close 后生产者能及时退出
+    _PUT_POLL_SECONDS = 0.5
+
     def __init__(self):
         self.logger = logging.getLogger(__name__)
-        self._topic_queues: Dict[str, queue.Queue] = {}
         self._active_topic: Optional[str] = None
         self._is_connected = False
+        self.block_ms = 0
+        self.retry_policy = RetryPolicy()
+        # 待重投的消息：(可投递的 monotonic 时间, 序号, 消息) 小顶堆；不受 max_size 限制，
+        # 消费者 nack 时不会因队列已满而阻塞
+        self._retries: List[Tuple[float, int, QueueMessage]] = []
+        self._retry_seq = itertools.count()
+        self._retry_lock = threading.Lock()
 
     def connect(self, config: Dict[str, Any]):
         """绑定指定的 Topic 并初始化队列"""
         topic = config.get("topic", "default_ingestion")
-        if topic not in self._topic_queues:
-            self._topic_queues[topic] = queue.Queue()
-        
+        with self._topic_lock:
+            if topic not in self._topic_queues:
+                self._topic_queues[topic] = queue.Queue(maxsize=config.get("max_size", 0))
+
         self._active_topic = topic
+        # 默认不阻塞；Manager 通过 block_ms 使用 queue.Queue.get(timeout=...) 阻塞等待
+        self.block_ms = config.get("block_ms", 0)
+        self.retry_policy = RetryPolicy.from_config(config)
         self._is_connected = True
         self.logger.info(f"MemoryMQ 已连接到 Topic: {self._active_topic}")
 
     def produce(self, message: Any):
-        """向当前激活的 Topic 发送消息"""
+        """向当前激活的 Topic 发送消息；消息对象原样入队，不做序列化"""
         if not self._is_connected:
             raise ConnectionError("请先调用 connect() 绑定 Topic")
-        
-        self._topic_queues[self._active_topic].put(message)
+
+        # 与 RedisMessageQueue 保持一致：消费端拿到的是 QueueMessage 包装
+        wrapped = QueueMessage(id=str(next(self._id_seq)), data=message)
+        q = self._topic_queues[self._active_topic]
+        while True:
+            try:
+                q.put(wrapped, timeout=self._PUT_POLL_SECONDS)
+                break
+            except queue.Full:
+                if not self._is_connected:
+                    raise ConnectionError(f"MemoryMQ 已关闭，消息未能写入 {self._active_topic}")
         self.logger.debug(f"已存入消息到 {self._active_topic}")
+        return wrapped.id
 
-    def consume(self) -> Optional[Any]:
+    def consume(self, block_ms: Optional[int] = None) -> Optional[QueueMessage]:
         """从当前绑定的 Topic 消费消息"""
+        messages = self.consume_batch(1, block_ms)
+        return messages[0] if messages else None
+
+    def consume_batch(self, max_messages: int = 10, block_ms: Optional[int] = None) -> List[QueueMessage]:
+        """取出最多 max_messages 条消息，退避到期的重投消息优先；仅在第一条上按 block_ms 等待"""
         if not self._is_connected or not self._active_topic:
-            return None
-            
+            return []
+
+        block_ms = self.block_ms if block_ms is None else block_ms
+        q = self._topic_queues[self._active_topic]
+        batch = self._pop_retries(max_messages)
+        # 等待新消息时不越过下一条重投消息的到期时间
+        timeout = 0.0 if batch else block_ms / 1000
+        next_retry = self._next_retry_in()
+        if timeout and next_retry is not None:
+            timeout = min(timeout, next_retry)
         try:
-            # block=False 保证 Manager 在轮询时不会卡死
-            return self._topic_queues[self._active_topic].get(block=False)
+            if timeout > 0:
+                batch.append(q.get(timeout=timeout))
+            while len(batch) < max_messages:
+                batch.append(q.get(block=False))
         except queue.Empty:
-            return None
+            pass
+        return batch or self._pop_retries(max_messages)
+
+    def _pop_retries(self, limit: int) -> List[QueueMessage]:
+        now = time.monotonic()
+        ready: List[QueueMessage] = []
+        with self._retry_lock:
+            while self._retries and self._retries[0][0] <= now and len(ready) < limit:
+                ready.append(heapq.heappop(self._retries)[2])
+        return ready
+
+    def _next_retry_in(self) -> Optional[float]:
+        """距下一条重投消息到期的秒数，没有待重投消息时返回 None"""
+        with self._retry_lock:
+            if not self._retries:
+                return None
+            return max(self._retries[0][0] - time.monotonic(), 0.0)
+
+    def ack(self, message_id: str) -> bool:
+        """内存队列出队即删除，无需确认"""
+        return True
+
+    def ack_batch(self, message_ids: List[str]) -> int:
+        return len(message_ids)
+
+    def nack(self, message: QueueMessage, error: str, stage: str) -> bool:
+        """
+        按 RetryPolicy 退避后重新投递失败消息；未开启重投或投递次数用尽时记录错误后丢弃
+        返回 True 表示消息已丢弃，False 表示将重投
+        """
+        policy = self.retry_policy
+        if not policy.max_deliveries or policy.exhausted(message.delivery_count):
+            self.logger.error(f"消息 {message.id} 处理失败 {message.delivery_count} 次，已丢弃 (stage={stage}): {error}")
+            return True
+
+        ready_at = time.monotonic() + policy.delay_ms(message.delivery_count) / 1000
+        retry = dataclasses.replace(message, delivery_count=message.delivery_count + 1)
+        with self._retry_lock:
+            heapq.heappush(self._retries, (ready_at, next(self._retry_seq), retry))
+        self.logger.warning(f"消息 {message.id} 处理失败，第 {message.delivery_count} 次投递，稍后重投 (stage={stage}): {error}")
+        return False
+
+    def qsize(self) -> int:
+        """当前 Topic 中待消费的消息数，包括本实例待重投的消息"""
+        if not self._active_topic:
+            return 0
+        with self._retry_lock:
+            retries = len(self._retries)
+        return self._topic_queues[self._active_topic].qsize() + retries
 
     def close(self):
-        """清理资源并重置状态"""
+        """清理资源并重置状态；Topic 队列本身保留，供仍连接着的其它实例使用"""
         self._is_connected = False
         self._active_topic = None
-        self.logger.info("MemoryMQ 连接已关闭")
\ No newline at end of file
+        self.logger.info("MemoryMQ 连接已关闭")
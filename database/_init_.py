@@ -3,12 +3,17 @@ from .interfaces import HybridStoreInterface
 from .interfaces import BaseStatusRegistry
 from .interfaces import BaseStore
 from .interfaces import MessageQueueInterface
+from .interfaces import AsyncMessageQueueInterface
 from .memoryRegistry_impl import MemoryStatusRegistry
+from .redisRegistry_impl import RedisStatusRegistry
+from .sqliteRegistry_impl import SqliteStatusRegistry
 from .ChromadbVectorStorage import ChromadbServices
 from .MilvusHybridStore import MilvusHybridStore
 from .tagmanger import TagManager
 from .MemoryMessageQueue import MemoryMessageQueue
 from .redisMemoryMessageQueue import RedisMessageQueue
+from .asyncRedisMessageQueue import AsyncRedisMessageQueue
+from .asyncMemoryMessageQueue import AsyncMemoryMessageQueue
 from .message import QueueMessage
 
 
@@ -18,11 +23,16 @@ __all__ = [
     "BaseStatusRegistry",
     "BaseStore",
     "MessageQueueInterface",
+    "AsyncMessageQueueInterface",
     "MemoryStatusRegistry",
+    "RedisStatusRegistry",
+    "SqliteStatusRegistry",
     "ChromadbServices",
     "MilvusHybridStore",
     "MemoryMessageQueue",
     "RedisMessageQueue",
+    "AsyncRedisMessageQueue",
+    "AsyncMemoryMessageQueue",
     "IngestionTaskSchema",
     "QueueMessage",
     "TagManager"
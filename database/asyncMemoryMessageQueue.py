@@ -0,0 +1,49 @@
+import asyncio
+import logging
+from typing import Any, Dict, List, Optional
+
+from .message import QueueMessage
+from .interfaces import AsyncMessageQueueInterface
+from .MemoryMessageQueue import MemoryMessageQueue
+
+class AsyncMemoryMessageQueue(AsyncMessageQueueInterface):
+    """
+    MemoryMessageQueue 的协程适配：阻塞的 get/put 放到线程中执行，
+    使运行在事件循环中的 Manager 可以与线程中的同步 Manager 共享同一 Topic。
+    """
+    def __init__(self):
+        self.logger = logging.getLogger(__name__)
+        self._queue = MemoryMessageQueue()
+
+    async def connect(self, config: Dict[str, Any]):
+        self._queue.connect(config)
+
+    async def produce(self, message: Any):
+        return await asyncio.to_thread(self._queue.produce, message)
+
+    async def consume(self, block_ms: Optional[int] = None) -> Optional[QueueMessage]:
+        messages = await self.consume_batch(1, block_ms)
+        return messages[0] if messages else None
+
+    async def consume_batch(self, max_messages: int = 10, block_ms: Optional[int] = None) -> List[QueueMessage]:
+        # 非阻塞读取直接在事件循环中完成，只有需要等待时才占用线程
+        messages = self._queue.consume_batch(max_messages, 0)
+        if messages:
+            return messages
+        return await asyncio.to_thread(self._queue.consume_batch, max_messages, block_ms)
+
+    async def ack(self, message_id: str) -> bool:
+        return self._queue.ack(message_id)
+
+    async def ack_batch(self, message_ids: List[str]) -> int:
+        return self._queue.ack_batch(message_ids)
+
+    async def nack(self, message: QueueMessage, error: str, stage: str) -> bool:
+        return self._queue.nack(message, error, stage)
+
+    def qsize(self) -> int:
+        """当前 Topic 中待消费的消息数（同步方法，供指标抓取线程直接读取）"""
+        return self._queue.qsize()
+
+    async def close(self):
+        self._queue.close()
@@ -0,0 +1,353 @@
+import json
+import logging
+import asyncio
+import time
+from typing import Any, Dict, List, Optional, Tuple
+
+import redis
+import redis.asyncio as aioredis
+
+from .message import QueueMessage, serialize_message
+from .interfaces import AsyncMessageQueueInterface
+from .retryPolicy import PendingScan, PendingTracker, RetryPolicy, dead_letter_fields
+
+class AsyncRedisMessageQueue(AsyncMessageQueueInterface):
+    """
+    基于 redis.asyncio 的 Stream 队列，读写语义与 RedisMessageQueue 保持一致。
+    XREADGROUP 的阻塞等待在事件循环中挂起，不会饿死同进程内的 LLM 调用与后台任务。
+    """
+
+    # 同一进程内按 (host, port, db) 共享连接池，consumer 与 publisher 复用同一组连接
+    _pools: Dict[Tuple[str, Any, int], aioredis.ConnectionPool] = {}
+
+    def __init__(self):
+        self.logger = logging.getLogger(__name__)
+        # PEL 状态与重投、死信决策，与 RedisMessageQueue 共用；多条消息并发处理时，
+        # 重读 PEL 跳过仍在处理中的条目，避免同一消息被重复投递
+        self._pel = PendingTracker(RetryPolicy())
+
+    async def connect(self, config: Dict[str, Any]):
+        """绑定指定的 Topic 并初始化队列"""
+        self.client = aioredis.Redis(connection_pool=self._get_pool(config))
+        self.stream = config.get('topic', 'default_stream')
+        self.group = config.get('group', 'default_group')
+        self.consumer_name = config.get('consumer_name', 'worker_1')
+        self.block_ms = config.get('block_ms', 1000)
+        # 接管组内其他消费者遗留的 Pending 消息，语义与 RedisMessageQueue 相同；reclaim_idle_ms 为 0 时关闭
+        self.reclaim_idle_ms = config.get('reclaim_idle_ms', 0)
+        self.reclaim_interval_ms = config.get('reclaim_interval_ms', 30000)
+        self.reclaimed_total = 0
+        self._reclaim_cursor = '0-0'
+        self._next_reclaim = 0.0
+        # 失败重试与死信，语义与 RedisMessageQueue 相同
+        self.retry_policy = RetryPolicy.from_config(config)
+        self._pel = PendingTracker(self.retry_policy)
+        self.dlq_topic = config.get('dlq_topic', f"{self.stream}_dlq")
+        self.dead_lettered_total = 0
+        # 生产端流控，语义与 RedisMessageQueue 相同（group 配置为下游消费者组）
+        self.high_water = config.get('high_water', 0)
+        self.low_water = config.get('low_water', self.high_water // 2)
+        self.trim_acked = config.get('trim_acked', False)
+        self.maxlen = config.get('maxlen', 0)
+        self.flow_check_interval_ms = config.get('flow_check_interval_ms', 1000)
+        self.max_pause_ms = config.get('max_pause_ms', 0)
+        self.throttled_seconds = 0.0
+        self._next_flow_check = 0.0
+        self._depth_estimate = 0
+
+        # 尝试创建消费者组（如果已存在则忽略错误）
+        try:
+            await self.client.xgroup_create(self.stream, self.group, id='0', mkstream=True)
+        except redis.exceptions.ResponseError:
+            pass
+
+    @classmethod
+    def _get_pool(cls, config: Dict[str, Any]) -> aioredis.ConnectionPool:
+        key = (config.get('host', 'localhost'), config.get('port', 6379), config.get('db', 0))
+        pool = cls._pools.get(key)
+        if pool is None:
+            pool = aioredis.ConnectionPool(
+                host=key[0],
+                port=key[1],
+                db=key[2],
+                max_connections=config.get('max_connections', 16),
+                decode_responses=True
+            )
+            cls._pools[key] = pool
+        return pool
+
+    async def produce(self, message: Any):
+        """向当前激活的 Topic 发送消息；下游积压超过高水位时先挂起等待，不阻塞事件循环"""
+        await self._apply_backpressure()
+        data = {"payload": serialize_message(message)}
+        if self.maxlen:
+            return await self.client.xadd(self.stream, data, maxlen=self.maxlen, approximate=True)
+        return await self.client.xadd(self.stream, data)
+
+    async def _apply_backpressure(self):
+        if not (self.high_water or self.trim_acked):
+            return
+        self._depth_estimate += 1
+        if time.monotonic() < self._next_flow_check and not (
+                self.high_water and self._depth_estimate >= self.high_water):
+            return
+        self._next_flow_check = time.monotonic() + self.flow_check_interval_ms / 1000
+        depth = await self.downstream_depth()
+        self._depth_estimate = depth or 0
+        if not self.high_water or depth is None or depth < self.high_water:
+            return
+
+        self.logger.warning(
+            f"下游 {self.stream}/{self.group} 积压 {depth} 条，超过高水位 {self.high_water}，暂停生产"
+        )
+        start = time.monotonic()
+        while depth is not None and depth > self.low_water:
+            if self.max_pause_ms and (time.monotonic() - start) * 1000 >= self.max_pause_ms:
+                self.logger.warning(f"暂停已达 {self.max_pause_ms} ms 上限，继续发布一条消息")
+                break
+            await asyncio.sleep(self.flow_check_interval_ms / 1000)
+            depth = await self.downstream_depth()
+        waited = time.monotonic() - start
+        self._depth_estimate = depth or 0
+        self.throttled_seconds += waited
+        self.logger.info(f"下游 {self.stream}/{self.group} 积压 {depth} 条，恢复生产 (等待 {waited:.1f}s)")
+
+    async def downstream_depth(self) -> Optional[int]:
+        """下游消费者组尚未确认的消息数（lag + pending），trim_acked 时顺带修剪已确认的条目"""
+        try:
+            groups = await self.client.xinfo_groups(self.stream)
+            info = next((g for g in groups if g['name'] == self.group), None)
+            if info is None:
+                return await self.client.xlen(self.stream)
+
+            if self.trim_acked:
+                await self._trim_acked(info)
+            if info.get('lag') is None:
+                return await self.client.xlen(self.stream)
+            return info['lag'] + info['pending']
+        except Exception as e:
+            self.logger.error(f"查询下游积压失败: {e}")
+            return None
+
+    async def _trim_acked(self, info: Dict[str, Any]):
+        # 早于最老未确认条目的消息均已被下游确认；没有未确认条目时以 last-delivered-id 为界
+        if info['pending']:
+            min_id = (await self.client.xpending(self.stream, self.group))['min']
+        else:
+            min_id = info['last-delivered-id']
+        if min_id and min_id != '0-0':
+            await self.client.xtrim(self.stream, minid=min_id, approximate=True)
+
+    async def consume(self, block_ms: Optional[int] = None) -> Optional[QueueMessage]:
+        messages = await self.consume_batch(1, block_ms)
+        return messages[0] if messages else None
+
+    async def consume_batch(self, max_messages: int = 10, block_ms: Optional[int] = None) -> List[QueueMessage]:
+        """读取顺序与 RedisMessageQueue.consume_batch 相同：接管滞留消息、重投退避到期的失败消息、读取新消息"""
+        reclaimed = await self._maybe_reclaim(max_messages)
+        if reclaimed:
+            return self._pel.mark_delivered(reclaimed)
+
+        if self._pel.check_pending:
+            messages, waiting = await self._read_pending(max_messages)
+            self._pel.scanned(bool(messages), waiting)
+            if messages:
+                return self._pel.mark_delivered(messages)
+            if not waiting:
+                self.logger.debug(f"Consumer {self.consumer_name} PEL is empty.")
+
+        messages = await self._read_batch_from_redis(
+            last_id='>',
+            block=self.block_ms if block_ms is None else block_ms,
+            count=max_messages
+        )
+        return self._pel.mark_delivered(messages)
+
+    async def _read_pending(self, max_messages: int) -> Tuple[List[QueueMessage], bool]:
+        """
+        用 XPENDING 扫描本消费者的 PEL（不增加投递次数），返回 (可重投的消息, 是否还有退避期内的条目)；
+        选取规则见 PendingTracker.scan_page
+        """
+        scan = PendingScan(max_messages)
+        start = '-'
+        try:
+            while start:
+                entries = await self.client.xpending_range(
+                    self.stream, self.group, min=start, max='+',
+                    count=self._pel.SCAN_COUNT, consumername=self.consumer_name
+                )
+                start = self._pel.scan_page(scan, entries)
+
+            if not scan.prior:
+                return [], scan.waiting
+            claimed = await self.client.xclaim(
+                self.stream, self.group, self.consumer_name, min_idle_time=0, message_ids=list(scan.prior)
+            )
+            messages = self._to_messages(claimed)
+            missing = self._pel.missing(scan.prior, messages)
+            if missing:
+                await self.client.xack(self.stream, self.group, *missing)
+            return await self._deliver_claimed(messages, scan.prior), scan.waiting
+        except Exception as e:
+            self.logger.error(f"Read pending error from Redis: {e}")
+            return [], True
+
+    async def _deliver_claimed(self, messages: List[QueueMessage], prior: Dict[str, int]) -> List[QueueMessage]:
+        """已达上限的转入死信，其余交给调用方"""
+        deliverable, exhausted = self._pel.split_claimed(messages, prior)
+        if exhausted:
+            await self._dead_letter(exhausted, self._pel.EXHAUSTED_ERROR, self.group)
+        return deliverable
+
+    async def _read_batch_from_redis(self, last_id: str, block: Optional[int], count: int) -> List[QueueMessage]:
+        """底层封装 XREADGROUP 调用"""
+        try:
+            result = await self.client.xreadgroup(
+                self.group,
+                self.consumer_name,
+                {self.stream: last_id},
+                count=count,
+                # 0 表示不阻塞，语义与 RedisMessageQueue 相同
+                block=block or None
+            )
+
+            if not result:
+                return []
+
+            try:
+                messages = result[0][1]
+            except (IndexError, TypeError):
+                return []
+
+            return self._to_messages(messages)
+
+        except Exception as e:
+            self.logger.error(f"Read error from Redis: {e}")
+            # 连接异常时按阻塞时长退避，避免主循环空转
+            if block:
+                await asyncio.sleep(block / 1000)
+            return []
+
+    def _to_messages(self, entries) -> List[QueueMessage]:
+        batch = []
+        for msg_id, content in entries:
+            try:
+                batch.append(QueueMessage(
+                    id=msg_id,
+                    data=json.loads(content['payload'])
+                ))
+            except (KeyError, TypeError):
+                # 已被删除的 Pending 条目 content 为空，跳过
+                continue
+        return batch
+
+    async def _maybe_reclaim(self, max_messages: int) -> List[QueueMessage]:
+        """到达接管间隔时执行一次 reclaim_stale"""
+        if not self.reclaim_idle_ms or time.monotonic() < self._next_reclaim:
+            return []
+        messages = await self.reclaim_stale(max_messages)
+        # 游标回到起点说明整个 PEL 已扫描完，等待下一个间隔；否则下次调用从游标处继续
+        if self._reclaim_cursor == '0-0':
+            self._next_reclaim = time.monotonic() + self.reclaim_interval_ms / 1000
+        return messages
+
+    async def reclaim_stale(self, max_messages: int = 10) -> List[QueueMessage]:
+        """
+        XAUTOCLAIM 接管组内空闲超过 reclaim_idle_ms 的 Pending 条目。
+        本消费者仍在处理中的条目（PendingTracker.delivered）同样可能空闲超时，接管后跳过，避免重复处理。
+        """
+        try:
+            result = await self.client.xautoclaim(
+                self.stream,
+                self.group,
+                self.consumer_name,
+                min_idle_time=self.reclaim_idle_ms,
+                start_id=self._reclaim_cursor,
+                count=max_messages
+            )
+        except Exception as e:
+            self.logger.error(f"XAUTOCLAIM failed: {e}")
+            return []
+
+        # Redis 7 返回 [next_cursor, entries, deleted_ids]，6.2 没有第三项
+        self._reclaim_cursor, entries = result[0], result[1]
+        messages = self._pel.reclaimable(self._to_messages(entries))
+        if messages:
+            prior = self._pel.reclaim_prior(messages, await self._pending_counts(messages))
+            messages = await self._deliver_claimed(messages, prior)
+        if messages:
+            self.reclaimed_total += len(messages)
+            self.logger.warning(
+                f"Consumer {self.consumer_name} 接管 {len(messages)} 条滞留消息 (累计 {self.reclaimed_total})"
+            )
+        return messages
+
+    async def _pending_counts(self, messages: List[QueueMessage]) -> Dict[str, int]:
+        """分页查询 messages 所在 ID 区间内本消费者 PEL 条目的投递次数"""
+        counts: Dict[str, int] = {}
+        start = messages[0].id
+        while start:
+            entries = await self.client.xpending_range(
+                self.stream, self.group, min=start, max=messages[-1].id,
+                count=self._pel.SCAN_COUNT, consumername=self.consumer_name
+            )
+            counts.update((e['message_id'], e['times_delivered']) for e in entries)
+            start = self._pel.next_page(entries)
+        return counts
+
+    async def nack(self, message: QueueMessage, error: str, stage: str) -> bool:
+        """
+        处理失败：投递次数达到 max_deliveries 时连同错误与阶段写入死信流并确认，返回 True；
+        否则保留在 PEL 中，退避到期后由 consume_batch 重新投递，返回 False
+        """
+        if self._pel.nacked(message):
+            try:
+                await self._dead_letter([message], error, stage)
+                return True
+            except Exception as e:
+                self.logger.error(f"写入死信流失败，消息保留在 PEL 中: {e}")
+                return False
+
+        self.logger.warning(
+            f"消息 {message.id} 第 {message.delivery_count} 次处理失败，"
+            f"{self.retry_policy.delay_ms(message.delivery_count)} ms 后重试: {error}"
+        )
+        return False
+
+    async def _dead_letter(self, messages: List[QueueMessage], error: str, stage: str):
+        """写入死信流与 ACK 在同一事务中完成，不会出现丢失或重复"""
+        async with self.client.pipeline(transaction=True) as pipe:
+            for m in messages:
+                pipe.xadd(self.dlq_topic, dead_letter_fields(
+                    m, error, stage, self.stream, self.group, self.consumer_name
+                ))
+            pipe.xack(self.stream, self.group, *[m.id for m in messages])
+            await pipe.execute()
+        self.dead_lettered_total += len(messages)
+        for m in messages:
+            self.logger.error(
+                f"消息 {m.id} 已投递 {m.delivery_count} 次仍失败，转入死信流 {self.dlq_topic} (stage={stage}): {error}"
+            )
+
+    async def ack(self, message_id: str) -> bool:
+        return await self.ack_batch([message_id]) == 1
+
+    async def ack_batch(self, message_ids: List[str]) -> int:
+        """单条多 ID 的 XACK"""
+        if not message_ids:
+            return 0
+        res = 0
+        try:
+            res = await self.client.xack(self.stream, self.group, *message_ids)
+            return res
+        except Exception as e:
+            self.logger.error(f"ACK failed: {e}")
+            return 0
+        finally:
+            # 失败的条目留在 PEL，按退避规则重新投递
+            self._pel.acked(message_ids, len(message_ids), res)
+
+    async def close(self):
+        """关闭客户端；共享连接池由进程退出时统一释放"""
+        await self.client.aclose()
+        self.logger.info("AsyncRedisMQ 连接已关闭")
@@ -46,24 +46,28 @@ class HybridStoreInterface(BaseStore):
         pass
 
 class BaseStatusRegistry(ABC):
+    """
+    入库进度登记。file_hash 是分片内容的摘要：同名分片内容变化（源文件重新上传）后视为新版本，
+    旧版本的完成记录与 chunk 进度都不再生效。
+    """
     @abstractmethod
-    def is_file_processed(self, file_name: str) -> bool:
-        """检查整个文件是否已完成"""
+    def is_file_processed(self, file_name: str, file_hash: str) -> bool:
+        """检查该版本的文件是否已整体完成"""
         pass
 
     @abstractmethod
-    def mark_chunks_processed(self, file_name: str, chunk_ids: List[str]):
-        """标记某个文件已完成的 chunk_id 集合"""
+    def mark_chunks_processed(self, file_name: str, file_hash: str, chunk_ids: List[str]):
+        """标记某个文件该版本已完成的 chunk_id 集合"""
         pass
 
     @abstractmethod
-    def get_processed_chunks(self, file_name: str) -> Set[str]:
-        """获取某个文件已完成的 chunk_id 集合"""
+    def get_processed_chunks(self, file_name: str, file_hash: str) -> Set[str]:
+        """获取某个文件该版本已完成的 chunk_id 集合"""
         pass
 
     @abstractmethod
     def mark_file_complete(self, file_name: str, file_hash: str):
-        """当所有 chunk 完成后，记录文件级索引并清理 chunk 记录"""
+        """当所有 chunk 完成后，记录文件级索引（覆盖旧版本）并清理 chunk 记录"""
         pass
 
 class MessageQueueInterface(ABC):
@@ -73,8 +77,19 @@ class MessageQueueInterface(ABC):
         pass
 
     @abstractmethod
-    def consume(self) -> Optional[QueueMessage]:
-        """获取消息"""
+    def consume(self, block_ms: Optional[int] = None) -> Optional[QueueMessage]:
+        """
+        获取消息
+        :param block_ms: 无消息时的最长阻塞时间（毫秒），0 表示不阻塞，None 表示使用 connect 配置的 block_ms
+        """
+        pass
+
+    @abstractmethod
+    def consume_batch(self, max_messages: int = 10, block_ms: Optional[int] = None) -> List[QueueMessage]:
+        """
+        一次拉取最多 max_messages 条消息
+        :param block_ms: 无消息时的最长阻塞时间（毫秒），0 表示不阻塞，None 表示使用 connect 配置的 block_ms
+        """
         pass
 
     @abstractmethod
@@ -85,6 +100,21 @@ class MessageQueueInterface(ABC):
         """
         pass
 
+    @abstractmethod
+    def ack_batch(self, message_ids: List[str]) -> int:
+        """
+        批量确认消息，返回成功确认的条数
+        """
+        pass
+
+    @abstractmethod
+    def nack(self, message: QueueMessage, error: str, stage: str) -> bool:
+        """
+        报告消息处理失败，由队列决定稍后重投还是转入死信
+        :return: True 表示消息已结束（转入死信或丢弃），不会再投递
+        """
+        pass
+
     @abstractmethod
     def produce(self, message: Any):
         """发送消息"""
@@ -97,4 +127,47 @@ class MessageQueueInterface(ABC):
         对于 Kafka：触发 Offset 提交并停止心跳。
         对于内存队列：清空缓存数据。
         """
-        pass
\ No newline at end of file
+        pass
+
+class AsyncMessageQueueInterface(ABC):
+    """MessageQueueInterface 的协程版本，供运行在事件循环中的 Manager 使用"""
+
+    @abstractmethod
+    async def connect(self, config: Dict[str, Any]):
+        """建立连接并绑定 Topic/Queue"""
+        pass
+
+    @abstractmethod
+    async def consume(self, block_ms: Optional[int] = None) -> Optional[QueueMessage]:
+        """获取消息，等待期间让出事件循环"""
+        pass
+
+    @abstractmethod
+    async def consume_batch(self, max_messages: int = 10, block_ms: Optional[int] = None) -> List[QueueMessage]:
+        """一次拉取最多 max_messages 条消息"""
+        pass
+
+    @abstractmethod
+    async def ack(self, message_id: str) -> bool:
+        """显式确认消息已处理完毕"""
+        pass
+
+    @abstractmethod
+    async def ack_batch(self, message_ids: List[str]) -> int:
+        """批量确认消息，返回成功确认的条数"""
+        pass
+
+    @abstractmethod
+    async def nack(self, message: QueueMessage, error: str, stage: str) -> bool:
+        """报告消息处理失败；返回 True 表示消息已结束（转入死信或丢弃），不会再投递"""
+        pass
+
+    @abstractmethod
+    async def produce(self, message: Any):
+        """发送消息"""
+        pass
+
+    @abstractmethod
+    async def close(self):
+        """显式关闭连接"""
+        pass
@@ -4,19 +4,22 @@ from database.interfaces import BaseStatusRegistry
 class MemoryStatusRegistry(BaseStatusRegistry):
     def __init__(self):
         self._completed_files = {}  # {file_name: file_hash}
-        self._temp_chunks = {}      # {file_name: set(chunk_ids)}
+        self._temp_chunks = {}      # {file_name: (file_hash, set(chunk_ids))}
 
-    def is_file_processed(self, file_name: str) -> bool:
-        return file_name in self._completed_files
+    def is_file_processed(self, file_name: str, file_hash: str) -> bool:
+        return self._completed_files.get(file_name) == file_hash
 
-    def get_processed_chunks(self, file_name: str) -> Set[str]:
-        return self._temp_chunks.get(file_name, set())
+    def get_processed_chunks(self, file_name: str, file_hash: str) -> Set[str]:
+        version, chunk_ids = self._temp_chunks.get(file_name, (None, set()))
+        return set(chunk_ids) if version == file_hash else set()
 
-    def mark_chunks_processed(self, file_name: str, chunk_ids: List[str]):
-        if file_name not in self._temp_chunks:
-            self._temp_chunks[file_name] = set()
-        self._temp_chunks[file_name].update(chunk_ids)
+    def mark_chunks_processed(self, file_name: str, file_hash: str, chunk_ids: List[str]):
+        version, _ = self._temp_chunks.get(file_name, (None, None))
+        if version != file_hash:
+            # 新版本的进度替换旧版本未完成的记录
+            self._temp_chunks[file_name] = (file_hash, set())
+        self._temp_chunks[file_name][1].update(chunk_ids)
 
     def mark_file_complete(self, file_name: str, file_hash: str):
         self._completed_files[file_name] = file_hash
-        self._temp_chunks.pop(file_name, None) # 清理内存，仅保留文件索引
\ No newline at end of file
+        self._temp_chunks.pop(file_name, None) # 清理内存，仅保留文件索引
@@ -1,6 +1,7 @@
+import json
 import time
-from pydantic import BaseModel, Field
-from typing import Dict, Any, Optional
+from pydantic import BaseModel, Field, PrivateAttr
+from typing import Dict, Any, List, Optional
 from dataclasses import dataclass
 
 @dataclass
@@ -8,6 +9,14 @@ class QueueMessage:
     """MQ 内部使用的通用包装类"""
     id: str           # Redis Stream 的消息 ID (例如 '170000000-0')
     data: Any         # 解码后的业务数据 (TaskMessage 对象或 Dict)
+    delivery_count: int = 1  # 包括本次在内的投递次数，重投的失败消息大于 1
+
+class StageTiming(BaseModel):
+    """单个阶段的耗时记录：随消息传递给下游，串起文件从上传到入库的完整时间线"""
+    stage: str
+    start: float = Field(..., description="阶段开始处理该消息的时间戳")
+    end: float = Field(..., description="阶段发出下游消息的时间戳")
+    steps: Dict[str, float] = Field(default_factory=dict, description="各子步骤的累计耗时（秒）")
 
 class TaskMessage(BaseModel):
     """标准任务消息：在各个处理阶段之间流动的轻量级信号"""
@@ -21,6 +30,17 @@ class TaskMessage(BaseModel):
     
     # 可选：链路追踪 ID，用于串联整个日志流
     trace_id: Optional[str] = Field(None, description="全局唯一追踪 ID")
+    # timestamp 在每一跳重新生成；origin_timestamp 记录源文件任务进入流水线的时间，各阶段原样传递
+    origin_timestamp: Optional[float] = Field(None, description="源文件任务进入流水线的时间戳")
+    timeline: List[StageTiming] = Field(default_factory=list, description="上游各阶段的耗时记录")
+
+    # 可选：内联载荷（claim-check 模式）。小分片直接随消息传递，不落盘；
+    # 此时 file_path 仍是该分片的逻辑路径，用于派生下游文件名与 chunk_id
+    payload: Optional[str] = Field(None, description="内联的 RAGTaskPayload，编码方式见 payload_encoding")
+    payload_encoding: Optional[str] = Field(None, description="内联载荷编码: json / zlib+base64")
+
+    # 进程内直接传递的 RAGTaskPayload 对象（融合模式），不参与序列化
+    _payload: Optional[Any] = PrivateAttr(default=None)
 
     def to_json(self) -> str:
         """序列化消息以便存入 MQ"""
@@ -29,10 +49,21 @@ class TaskMessage(BaseModel):
     @classmethod
     def from_json(cls, json_str: Any):
         """从 MQ 读取字符串并反序列化为对象"""
+        if isinstance(json_str, cls):
+            # 进程内队列直接传递对象，保留其上挂载的载荷
+            return json_str
         if isinstance(json_str, str):
             return cls.model_validate_json(json_str)
         elif isinstance(json_str, dict):
             # 如果已经是字典，直接验证模型
             return cls.model_validate(json_str)
         else:
-            raise ValueError(f"不支持的数据类型: {type(json_str)}")
\ No newline at end of file
+            raise ValueError(f"不支持的数据类型: {type(json_str)}")
+
+def serialize_message(message: Any) -> str:
+    """跨进程队列写入前的统一序列化：TaskMessage 使用 to_json，其它对象按 JSON 编码"""
+    if isinstance(message, str):
+        return message
+    if isinstance(message, TaskMessage):
+        return message.to_json()
+    return json.dumps(message)
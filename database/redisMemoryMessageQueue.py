@@ -1,15 +1,18 @@
 import redis
 import json
 import logging
-from typing import Any, Optional, Dict
+import time
+from typing import Any, List, Optional, Dict, Tuple
 
-from .message import QueueMessage
+from .message import QueueMessage, serialize_message
 from .interfaces import MessageQueueInterface
+from .retryPolicy import PendingScan, PendingTracker, RetryPolicy, dead_letter_fields
 
 class RedisMessageQueue(MessageQueueInterface):
     def __init__(self):
         self.logger = logging.getLogger(__name__)
-        self._check_pending = True
+        # PEL 状态（处理中的 ID、是否需要扫描 PEL）与重投、死信决策，与 AsyncRedisMessageQueue 共用
+        self._pel = PendingTracker(RetryPolicy())
 
     def connect(self, config: Dict[str, Any]):
         """绑定指定的 Topic 并初始化队列"""
@@ -21,6 +24,36 @@ class RedisMessageQueue(MessageQueueInterface):
         self.stream = config.get('topic', 'default_stream')
         self.group = config.get('group', 'default_group')
         self.consumer_name = config.get('consumer_name', 'worker_1')
+        # 读取新消息 ('>') 时的服务端阻塞时长，Manager 依赖它而不是自行 sleep
+        self.block_ms = config.get('block_ms', 1000)
+        # 接管组内其他消费者遗留的 Pending 消息：空闲超过 reclaim_idle_ms 的条目每隔
+        # reclaim_interval_ms 由本消费者 XAUTOCLAIM 一次；reclaim_idle_ms 为 0 时关闭
+        self.reclaim_idle_ms = config.get('reclaim_idle_ms', 0)
+        self.reclaim_interval_ms = config.get('reclaim_interval_ms', 30000)
+        self.reclaimed_total = 0
+        self._reclaim_cursor = '0-0'
+        self._next_reclaim = 0.0
+        # 失败重试与死信：按 PEL 记录的投递次数退避重投，达到 max_deliveries 仍失败的消息转入 dlq_topic
+        self.retry_policy = RetryPolicy.from_config(config)
+        self._pel = PendingTracker(self.retry_policy)
+        self.dlq_topic = config.get('dlq_topic', f"{self.stream}_dlq")
+        self.dead_lettered_total = 0
+        # 生产端流控（作为发布者时生效，group 配置为下游消费者组）：
+        # - 下游积压（lag + pending）达到 high_water 时 produce 暂停，回落到 low_water 以下再继续；0 表示关闭
+        # - trim_acked 时按下游确认进度 XTRIM MINID（近似）删除已确认的条目
+        # - maxlen 为兜底的长度上限，超出时会丢弃未消费的消息，默认关闭
+        # 积压查询每 flow_check_interval_ms 一次，期间按本进程已发布条数估算积压，估算值触及高水位时提前查询，
+        # 不给每条 XADD 增加往返
+        self.high_water = config.get('high_water', 0)
+        self.low_water = config.get('low_water', self.high_water // 2)
+        self.trim_acked = config.get('trim_acked', False)
+        self.maxlen = config.get('maxlen', 0)
+        self.flow_check_interval_ms = config.get('flow_check_interval_ms', 1000)
+        # 单次暂停的最长时间（0 不限）：应小于上游的 reclaim_idle_ms，否则本进程正在处理的消息会被其它消费者接管
+        self.max_pause_ms = config.get('max_pause_ms', 0)
+        self.throttled_seconds = 0.0
+        self._next_flow_check = 0.0
+        self._depth_estimate = 0
         
         # 尝试创建消费者组（如果已存在则忽略错误）
         try:
@@ -29,93 +62,291 @@ class RedisMessageQueue(MessageQueueInterface):
             pass
 
     def produce(self, message: Any):
-        """向当前激活的 Topic 发送消息"""
-        data = {"payload": json.dumps(message) if not isinstance(message, str) else message}
+        """向当前激活的 Topic 发送消息；下游积压超过高水位时先阻塞等待"""
+        self._apply_backpressure()
+        data = {"payload": serialize_message(message)}
+        if self.maxlen:
+            return self.client.xadd(self.stream, data, maxlen=self.maxlen, approximate=True)
         return self.client.xadd(self.stream, data)
 
-    def consume(self) -> Optional[QueueMessage]:
+    def _apply_backpressure(self):
+        if not (self.high_water or self.trim_acked):
+            return
+        self._depth_estimate += 1
+        if time.monotonic() < self._next_flow_check and not (
+                self.high_water and self._depth_estimate >= self.high_water):
+            return
+        self._next_flow_check = time.monotonic() + self.flow_check_interval_ms / 1000
+        depth = self.downstream_depth()
+        self._depth_estimate = depth or 0
+        if not self.high_water or depth is None or depth < self.high_water:
+            return
+
+        self.logger.warning(
+            f"下游 {self.stream}/{self.group} 积压 {depth} 条，超过高水位 {self.high_water}，暂停生产"
+        )
+        start = time.monotonic()
+        while depth is not None and depth > self.low_water:
+            if self.max_pause_ms and (time.monotonic() - start) * 1000 >= self.max_pause_ms:
+                self.logger.warning(f"暂停已达 {self.max_pause_ms} ms 上限，继续发布一条消息")
+                break
+            time.sleep(self.flow_check_interval_ms / 1000)
+            depth = self.downstream_depth()
+        waited = time.monotonic() - start
+        self._depth_estimate = depth or 0
+        self.throttled_seconds += waited
+        self.logger.info(f"下游 {self.stream}/{self.group} 积压 {depth} 条，恢复生产 (等待 {waited:.1f}s)")
+
+    def downstream_depth(self) -> Optional[int]:
         """
-        自动判定读取逻辑：
-        1. 只要 _check_pending 为 True，就一直尝试读 ID '0'。
-        2. 如果 '0' 返回空，说明当前消费者的 Pending 队列清空了，切换到 '>'。
-        3. 一旦 ACK 失败或者发生重启，逻辑会自动回归到优先检查 Pending。
+        下游消费者组尚未确认的消息数（lag + pending），trim_acked 时顺带修剪已确认的条目。
+        查询失败时返回 None，不因监控异常阻塞生产。
         """
-        
-        # 步骤 1: 优先处理 Pending 队列
-        if self._check_pending:
-            msg = self._read_from_redis(last_id='0', block=None)
-            if msg:
-                # 仍在处理 Pending 消息，保持标记为 True
-                return msg
-            
-            # 只有当 '0' 返回空，才允许尝试读取新消息
-            self._check_pending = False
-            self.logger.debug(f"Consumer {self.consumer_name} PEL is empty.")
-
-        # 步骤 2: 读取新消息
-        msg = self._read_from_redis(last_id='>', block=1000)
-        
-        if msg:
-            # 一旦拿到新消息，标记改为 True
-            # 这样如果消息处理失败（未 ACK），下次 consume 会回到步骤 1
-            self._check_pending = True
-            
-        return msg
-
-    def _read_from_redis(self, last_id: str, block: Optional[int]) -> Optional[Dict[str, Any]]:
+        try:
+            info = next((g for g in self.client.xinfo_groups(self.stream) if g['name'] == self.group), None)
+            if info is None:
+                # 下游消费者组尚未创建：Stream 中的消息都未被消费
+                return self.client.xlen(self.stream)
+
+            if self.trim_acked:
+                self._trim_acked(info)
+            # Redis 7 之前没有 lag 字段，无法计算时也为空；修剪后 XLEN 近似等于未确认数
+            if info.get('lag') is None:
+                return self.client.xlen(self.stream)
+            return info['lag'] + info['pending']
+        except Exception as e:
+            self.logger.error(f"查询下游积压失败: {e}")
+            return None
+
+    def _trim_acked(self, info: Dict[str, Any]):
+        # 早于最老未确认条目的消息均已被下游确认；没有未确认条目时以 last-delivered-id 为界。
+        # 只依据配置的下游组判断，同一 Stream 上若有其它消费者组需各自独立的 Stream
+        if info['pending']:
+            min_id = self.client.xpending(self.stream, self.group)['min']
+        else:
+            min_id = info['last-delivered-id']
+        if min_id and min_id != '0-0':
+            self.client.xtrim(self.stream, minid=min_id, approximate=True)
+
+    def consume(self, block_ms: Optional[int] = None) -> Optional[QueueMessage]:
+        messages = self.consume_batch(1, block_ms)
+        return messages[0] if messages else None
+
+    def consume_batch(self, max_messages: int = 10, block_ms: Optional[int] = None) -> List[QueueMessage]:
+        """
+        一次最多取回 max_messages 条，读取顺序：
+        1. 到达接管间隔时，XAUTOCLAIM 接管其他消费者遗留的滞留消息
+        2. 需要检查 PEL 时（启动、nack、ACK 失败后），优先重投本消费者 PEL 中退避到期的失败消息
+        3. 阻塞读取新消息 ('>')；PEL 中只剩退避期内的条目时同样直接读取新消息，失败消息不会阻塞健康消息
+        """
+        reclaimed = self._maybe_reclaim(max_messages)
+        if reclaimed:
+            return self._pel.mark_delivered(reclaimed)
+
+        if self._pel.check_pending:
+            messages, waiting = self._read_pending(max_messages)
+            self._pel.scanned(bool(messages), waiting)
+            if messages:
+                return self._pel.mark_delivered(messages)
+            if not waiting:
+                self.logger.debug(f"Consumer {self.consumer_name} PEL is empty.")
+
+        messages = self._read_batch_from_redis(
+            last_id='>',
+            block=self.block_ms if block_ms is None else block_ms,
+            count=max_messages
+        )
+        return self._pel.mark_delivered(messages)
+
+    def _read_pending(self, max_messages: int) -> Tuple[List[QueueMessage], bool]:
+        """
+        用 XPENDING 扫描本消费者的 PEL（不增加投递次数），返回 (可重投的消息, 是否还有退避期内的条目)；
+        选取规则见 PendingTracker.scan_page，选中的条目用 XCLAIM 取回内容，投递次数随之加一
+        """
+        scan = PendingScan(max_messages)
+        start = '-'
+        try:
+            while start:
+                entries = self.client.xpending_range(
+                    self.stream, self.group, min=start, max='+',
+                    count=self._pel.SCAN_COUNT, consumername=self.consumer_name
+                )
+                start = self._pel.scan_page(scan, entries)
+
+            if not scan.prior:
+                return [], scan.waiting
+            claimed = self.client.xclaim(
+                self.stream, self.group, self.consumer_name, min_idle_time=0, message_ids=list(scan.prior)
+            )
+            messages = self._to_messages(claimed)
+            missing = self._pel.missing(scan.prior, messages)
+            if missing:
+                self.client.xack(self.stream, self.group, *missing)
+            return self._deliver_claimed(messages, scan.prior), scan.waiting
+        except Exception as e:
+            self.logger.error(f"Read pending error from Redis: {e}")
+            return [], True
+
+    def _deliver_claimed(self, messages: List[QueueMessage], prior: Dict[str, int]) -> List[QueueMessage]:
+        """已达上限的转入死信，其余交给调用方"""
+        deliverable, exhausted = self._pel.split_claimed(messages, prior)
+        if exhausted:
+            self._dead_letter(exhausted, self._pel.EXHAUSTED_ERROR, self.group)
+        return deliverable
+
+    def _read_batch_from_redis(self, last_id: str, block: Optional[int], count: int) -> List[QueueMessage]:
         """底层封装 XREADGROUP 调用"""
         try:
             # result 格式: [[b'stream_name', [(b'id', {b'key': b'value'})]]]
+            # block 为 0 时不阻塞（与内存队列一致）；XREADGROUP BLOCK 0 表示无限等待
             result = self.client.xreadgroup(
                 self.group, 
                 self.consumer_name, 
                 {self.stream: last_id}, 
-                count=1, 
-                block=block
+                count=count, 
+                block=block or None
             )
 
             # 1. 检查 result 是否为空 (None 或 [])
             if not result:
-                return None
+                return []
 
             # 2. 深入解析: result[0] 是第一个 stream 的数据, result[0][1] 是消息列表
             try:
-                stream_data = result[0]
-                messages = stream_data[1]
-                
-                if not messages:
-                    return None
-                
-                msg_id, content = messages[0]
-                payload_data = json.loads(content['payload'])
-
-                return QueueMessage(
-                    id=msg_id,
-                    data=payload_data
-                )
-            except (IndexError, KeyError, TypeError):
-                return None
+                messages = result[0][1]
+            except (IndexError, TypeError):
+                return []
+
+            return self._to_messages(messages)
 
         except Exception as e:
             self.logger.error(f"Read error from Redis: {e}")
-            return None
+            # 连接异常时按阻塞时长退避，避免 Manager 空转刷日志
+            if block:
+                time.sleep(block / 1000)
+            return []
 
-    def ack(self, message_id: str) -> bool:
+    def _to_messages(self, entries) -> List[QueueMessage]:
+        batch = []
+        for msg_id, content in entries:
+            try:
+                batch.append(QueueMessage(
+                    id=msg_id,
+                    data=json.loads(content['payload'])
+                ))
+            except (KeyError, TypeError):
+                # 已被删除的 Pending 条目 content 为空，跳过
+                continue
+        return batch
+
+    def _maybe_reclaim(self, max_messages: int) -> List[QueueMessage]:
+        """到达接管间隔时执行一次 reclaim_stale"""
+        if not self.reclaim_idle_ms or time.monotonic() < self._next_reclaim:
+            return []
+        messages = self.reclaim_stale(max_messages)
+        # 游标回到起点说明整个 PEL 已扫描完，等待下一个间隔；否则下次调用从游标处继续
+        if self._reclaim_cursor == '0-0':
+            self._next_reclaim = time.monotonic() + self.reclaim_interval_ms / 1000
+        return messages
+
+    def reclaim_stale(self, max_messages: int = 10) -> List[QueueMessage]:
         """
-        确认消息并更新状态
+        XAUTOCLAIM 接管组内空闲超过 reclaim_idle_ms 的 Pending 条目（例如已下线或换了 --id 的消费者遗留的），
+        接管后条目转入本消费者的 PEL，处理与 ACK 流程和普通消息一致。
+        reclaim_idle_ms 应明显大于单条消息的最长处理时间，否则其它消费者仍在处理中的消息会被重复投递；
+        本消费者仍在处理中的条目（PendingTracker.delivered）接管后跳过。
         """
         try:
-            res = self.client.xack(self.stream, self.group, message_id)
-            if res > 0:
-                # 确认成功后，允许尝试读取新消息（或者再次探测 PEL 是否真的空了）
-                self._check_pending = False
+            result = self.client.xautoclaim(
+                self.stream,
+                self.group,
+                self.consumer_name,
+                min_idle_time=self.reclaim_idle_ms,
+                start_id=self._reclaim_cursor,
+                count=max_messages
+            )
+        except Exception as e:
+            self.logger.error(f"XAUTOCLAIM failed: {e}")
+            return []
+
+        # Redis 7 返回 [next_cursor, entries, deleted_ids]，6.2 没有第三项
+        self._reclaim_cursor, entries = result[0], result[1]
+        messages = self._pel.reclaimable(self._to_messages(entries))
+        if messages:
+            messages = self._deliver_claimed(messages, self._pel.reclaim_prior(messages, self._pending_counts(messages)))
+        if messages:
+            self.reclaimed_total += len(messages)
+            self.logger.warning(
+                f"Consumer {self.consumer_name} 接管 {len(messages)} 条滞留消息 (累计 {self.reclaimed_total})"
+            )
+        return messages
+
+    def _pending_counts(self, messages: List[QueueMessage]) -> Dict[str, int]:
+        """分页查询 messages 所在 ID 区间内本消费者 PEL 条目的投递次数"""
+        counts: Dict[str, int] = {}
+        start = messages[0].id
+        while start:
+            entries = self.client.xpending_range(
+                self.stream, self.group, min=start, max=messages[-1].id,
+                count=self._pel.SCAN_COUNT, consumername=self.consumer_name
+            )
+            counts.update((e['message_id'], e['times_delivered']) for e in entries)
+            start = self._pel.next_page(entries)
+        return counts
+
+    def nack(self, message: QueueMessage, error: str, stage: str) -> bool:
+        """
+        处理失败：投递次数达到 max_deliveries 时连同错误与阶段写入死信流并确认，返回 True；
+        否则保留在 PEL 中，退避到期后由 consume_batch 重新投递，返回 False
+        """
+        if self._pel.nacked(message):
+            try:
+                self._dead_letter([message], error, stage)
                 return True
-            return False
+            except Exception as e:
+                self.logger.error(f"写入死信流失败，消息保留在 PEL 中: {e}")
+                return False
+
+        self.logger.warning(
+            f"消息 {message.id} 第 {message.delivery_count} 次处理失败，"
+            f"{self.retry_policy.delay_ms(message.delivery_count)} ms 后重试: {error}"
+        )
+        return False
+
+    def _dead_letter(self, messages: List[QueueMessage], error: str, stage: str):
+        """写入死信流与 ACK 在同一事务中完成，不会出现丢失或重复"""
+        with self.client.pipeline(transaction=True) as pipe:
+            for m in messages:
+                pipe.xadd(self.dlq_topic, dead_letter_fields(
+                    m, error, stage, self.stream, self.group, self.consumer_name
+                ))
+            pipe.xack(self.stream, self.group, *[m.id for m in messages])
+            pipe.execute()
+        self.dead_lettered_total += len(messages)
+        for m in messages:
+            self.logger.error(
+                f"消息 {m.id} 已投递 {m.delivery_count} 次仍失败，转入死信流 {self.dlq_topic} (stage={stage}): {error}"
+            )
+
+    def ack(self, message_id: str) -> bool:
+        return self.ack_batch([message_id]) == 1
+
+    def ack_batch(self, message_ids: List[str]) -> int:
+        """
+        批量确认：单条多 ID 的 XACK，一次往返
+        """
+        if not message_ids:
+            return 0
+        res = 0
+        try:
+            res = self.client.xack(self.stream, self.group, *message_ids)
+            return res
         except Exception as e:
-            # ACK 失败时，必须保持或恢复 _check_pending 为 True
-            self._check_pending = True
-            self.logger.error(f"ACK failed: {e}")
-            return False
+            self.logger.error(f"Batch ACK failed: {e}")
+            return 0
+        finally:
+            # 失败的条目留在 PEL，按退避规则重新投递
+            self._pel.acked(message_ids, len(message_ids), res)
 
     def close(self):
         """清理资源并重置状态"""
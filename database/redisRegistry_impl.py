@@ -0,0 +1,81 @@
+import logging
+from typing import Any, Dict, List, Optional, Set
+
+import redis
+
+from database.interfaces import BaseStatusRegistry
+from database.registryCache import RegistryReadCache
+
+class RedisStatusRegistry(BaseStatusRegistry):
+    """
+    Redis 持久化的入库进度，多个 index worker 及重启之间共享：
+    - {prefix}:files                 HASH，已完成文件 {file_name: file_hash}，同名文件的新版本完成时覆盖
+    - {prefix}:chunks:<file>:<hash>  SET，进行中版本已入库的 chunk_id；该版本完成时与 HASH 写入在同一事务中删除
+    完成状态按 file_hash 比对，内容变化的同名文件不会被当作已完成跳过。
+    未完成的 chunk 集合带 chunk_ttl_seconds 过期，被放弃的文件及被新版本取代的旧进度不会长期占用内存。
+    """
+    def __init__(self, config: Dict[str, Any], prefix: str = "index_registry",
+                 chunk_ttl_seconds: Optional[int] = 7 * 24 * 3600, max_cached_files: int = 1024):
+        self.logger = logging.getLogger(__name__)
+        self.client = redis.Redis(
+            host=config.get('host', 'localhost'),
+            port=config.get('port', 6379),
+            db=config.get('db', 0),
+            decode_responses=True
+        )
+        self.prefix = prefix
+        self.chunk_ttl_seconds = chunk_ttl_seconds
+        self._files_key = f"{prefix}:files"
+        self._cache = RegistryReadCache(max_files=max_cached_files)
+
+    def _chunks_key(self, file_name: str, file_hash: str) -> str:
+        return f"{self.prefix}:chunks:{file_name}:{file_hash}"
+
+    def is_file_processed(self, file_name: str, file_hash: str) -> bool:
+        cache_key = RegistryReadCache.key(file_name, file_hash)
+        if self._cache.is_completed(cache_key):
+            return True
+
+        # 一次往返同时取文件状态与 chunk 进度，随后的 get_processed_chunks 直接命中缓存
+        with self.client.pipeline(transaction=False) as pipe:
+            pipe.hget(self._files_key, file_name)
+            pipe.smembers(self._chunks_key(file_name, file_hash))
+            completed_hash, chunk_ids = pipe.execute()
+
+        if completed_hash == file_hash:
+            self._cache.set_completed(cache_key)
+            return True
+        self._cache.set_chunks(cache_key, chunk_ids)
+        return False
+
+    def get_processed_chunks(self, file_name: str, file_hash: str) -> Set[str]:
+        cache_key = RegistryReadCache.key(file_name, file_hash)
+        cached = self._cache.get_chunks(cache_key)
+        if cached is not None:
+            return cached
+        chunk_ids = self.client.smembers(self._chunks_key(file_name, file_hash))
+        self._cache.set_chunks(cache_key, chunk_ids)
+        return set(chunk_ids)
+
+    def mark_chunks_processed(self, file_name: str, file_hash: str, chunk_ids: List[str]):
+        if not chunk_ids:
+            return
+        key = self._chunks_key(file_name, file_hash)
+        # 整批 chunk 一条 SADD，与续期合并为一次往返
+        with self.client.pipeline(transaction=False) as pipe:
+            pipe.sadd(key, *chunk_ids)
+            if self.chunk_ttl_seconds:
+                pipe.expire(key, self.chunk_ttl_seconds)
+            pipe.execute()
+        self._cache.add_chunks(RegistryReadCache.key(file_name, file_hash), chunk_ids)
+
+    def mark_file_complete(self, file_name: str, file_hash: str):
+        # MULTI/EXEC：文件索引写入与 chunk 记录清理要么都生效，要么都不生效
+        with self.client.pipeline(transaction=True) as pipe:
+            pipe.hset(self._files_key, file_name, file_hash)
+            pipe.delete(self._chunks_key(file_name, file_hash))
+            pipe.execute()
+        self._cache.set_completed(RegistryReadCache.key(file_name, file_hash))
+
+    def close(self):
+        self.client.close()
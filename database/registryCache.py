@@ -0,0 +1,61 @@
+import threading
+from collections import OrderedDict
+from typing import Iterable, Optional, Set
+
+class RegistryReadCache:
+    """
+    持久化 StatusRegistry 共用的本地读穿透缓存。
+    条目以 key(file_name, file_hash) 区分文件版本：
+    - 已完成的版本只增不减，命中后无需再访问后端
+    - chunk 集合首次从后端整体读入，之后由本进程的写入增量维护；
+      同一文件的后续分片、批次做续传判断时不产生额外往返
+    两类条目均按 LRU 限制数量。
+    """
+    def __init__(self, max_files: int = 1024, max_completed: int = 100000):
+        self.max_files = max_files
+        self.max_completed = max_completed
+        self._completed: "OrderedDict[str, None]" = OrderedDict()
+        self._chunks: "OrderedDict[str, Set[str]]" = OrderedDict()
+        self._lock = threading.Lock()
+
+    @staticmethod
+    def key(file_name: str, file_hash: str) -> str:
+        return f"{file_name}\x00{file_hash}"
+
+    def is_completed(self, file_name: str) -> bool:
+        with self._lock:
+            if file_name in self._completed:
+                self._completed.move_to_end(file_name)
+                return True
+            return False
+
+    def set_completed(self, file_name: str):
+        with self._lock:
+            self._completed[file_name] = None
+            self._completed.move_to_end(file_name)
+            while len(self._completed) > self.max_completed:
+                self._completed.popitem(last=False)
+            self._chunks.pop(file_name, None)
+
+    def get_chunks(self, file_name: str) -> Optional[Set[str]]:
+        """返回缓存的 chunk 集合副本，未缓存时返回 None"""
+        with self._lock:
+            chunks = self._chunks.get(file_name)
+            if chunks is None:
+                return None
+            self._chunks.move_to_end(file_name)
+            return set(chunks)
+
+    def set_chunks(self, file_name: str, chunk_ids: Iterable[str]):
+        with self._lock:
+            self._chunks[file_name] = set(chunk_ids)
+            self._chunks.move_to_end(file_name)
+            while len(self._chunks) > self.max_files:
+                self._chunks.popitem(last=False)
+
+    def add_chunks(self, file_name: str, chunk_ids: Iterable[str]):
+        """只更新已缓存的文件；未缓存的文件下次读取时会从后端拿到完整集合"""
+        with self._lock:
+            chunks = self._chunks.get(file_name)
+            if chunks is not None:
+                chunks.update(chunk_ids)
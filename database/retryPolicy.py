@@ -0,0 +1,143 @@
+import time
+from dataclasses import dataclass, field
+from typing import Any, Dict, Iterable, List, Optional, Set, Tuple
+
+from .message import QueueMessage, serialize_message
+
+@dataclass
+class RetryPolicy:
+    """
+    基于投递次数的重试策略，Redis 同步/异步队列与内存队列共用：
+    第 n 次投递失败后，距上次投递满 backoff_ms * 2^(n-1)（上限 backoff_max_ms）才重新投递；
+    投递次数达到 max_deliveries 仍失败的消息转入死信流（内存队列直接丢弃）。max_deliveries 为 0 表示不限次数。
+    """
+    max_deliveries: int = 0
+    backoff_ms: int = 1000
+    backoff_max_ms: int = 60000
+
+    @classmethod
+    def from_config(cls, config: Dict[str, Any]) -> "RetryPolicy":
+        return cls(
+            max_deliveries=config.get('max_deliveries', 0),
+            backoff_ms=config.get('retry_backoff_ms', 1000),
+            backoff_max_ms=config.get('retry_backoff_max_ms', 60000)
+        )
+
+    def delay_ms(self, deliveries: int) -> int:
+        return min(self.backoff_ms * 2 ** max(deliveries - 1, 0), self.backoff_max_ms)
+
+    def exhausted(self, deliveries: int) -> bool:
+        return bool(self.max_deliveries) and deliveries >= self.max_deliveries
+
+@dataclass
+class PendingScan:
+    """一次 PEL 扫描的累积结果：prior 为选中重投的条目 {message_id: 认领前的投递次数}"""
+    max_messages: int
+    prior: Dict[str, int] = field(default_factory=dict)
+    # 扫描到仍处于退避期的条目
+    waiting: bool = False
+
+
+class PendingTracker:
+    """
+    RedisMessageQueue / AsyncRedisMessageQueue 共用的 PEL 状态与重投、死信决策，本身不访问 Redis：
+    队列负责执行 XPENDING / XCLAIM / XACK，把结果交给这里判断下一步。
+    - delivered：已交给调用方、尚未 ack / nack 的消息 ID；仍在 PEL 中，扫描与接管时跳过
+    - check_pending：下次 consume_batch 是否先扫描 PEL。新读到的消息已记录在 delivered 中，
+      读取新消息后无需回到 PEL；只有启动时、nack、ACK 失败或仍有退避期内的条目时才扫描
+    - retry_waiting：PEL 中还有处于退避期、等待重投的失败消息
+    """
+    # 每次 XPENDING 扫描本消费者 PEL 的条数
+    SCAN_COUNT = 100
+    EXHAUSTED_ERROR = "达到最大投递次数仍未确认（处理过程中进程退出或超时）"
+
+    def __init__(self, policy: RetryPolicy):
+        self.policy = policy
+        self.delivered: Set[str] = set()
+        self.check_pending = True
+        self.retry_waiting = False
+
+    def mark_delivered(self, messages: List[QueueMessage]) -> List[QueueMessage]:
+        self.delivered.update(m.id for m in messages)
+        return messages
+
+    def scan_page(self, scan: PendingScan, entries: List[Dict[str, Any]]) -> Optional[str]:
+        """
+        处理一页 XPENDING 条目，返回下一页的起始 ID，扫描结束时返回 None：
+        - 仍在处理中的条目跳过
+        - 距上次投递未满退避时间的条目暂不重投
+        - 投递次数已达上限却仍未确认的条目同样选中，认领后由 split_claimed 转入死信
+        """
+        for entry in entries:
+            if entry['message_id'] in self.delivered:
+                continue
+            times = entry['times_delivered']
+            if self.policy.exhausted(times) or entry['time_since_delivered'] >= self.policy.delay_ms(times):
+                scan.prior[entry['message_id']] = times
+                if len(scan.prior) >= scan.max_messages:
+                    return None
+            else:
+                scan.waiting = True
+        return self.next_page(entries)
+
+    def next_page(self, entries: List[Dict[str, Any]]) -> Optional[str]:
+        if len(entries) < self.SCAN_COUNT:
+            return None
+        return f"({entries[-1]['message_id']}"
+
+    def scanned(self, found: bool, waiting: bool):
+        """记录一次 PEL 扫描的结果；没有可重投的条目且无退避期内的条目时，之后直接读取新消息"""
+        self.retry_waiting = waiting
+        if not found:
+            self.check_pending = waiting
+
+    @staticmethod
+    def missing(prior: Dict[str, int], messages: List[QueueMessage]) -> Set[str]:
+        """原始条目已被删除、XCLAIM 取不回内容的 Pending 记录，需直接确认以清出 PEL"""
+        return set(prior) - {m.id for m in messages}
+
+    def reclaimable(self, messages: List[QueueMessage]) -> List[QueueMessage]:
+        """XAUTOCLAIM 接管到的条目中去掉本消费者仍在处理中的"""
+        return [m for m in messages if m.id not in self.delivered]
+
+    @staticmethod
+    def reclaim_prior(messages: List[QueueMessage], counts: Dict[str, int]) -> Dict[str, int]:
+        """XAUTOCLAIM 已将投递次数加一，由认领后的 PEL 计数得到认领前的次数"""
+        return {m.id: counts.get(m.id, 1) - 1 for m in messages}
+
+    def split_claimed(self, messages: List[QueueMessage],
+                      prior: Dict[str, int]) -> Tuple[List[QueueMessage], List[QueueMessage]]:
+        """按认领前的投递次数标注 delivery_count，返回 (交给调用方的消息, 应转入死信的消息)"""
+        deliverable, exhausted = [], []
+        for m in messages:
+            m.delivery_count = prior.get(m.id, 0) + 1
+            (exhausted if self.policy.exhausted(prior.get(m.id, 0)) else deliverable).append(m)
+        return deliverable, exhausted
+
+    def nacked(self, message: QueueMessage) -> bool:
+        """处理失败的消息不再处于处理中，留在 PEL 中等待重投；返回 True 表示投递次数已用尽、应转入死信"""
+        self.delivered.discard(message.id)
+        self.check_pending = True
+        self.retry_waiting = True
+        return self.policy.exhausted(message.delivery_count)
+
+    def acked(self, message_ids: Iterable[str], requested: int, acked: int):
+        """无论 ACK 是否成功都不再处于处理中；有未确认成功的条目或等待重投的消息时回到优先检查 PEL"""
+        self.delivered.difference_update(message_ids)
+        self.check_pending = self.retry_waiting or acked < requested
+
+
+def dead_letter_fields(message: QueueMessage, error: str, stage: str,
+                       stream: str, group: str, consumer: str) -> Dict[str, Any]:
+    """死信条目：保留原始 payload 字段，可直接 XADD 回原 Stream 重放"""
+    return {
+        "payload": serialize_message(message.data),
+        "error": error,
+        "stage": stage,
+        "source_stream": stream,
+        "source_id": message.id,
+        "group": group,
+        "consumer": consumer,
+        "delivery_count": message.delivery_count,
+        "failed_at": time.time()
+    }
@@ -0,0 +1,100 @@
+import logging
+import os
+import sqlite3
+import threading
+import time
+from typing import List, Set
+
+from database.interfaces import BaseStatusRegistry
+from database.registryCache import RegistryReadCache
+
+class SqliteStatusRegistry(BaseStatusRegistry):
+    """
+    本地 sqlite 持久化的入库进度：适合单机或共享 /data 卷部署。
+    WAL 模式下每次写入都是独立事务，进程崩溃后最多丢失尚未提交的那一批，重启后从已提交的进度续传。
+    完成状态与 chunk 进度都按 file_hash 比对，内容变化的同名文件按新版本重新入库。
+    """
+    def __init__(self, db_path: str, max_cached_files: int = 1024):
+        self.logger = logging.getLogger(__name__)
+        self._lock = threading.Lock()
+        self._cache = RegistryReadCache(max_files=max_cached_files)
+
+        if os.path.dirname(db_path):
+            os.makedirs(os.path.dirname(db_path), exist_ok=True)
+        self._db = sqlite3.connect(db_path, check_same_thread=False)
+        self._db.execute("PRAGMA journal_mode=WAL")
+        self._db.execute("PRAGMA synchronous=NORMAL")
+        self._db.execute(
+            "CREATE TABLE IF NOT EXISTS completed_files ("
+            "file_name TEXT PRIMARY KEY, file_hash TEXT NOT NULL, completed_at REAL NOT NULL)"
+        )
+        self._db.execute(
+            "CREATE TABLE IF NOT EXISTS processed_chunks ("
+            "file_name TEXT NOT NULL, chunk_id TEXT NOT NULL, file_hash TEXT NOT NULL DEFAULT '', "
+            "PRIMARY KEY (file_name, chunk_id)) WITHOUT ROWID"
+        )
+        # 旧版本的库没有 file_hash 列：补列后旧进度与任何版本都不匹配，对应文件从头续传
+        columns = {row[1] for row in self._db.execute("PRAGMA table_info(processed_chunks)")}
+        if "file_hash" not in columns:
+            self._db.execute("ALTER TABLE processed_chunks ADD COLUMN file_hash TEXT NOT NULL DEFAULT ''")
+        self._db.commit()
+        self.logger.info(f"入库进度持久化已启用 (sqlite): {db_path}")
+
+    def is_file_processed(self, file_name: str, file_hash: str) -> bool:
+        cache_key = RegistryReadCache.key(file_name, file_hash)
+        if self._cache.is_completed(cache_key):
+            return True
+
+        with self._lock:
+            row = self._db.execute(
+                "SELECT 1 FROM completed_files WHERE file_name = ? AND file_hash = ?", (file_name, file_hash)
+            ).fetchone()
+            chunk_ids = None if row else self._select_chunks(file_name, file_hash)
+
+        if row:
+            self._cache.set_completed(cache_key)
+            return True
+        # 同时缓存 chunk 进度，随后的 get_processed_chunks 无需再次查询
+        self._cache.set_chunks(cache_key, chunk_ids)
+        return False
+
+    def get_processed_chunks(self, file_name: str, file_hash: str) -> Set[str]:
+        cache_key = RegistryReadCache.key(file_name, file_hash)
+        cached = self._cache.get_chunks(cache_key)
+        if cached is not None:
+            return cached
+        with self._lock:
+            chunk_ids = self._select_chunks(file_name, file_hash)
+        self._cache.set_chunks(cache_key, chunk_ids)
+        return chunk_ids
+
+    def _select_chunks(self, file_name: str, file_hash: str) -> Set[str]:
+        rows = self._db.execute(
+            "SELECT chunk_id FROM processed_chunks WHERE file_name = ? AND file_hash = ?", (file_name, file_hash)
+        ).fetchall()
+        return {r[0] for r in rows}
+
+    def mark_chunks_processed(self, file_name: str, file_hash: str, chunk_ids: List[str]):
+        if not chunk_ids:
+            return
+        # 整批 chunk 在一个事务内写入；同名文件旧版本留下的同 ID 记录改记为当前版本
+        with self._lock, self._db:
+            self._db.executemany(
+                "INSERT OR REPLACE INTO processed_chunks (file_name, chunk_id, file_hash) VALUES (?, ?, ?)",
+                [(file_name, chunk_id, file_hash) for chunk_id in chunk_ids]
+            )
+        self._cache.add_chunks(RegistryReadCache.key(file_name, file_hash), chunk_ids)
+
+    def mark_file_complete(self, file_name: str, file_hash: str):
+        # 文件索引写入与 chunk 记录清理在同一事务中完成
+        with self._lock, self._db:
+            self._db.execute(
+                "INSERT OR REPLACE INTO completed_files (file_name, file_hash, completed_at) VALUES (?, ?, ?)",
+                (file_name, file_hash, time.time())
+            )
+            self._db.execute("DELETE FROM processed_chunks WHERE file_name = ?", (file_name,))
+        self._cache.set_completed(RegistryReadCache.key(file_name, file_hash))
+
+    def close(self):
+        with self._lock:
+            self._db.close()
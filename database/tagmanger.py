@@ -47,7 +47,8 @@ class TagManager:
         self.logger.info(f"开启标签后台刷新，频率: {self.refresh_interval}s")
         while self._is_running:
             await asyncio.sleep(self.refresh_interval)
-            self._sync_tags_from_db()
+            # Milvus 查询为同步调用，放到线程中执行避免阻塞事件循环
+            await asyncio.to_thread(self._sync_tags_from_db)
 
     def stop_background_refresh(self):
         """停止后台刷新"""
@@ -0,0 +1,258 @@
+import hashlib
+import logging
+import os
+import sqlite3
+import threading
+from array import array
+from collections import OrderedDict
+from typing import Any, Awaitable, Callable, Dict, List, Optional
+
+from llama_index.core.bridge.pydantic import PrivateAttr
+from llama_index.core.embeddings import BaseEmbedding
+
+from .interfaces import EmbeddingService
+
+
+class EmbeddingCache:
+    """
+    内容寻址的向量缓存：
+    1. Key = sha256(模型名 + 类型 + 文本)，同一文本在同一模型下只计算一次
+    2. 内存层：按字节上限做 LRU 淘汰
+    3. 磁盘层（可选）：sqlite 持久化，进程重启 / 消息重放后依然命中
+    """
+
+    _SQLITE_MAX_PARAMS = 500
+
+    def __init__(self, max_bytes: int = 256 * 1024 * 1024, db_path: Optional[str] = None):
+        self.logger = logging.getLogger(__name__)
+        self.max_bytes = max_bytes
+        self._lru: "OrderedDict[str, bytes]" = OrderedDict()
+        self._lru_bytes = 0
+        self._lock = threading.Lock()
+
+        # 命中统计
+        self.hits = 0
+        self.disk_hits = 0
+        self.misses = 0
+
+        self._db: Optional[sqlite3.Connection] = None
+        if db_path:
+            if os.path.dirname(db_path):
+                os.makedirs(os.path.dirname(db_path), exist_ok=True)
+            self._db = sqlite3.connect(db_path, check_same_thread=False)
+            self._db.execute("PRAGMA journal_mode=WAL")
+            self._db.execute("PRAGMA synchronous=NORMAL")
+            self._db.execute(
+                "CREATE TABLE IF NOT EXISTS embeddings (key TEXT PRIMARY KEY, vector BLOB NOT NULL)"
+            )
+            self._db.commit()
+            self.logger.info(f"EmbeddingCache 磁盘层已启用: {db_path}")
+
+    @staticmethod
+    def make_key(model_name: str, text: str, kind: str = "text") -> str:
+        """按 模型名 + 类型(text/query) + 文本 计算内容地址"""
+        return hashlib.sha256(f"{model_name}\x00{kind}\x00{text}".encode("utf-8")).hexdigest()
+
+    def get_many(self, keys: List[str]) -> List[Optional[List[float]]]:
+        """批量查询，未命中的位置返回 None"""
+        results: List[Optional[List[float]]] = [None] * len(keys)
+        disk_lookup: Dict[str, List[int]] = {}
+
+        with self._lock:
+            for i, key in enumerate(keys):
+                blob = self._lru.get(key)
+                if blob is not None:
+                    self._lru.move_to_end(key)
+                    results[i] = self._unpack(blob)
+                    self.hits += 1
+                else:
+                    disk_lookup.setdefault(key, []).append(i)
+
+            if disk_lookup and self._db is not None:
+                for key, blob in self._select_from_disk(list(disk_lookup)):
+                    # 磁盘命中后提升到内存层
+                    self._put_memory(key, blob)
+                    vector = self._unpack(blob)
+                    for i in disk_lookup.pop(key):
+                        results[i] = vector
+                        self.hits += 1
+                        self.disk_hits += 1
+
+            self.misses += sum(len(idx) for idx in disk_lookup.values())
+
+        return results
+
+    def put_many(self, items: Dict[str, List[float]]):
+        """批量写入内存层，并在启用磁盘层时落盘"""
+        if not items:
+            return
+        packed = {key: self._pack(vector) for key, vector in items.items()}
+        with self._lock:
+            for key, blob in packed.items():
+                self._put_memory(key, blob)
+            if self._db is not None:
+                self._db.executemany(
+                    "INSERT OR REPLACE INTO embeddings (key, vector) VALUES (?, ?)",
+                    list(packed.items())
+                )
+                self._db.commit()
+
+    def stats(self) -> Dict[str, Any]:
+        total = self.hits + self.misses
+        return {
+            "hits": self.hits,
+            "disk_hits": self.disk_hits,
+            "misses": self.misses,
+            "hit_rate": self.hits / total if total else 0.0,
+            "memory_entries": len(self._lru),
+            "memory_bytes": self._lru_bytes
+        }
+
+    def close(self):
+        with self._lock:
+            if self._db is not None:
+                self._db.close()
+                self._db = None
+
+    # --- 内部方法（调用方需持有 _lock） ---
+
+    def _put_memory(self, key: str, blob: bytes):
+        old = self._lru.pop(key, None)
+        if old is not None:
+            self._lru_bytes -= len(old)
+        self._lru[key] = blob
+        self._lru_bytes += len(blob)
+        # 超出字节上限时从最久未使用的一端淘汰
+        while self._lru_bytes > self.max_bytes and self._lru:
+            _, evicted = self._lru.popitem(last=False)
+            self._lru_bytes -= len(evicted)
+
+    def _select_from_disk(self, keys: List[str]):
+        rows = []
+        for i in range(0, len(keys), self._SQLITE_MAX_PARAMS):
+            batch = keys[i : i + self._SQLITE_MAX_PARAMS]
+            placeholders = ",".join("?" * len(batch))
+            rows.extend(self._db.execute(
+                f"SELECT key, vector FROM embeddings WHERE key IN ({placeholders})", batch
+            ).fetchall())
+        return rows
+
+    @staticmethod
+    def _pack(vector: List[float]) -> bytes:
+        # float32 紧凑存储，与 Milvus 中的 FLOAT_VECTOR 精度一致
+        return array("f", vector).tobytes()
+
+    @staticmethod
+    def _unpack(blob: bytes) -> List[float]:
+        vector = array("f")
+        vector.frombytes(blob)
+        return vector.tolist()
+
+
+def _split_hits(cache: EmbeddingCache, model_name: str, kind: str, texts: List[str]):
+    keys = [EmbeddingCache.make_key(model_name, t, kind) for t in texts]
+    results = cache.get_many(keys)
+    # 同一批次内的重复文本只计算一次
+    missing = list(dict.fromkeys(texts[i] for i, v in enumerate(results) if v is None))
+    return keys, results, missing
+
+
+def _merge_computed(cache: EmbeddingCache, texts, keys, results, missing, vectors):
+    computed = dict(zip(missing, vectors))
+    new_items = {}
+    for i, vector in enumerate(results):
+        if vector is None:
+            results[i] = computed[texts[i]]
+            new_items[keys[i]] = results[i]
+    cache.put_many(new_items)
+    return results
+
+
+def cached_embed(
+    cache: EmbeddingCache,
+    model_name: str,
+    kind: str,
+    texts: List[str],
+    compute: Callable[[List[str]], List[List[float]]]
+) -> List[List[float]]:
+    """先查缓存，只把未命中的文本交给 compute 计算"""
+    keys, results, missing = _split_hits(cache, model_name, kind, texts)
+    vectors = compute(missing) if missing else []
+    return _merge_computed(cache, texts, keys, results, missing, vectors)
+
+
+async def acached_embed(
+    cache: EmbeddingCache,
+    model_name: str,
+    kind: str,
+    texts: List[str],
+    compute: Callable[[List[str]], Awaitable[List[List[float]]]]
+) -> List[List[float]]:
+    """cached_embed 的异步版本"""
+    keys, results, missing = _split_hits(cache, model_name, kind, texts)
+    vectors = await compute(missing) if missing else []
+    return _merge_computed(cache, texts, keys, results, missing, vectors)
+
+
+class CachedEmbedding(BaseEmbedding):
+    """
+    包装任意 BaseEmbedding，使 LlamaIndex 内部（insert_nodes / 检索）的向量计算也走缓存
+    """
+    _inner: BaseEmbedding = PrivateAttr()
+    _cache: EmbeddingCache = PrivateAttr()
+
+    def __init__(self, inner: BaseEmbedding, cache: EmbeddingCache, **kwargs: Any):
+        super().__init__(
+            model_name=inner.model_name,
+            embed_batch_size=inner.embed_batch_size,
+            **kwargs
+        )
+        self._inner = inner
+        self._cache = cache
+
+    @classmethod
+    def class_name(cls) -> str:
+        return "CachedEmbedding"
+
+    def _get_query_embedding(self, query: str) -> List[float]:
+        return cached_embed(self._cache, self.model_name, "query", [query],
+                            lambda qs: [self._inner.get_query_embedding(qs[0])])[0]
+
+    async def _aget_query_embedding(self, query: str) -> List[float]:
+        async def compute(qs: List[str]) -> List[List[float]]:
+            return [await self._inner.aget_query_embedding(qs[0])]
+        return (await acached_embed(self._cache, self.model_name, "query", [query], compute))[0]
+
+    def _get_text_embedding(self, text: str) -> List[float]:
+        return self._get_text_embeddings([text])[0]
+
+    async def _aget_text_embedding(self, text: str) -> List[float]:
+        return (await self._aget_text_embeddings([text]))[0]
+
+    def _get_text_embeddings(self, texts: List[str]) -> List[List[float]]:
+        return cached_embed(self._cache, self.model_name, "text", texts,
+                            self._inner.get_text_embedding_batch)
+
+    async def _aget_text_embeddings(self, texts: List[str]) -> List[List[float]]:
+        return await acached_embed(self._cache, self.model_name, "text", texts,
+                                   self._inner.aget_text_embedding_batch)
+
+
+class CachedEmbeddingService(EmbeddingService):
+    """带缓存的 EmbeddingService，对外接口与被包装的服务保持一致"""
+    def __init__(self, service: EmbeddingService, cache: EmbeddingCache):
+        self._service = service
+        self._cache = cache
+        self._embed_model = CachedEmbedding(service.embed_model, cache)
+
+    def get_embeddings(self, docs: List[str]) -> List[List[float]]:
+        return cached_embed(self._cache, self._embed_model.model_name, "text", docs,
+                            self._service.get_embeddings)
+
+    @property
+    def embed_model(self) -> BaseEmbedding:
+        return self._embed_model
+
+    @property
+    def cache(self) -> EmbeddingCache:
+        return self._cache
@@ -7,13 +7,15 @@ from llama_index.core.embeddings import BaseEmbedding
 from llama_index.embeddings.text_embeddings_inference import TextEmbeddingsInference 
 
 class TextEmbeddingService(EmbeddingService):
-    def __init__(self):
+    def __init__(self, embed_batch_size: int = 32):
         load_dotenv()
         #print("Embed_API_URL" + os.getenv('Embed_API_URL'))
+        # embed_batch_size 决定 get_text_embedding_batch 每次 HTTP 请求携带的文本条数
         self._embed_model = TextEmbeddingsInference(
             model_name="BAAI/bge-small-zh-v1.5",
             base_url=os.getenv('Embed_API_URL'),
-            endpoint="/embed"
+            endpoint="/embed",
+            embed_batch_size=embed_batch_size
             )
     
     def get_embeddings(self, docs: List[str]) -> List[List[float]]:
@@ -1,7 +1,11 @@
 from .interfaces import EmbeddingService
 from .TextEmbeddingsInference import TextEmbeddingService
+from .EmbeddingCache import EmbeddingCache, CachedEmbedding, CachedEmbeddingService
 
 __all__ = [
     "TextEmbeddingService",
-    "EmbeddingService"
+    "EmbeddingService",
+    "EmbeddingCache",
+    "CachedEmbedding",
+    "CachedEmbeddingService"
 ]
\ No newline at end of file
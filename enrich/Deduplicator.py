@@ -0,0 +1,266 @@
+import hashlib
+import json
+import logging
+import os
+import sqlite3
+import threading
+import time
+from dataclasses import dataclass, field
+from typing import Any, Dict, List, Optional, Tuple
+
+import jieba
+import numpy as np
+
+from files.DocumentFormat import Node
+
+# 大于 2^32 的素数；a < 2^31 保证 a * h + b 不会溢出 uint64
+_PRIME = np.uint64(4294967311)
+_MAX_HASH = np.uint64(0xFFFFFFFF)
+
+@dataclass
+class DedupPlan:
+    """一次去重判定的结果，丰富化完成后交给 commit 落库"""
+    to_enrich: List[Node] = field(default_factory=list)
+    # 本批新出现的规范节点: (key, node, signature)
+    canonical: List[Tuple[str, Node, np.ndarray]] = field(default_factory=list)
+    # 近似重复节点: (node, 规范节点 key)
+    duplicates: List[Tuple[Node, str]] = field(default_factory=list)
+    # commit 后填充：规范节点丰富化失败、没有结果可复用的重复节点，需要单独丰富化
+    retry: List[Node] = field(default_factory=list)
+
+class NearDuplicateDetector:
+    """
+    基于 MinHash + LSH 的近似重复检测：
+    1. 对 jieba 分词后的 page_content 取词级 shingle 计算 MinHash 签名
+    2. 签名按 bands 切分写入持久化的 LSH 索引（sqlite），跨文件、跨重启生效
+    3. 命中的近似重复节点直接复制规范节点的丰富化结果（mode="copy"），或从分片中剔除（mode="drop"）；
+       规范节点没有丰富化结果时两种模式都改为单独丰富化，内容不会因此丢失
+    索引按 ttl_seconds 过期，超过 max_entries 时按最近使用时间淘汰，与丰富化缓存一致。
+    """
+
+    # 从规范节点复制到重复节点的字段，与 EnrichmentMaster._apply_result 写入的字段一致
+    ENRICHED_FIELDS = ("summary", "keywords", "tags", "facts",
+                       "publish_date", "source", "location", "event_type")
+
+    def __init__(
+        self,
+        db_path: str = ":memory:",
+        num_perm: int = 128,
+        bands: int = 32,
+        threshold: float = 0.8,
+        shingle_size: int = 3,
+        mode: str = "copy",
+        seed: int = 1,
+        ttl_seconds: Optional[int] = None,
+        max_entries: int = 500000,
+        evict_every: int = 500
+    ):
+        if num_perm % bands != 0:
+            raise ValueError("num_perm 必须能被 bands 整除")
+        if mode not in ("copy", "drop"):
+            raise ValueError(f"不支持的去重模式: {mode}")
+
+        self.logger = logging.getLogger(__name__)
+        self.num_perm = num_perm
+        self.bands = bands
+        self.rows = num_perm // bands
+        self.threshold = threshold
+        self.shingle_size = shingle_size
+        self.mode = mode
+        self.ttl_seconds = ttl_seconds
+        self.max_entries = max_entries
+        self.evict_every = evict_every
+        self._commits = 0
+
+        rng = np.random.RandomState(seed)
+        self._a = rng.randint(1, 1 << 31, size=num_perm).astype(np.uint64)
+        self._b = rng.randint(0, 1 << 31, size=num_perm).astype(np.uint64)
+
+        self._lock = threading.Lock()
+        if db_path != ":memory:" and os.path.dirname(db_path):
+            os.makedirs(os.path.dirname(db_path), exist_ok=True)
+        self._db = sqlite3.connect(db_path, check_same_thread=False)
+        self._db.execute("PRAGMA journal_mode=WAL")
+        self._db.execute(
+            "CREATE TABLE IF NOT EXISTS signatures ("
+            "node_key TEXT PRIMARY KEY, signature BLOB NOT NULL, metadata TEXT, used_at REAL NOT NULL DEFAULT 0)"
+        )
+        columns = {row[1] for row in self._db.execute("PRAGMA table_info(signatures)")}
+        if "used_at" not in columns:
+            # 旧版本的索引没有使用时间，按升级时刻计起
+            self._db.execute("ALTER TABLE signatures ADD COLUMN used_at REAL NOT NULL DEFAULT 0")
+            self._db.execute("UPDATE signatures SET used_at = ?", (time.time(),))
+        self._db.execute("CREATE INDEX IF NOT EXISTS idx_signatures_used ON signatures (used_at)")
+        self._db.execute(
+            "CREATE TABLE IF NOT EXISTS lsh_bands (band TEXT NOT NULL, node_key TEXT NOT NULL, PRIMARY KEY (band, node_key))"
+        )
+        self._db.execute("CREATE INDEX IF NOT EXISTS idx_lsh_bands_node ON lsh_bands (node_key)")
+        self._db.commit()
+
+    # --- 签名计算 ---
+
+    def signature(self, text: str) -> Optional[np.ndarray]:
+        """计算 MinHash 签名，文本没有有效词时返回 None"""
+        tokens = [t for t in jieba.cut(text) if any(ch.isalnum() for ch in t)]
+        if not tokens:
+            return None
+
+        k = self.shingle_size
+        if len(tokens) < k:
+            shingles = set(tokens)
+        else:
+            shingles = {"\x00".join(tokens[i : i + k]) for i in range(len(tokens) - k + 1)}
+
+        hashes = np.fromiter(
+            (int.from_bytes(hashlib.blake2b(s.encode("utf-8"), digest_size=4).digest(), "little") for s in shingles),
+            dtype=np.uint64,
+            count=len(shingles)
+        )
+        # (n_shingles, num_perm) 一次向量化计算所有置换下的最小哈希
+        permuted = (hashes[:, None] * self._a + self._b) % _PRIME
+        return np.bitwise_and(permuted.min(axis=0), _MAX_HASH).astype(np.uint32)
+
+    def _band_keys(self, sig: np.ndarray) -> List[str]:
+        return [
+            f"{i}:{hashlib.md5(sig[i * self.rows : (i + 1) * self.rows].tobytes()).hexdigest()}"
+            for i in range(self.bands)
+        ]
+
+    def _similarity(self, a: np.ndarray, b: np.ndarray) -> float:
+        return float(np.mean(a == b))
+
+    @staticmethod
+    def _content_key(text: str, scope: str = "") -> str:
+        return hashlib.md5(f"{scope}\x00{text}".encode("utf-8")).hexdigest()
+
+    # --- 对外流程 ---
+
+    def plan(self, nodes: List[Node], scope: str = "") -> DedupPlan:
+        """
+        丰富化之前调用：划分出需要调用 LLM 的节点与可复用结果的近似重复节点。
+        scope 为节点所属分片的路径，参与规范节点 key 的计算：同一分片重放时节点与自己上次登记的条目
+        key 相同，不算重复；其它分片中的相同内容 key 不同，照常命中。
+        """
+        plan = DedupPlan()
+        local: Dict[str, np.ndarray] = {}
+
+        for node in nodes:
+            sig = self.signature(node.page_content)
+            if sig is None:
+                plan.to_enrich.append(node)
+                continue
+
+            key = self._content_key(node.page_content, scope)
+            # 重放的分片（如发布失败后重投）中的节点会命中自己上次登记的签名，不算重复
+            canonical = self._find_local(sig, local) or self._find_stored(sig, exclude=key)
+            if canonical is not None:
+                plan.duplicates.append((node, canonical))
+                continue
+
+            local[key] = sig
+            plan.canonical.append((key, node, sig))
+            plan.to_enrich.append(node)
+
+        if plan.duplicates:
+            self.logger.info(f"检测到近似重复节点 {len(plan.duplicates)} 个，跳过丰富化")
+        return plan
+
+    def commit(self, plan: DedupPlan) -> List[Node]:
+        """
+        丰富化之后调用：登记规范节点及其丰富化结果，并处理重复节点。
+        返回需要从分片中剔除的节点（仅 mode="drop"）；
+        规范节点没有可复用结果（丰富化失败）的重复节点不剔除也不复制，放入 plan.retry 由调用方重新丰富化。
+        """
+        now = time.time()
+        local_meta: Dict[str, Optional[Dict[str, Any]]] = {}
+        with self._lock:
+            for key, node, sig in plan.canonical:
+                meta = {f: node.metadata[f] for f in self.ENRICHED_FIELDS if f in node.metadata}
+                # 丰富化失败的节点不保存结果，之后的重复内容仍会重新调用 LLM
+                meta = meta if meta.get("summary") else None
+                local_meta[key] = meta
+                self._db.execute(
+                    "INSERT OR REPLACE INTO signatures (node_key, signature, metadata, used_at) VALUES (?, ?, ?, ?)",
+                    (key, sig.tobytes(), json.dumps(meta, ensure_ascii=False) if meta else None, now)
+                )
+                self._db.executemany(
+                    "INSERT OR IGNORE INTO lsh_bands (band, node_key) VALUES (?, ?)",
+                    [(band, key) for band in self._band_keys(sig)]
+                )
+            # 被复用的规范节点刷新使用时间，容量淘汰时保留常用条目
+            reused = {canonical for _, canonical in plan.duplicates if canonical not in local_meta}
+            self._db.executemany(
+                "UPDATE signatures SET used_at = ? WHERE node_key = ?", [(now, key) for key in reused]
+            )
+            self._commits += 1
+            if self._commits % self.evict_every == 0:
+                self._evict(now)
+            self._db.commit()
+
+        dropped = []
+        for node, canonical in plan.duplicates:
+            meta = local_meta[canonical] if canonical in local_meta else self._get_metadata(canonical)
+            if not meta:
+                plan.retry.append(node)
+            elif self.mode == "drop":
+                dropped.append(node)
+            else:
+                node.metadata.update(meta)
+                node.metadata["duplicate_of"] = canonical
+        return dropped
+
+    def _evict(self, now: float):
+        """删除过期和超出容量的规范节点及其 LSH 条目，调用方持有锁"""
+        expired = []
+        if self.ttl_seconds:
+            expired = self._db.execute(
+                "SELECT node_key FROM signatures WHERE used_at < ?", (now - self.ttl_seconds,)
+            ).fetchall()
+        count = self._db.execute("SELECT COUNT(*) FROM signatures").fetchone()[0] - len(expired)
+        if count > self.max_entries:
+            expired += self._db.execute(
+                "SELECT node_key FROM signatures WHERE used_at >= ? ORDER BY used_at ASC LIMIT ?",
+                (now - self.ttl_seconds if self.ttl_seconds else 0, count - self.max_entries)
+            ).fetchall()
+        if expired:
+            self._db.executemany("DELETE FROM signatures WHERE node_key = ?", expired)
+            self._db.executemany("DELETE FROM lsh_bands WHERE node_key = ?", expired)
+            self.logger.info(f"去重索引淘汰 {len(expired)} 条")
+
+    # --- 索引查询 ---
+
+    def _find_local(self, sig: np.ndarray, local: Dict[str, np.ndarray]) -> Optional[str]:
+        for key, other in local.items():
+            if self._similarity(sig, other) >= self.threshold:
+                return key
+        return None
+
+    def _find_stored(self, sig: np.ndarray, exclude: Optional[str] = None) -> Optional[str]:
+        """LSH 召回候选后用签名相似度复核，只返回已有丰富化结果的规范节点；exclude 为节点自身的 key"""
+        bands = self._band_keys(sig)
+        placeholders = ",".join("?" * len(bands))
+        with self._lock:
+            rows = self._db.execute(
+                f"SELECT s.node_key, s.signature FROM signatures s "
+                f"WHERE s.metadata IS NOT NULL AND s.node_key IN "
+                f"(SELECT DISTINCT node_key FROM lsh_bands WHERE band IN ({placeholders}))",
+                bands
+            ).fetchall()
+
+        best_key, best_score = None, self.threshold
+        for key, blob in rows:
+            if key == exclude:
+                continue
+            score = self._similarity(sig, np.frombuffer(blob, dtype=np.uint32))
+            if score >= best_score:
+                best_key, best_score = key, score
+        return best_key
+
+    def _get_metadata(self, key: str) -> Optional[Dict[str, Any]]:
+        with self._lock:
+            row = self._db.execute("SELECT metadata FROM signatures WHERE node_key = ?", (key,)).fetchone()
+        return json.loads(row[0]) if row and row[0] else None
+
+    def close(self):
+        with self._lock:
+            self._db.close()
@@ -0,0 +1,169 @@
+import asyncio
+import json
+import logging
+import os
+import sqlite3
+import threading
+import time
+from typing import Any, Dict, Optional
+
+import redis.asyncio as aioredis
+
+from .interfaces import BaseEnrichmentCache
+
+class SqliteEnrichmentCache(BaseEnrichmentCache):
+    """
+    本地 sqlite 缓存：适合单机或共享 /data 卷部署。
+    按 ttl_seconds 过期，按 accessed_at 做 LRU 容量淘汰。
+    """
+    def __init__(self, db_path: str, ttl_seconds: Optional[int] = None,
+                 max_entries: int = 200000, evict_every: int = 500):
+        super().__init__()
+        self.logger = logging.getLogger(__name__)
+        self.ttl_seconds = ttl_seconds
+        self.max_entries = max_entries
+        self.evict_every = evict_every
+        self._writes = 0
+        self._lock = threading.Lock()
+
+        if os.path.dirname(db_path):
+            os.makedirs(os.path.dirname(db_path), exist_ok=True)
+        self._db = sqlite3.connect(db_path, check_same_thread=False)
+        self._db.execute("PRAGMA journal_mode=WAL")
+        self._db.execute("PRAGMA synchronous=NORMAL")
+        self._db.execute(
+            "CREATE TABLE IF NOT EXISTS enrichment_cache ("
+            "key TEXT PRIMARY KEY, value TEXT NOT NULL, created_at REAL NOT NULL, accessed_at REAL NOT NULL)"
+        )
+        self._db.execute(
+            "CREATE INDEX IF NOT EXISTS idx_enrichment_accessed ON enrichment_cache (accessed_at)"
+        )
+        self._db.commit()
+        self.logger.info(f"丰富化缓存已启用 (sqlite): {db_path}")
+
+    async def get(self, key: str) -> Optional[Dict[str, Any]]:
+        try:
+            value = await asyncio.to_thread(self._get_sync, key)
+        except Exception as e:
+            self.logger.error(f"读取丰富化缓存失败: {e}")
+            value = None
+        if value is None:
+            self.misses += 1
+        else:
+            self.hits += 1
+        return value
+
+    async def set(self, key: str, value: Dict[str, Any]):
+        try:
+            await asyncio.to_thread(self._set_sync, key, json.dumps(value, ensure_ascii=False))
+        except Exception as e:
+            # 缓存写失败不影响主流程
+            self.logger.error(f"写入丰富化缓存失败: {e}")
+
+    def _get_sync(self, key: str) -> Optional[Dict[str, Any]]:
+        now = time.time()
+        with self._lock:
+            row = self._db.execute(
+                "SELECT value, created_at FROM enrichment_cache WHERE key = ?", (key,)
+            ).fetchone()
+            if row is None:
+                return None
+            if self.ttl_seconds and now - row[1] > self.ttl_seconds:
+                self._db.execute("DELETE FROM enrichment_cache WHERE key = ?", (key,))
+                self._db.commit()
+                return None
+            self._db.execute("UPDATE enrichment_cache SET accessed_at = ? WHERE key = ?", (now, key))
+            self._db.commit()
+        return json.loads(row[0])
+
+    def _set_sync(self, key: str, value: str):
+        now = time.time()
+        with self._lock:
+            self._db.execute(
+                "INSERT OR REPLACE INTO enrichment_cache (key, value, created_at, accessed_at) VALUES (?, ?, ?, ?)",
+                (key, value, now, now)
+            )
+            self._writes += 1
+            # 淘汰放在写路径上按批执行，避免每次写入都扫表
+            if self._writes % self.evict_every == 0:
+                self._evict(now)
+            self._db.commit()
+
+    def _evict(self, now: float):
+        if self.ttl_seconds:
+            self._db.execute("DELETE FROM enrichment_cache WHERE created_at < ?", (now - self.ttl_seconds,))
+        count = self._db.execute("SELECT COUNT(*) FROM enrichment_cache").fetchone()[0]
+        if count > self.max_entries:
+            self._db.execute(
+                "DELETE FROM enrichment_cache WHERE key IN "
+                "(SELECT key FROM enrichment_cache ORDER BY accessed_at ASC LIMIT ?)",
+                (count - self.max_entries,)
+            )
+            self.logger.info(f"丰富化缓存淘汰 {count - self.max_entries} 条")
+
+    async def close(self):
+        with self._lock:
+            self._db.close()
+
+
+class RedisEnrichmentCache(BaseEnrichmentCache):
+    """
+    Redis 缓存：多个 enrich worker 共享同一份结果。
+    单条结果依赖 EX 过期（从写入时计）；额外维护一个按最近访问时间排序的 ZSET 做 LRU 容量淘汰：
+    - 命中时刷新 ZSET 中的访问时间，未命中时删除可能残留的成员（对应的键已过期）
+    - 写入时先清理超过 ttl 未被访问的成员（其键必然已过期），再按访问时间淘汰超出 max_entries 的条目
+    """
+    def __init__(self, config: Dict[str, Any], ttl_seconds: Optional[int] = None,
+                 max_entries: int = 200000, prefix: str = "enrich_cache"):
+        super().__init__()
+        self.logger = logging.getLogger(__name__)
+        self.client = aioredis.Redis(
+            host=config.get('host', 'localhost'),
+            port=config.get('port', 6379),
+            db=config.get('db', 0),
+            decode_responses=True
+        )
+        self.ttl_seconds = ttl_seconds
+        self.max_entries = max_entries
+        self.prefix = prefix
+        self._index_key = f"{prefix}:index"
+
+    async def get(self, key: str) -> Optional[Dict[str, Any]]:
+        try:
+            async with self.client.pipeline(transaction=False) as pipe:
+                pipe.get(f"{self.prefix}:{key}")
+                # XX：只刷新已有成员，不为不存在的键新建
+                pipe.zadd(self._index_key, {key: time.time()}, xx=True)
+                value, _ = await pipe.execute()
+            if value is None:
+                await self.client.zrem(self._index_key, key)
+        except Exception as e:
+            self.logger.error(f"读取丰富化缓存失败: {e}")
+            value = None
+        if value is None:
+            self.misses += 1
+            return None
+        self.hits += 1
+        return json.loads(value)
+
+    async def set(self, key: str, value: Dict[str, Any]):
+        now = time.time()
+        try:
+            async with self.client.pipeline(transaction=False) as pipe:
+                pipe.set(f"{self.prefix}:{key}", json.dumps(value, ensure_ascii=False), ex=self.ttl_seconds)
+                pipe.zadd(self._index_key, {key: now})
+                if self.ttl_seconds:
+                    pipe.zremrangebyscore(self._index_key, "-inf", now - self.ttl_seconds)
+                pipe.zcard(self._index_key)
+                size = (await pipe.execute())[-1]
+
+            if size > self.max_entries:
+                evicted = await self.client.zpopmin(self._index_key, size - self.max_entries)
+                if evicted:
+                    await self.client.delete(*[f"{self.prefix}:{k}" for k, _ in evicted])
+        except Exception as e:
+            # 缓存写失败不影响主流程
+            self.logger.error(f"写入丰富化缓存失败: {e}")
+
+    async def close(self):
+        await self.client.aclose()
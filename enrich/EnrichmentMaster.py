@@ -6,9 +6,14 @@ from typing import List, Dict, Any, Optional
 from llm.llm_client import LLMClient
 from constants import EnrichmentMethod
 from files.DocumentFormat import RAGTaskPayload, Node
-from .interfaces import BaseEnrichmentStrategy
+from metrics.pipeline import LLM_REQUESTS, record_llm_usage
+from metrics.tracing import trace_step
+from .interfaces import BaseEnrichmentStrategy, BaseEnrichmentCache
 
 class EnrichmentMaster:
+    # 修改 UNIFIED_PROMPT_TEMPLATE 或结果解析逻辑时必须同步递增，使旧的缓存结果失效
+    PROMPT_VERSION = "v1"
+
     UNIFIED_PROMPT_TEMPLATE = """
 你是一个专业的新闻内容分析与结构化信息抽取系统，具备高可靠性与低幻觉要求。请严格基于【待分析文本】进行信息提取与总结，禁止编造、推测或引入外部知识。
 
@@ -158,16 +163,24 @@ class EnrichmentMaster:
 ---
 """
 
-    def __init__(self, llm_client: LLMClient, max_concurrency: int = 5):
+    def __init__(self, llm_client: LLMClient, max_concurrency: int = 5,
+                 cache: Optional[BaseEnrichmentCache] = None):
         self.llm_client = llm_client
         self.logger = logging.getLogger(__name__)
         self.semaphore = asyncio.Semaphore(max_concurrency)
+        self.cache = cache
 
     async def process_payload(self, payload: RAGTaskPayload, all_tags: List[str]):
         """
         供 Manager 调用的核心入口：将所有 Node 分发为独立的异步任务
         """
-        nodes = [n for n in payload.content.nodes if n.page_content.strip()]
+        await self.process_nodes(payload.content.nodes, all_tags)
+
+    async def process_nodes(self, nodes: List[Node], all_tags: List[str]):
+        """
+        对指定的节点子集执行丰富化（例如去重后剩余的节点）
+        """
+        nodes = [n for n in nodes if n.page_content.strip()]
         
         if not nodes:
             return
@@ -183,37 +196,63 @@ class EnrichmentMaster:
         await asyncio.gather(*tasks)
 
     async def _enrich_single_node(self, node: Node, labels_info: str):
+        try:
+            # 1. 先查缓存：命中时不占用 LLM 并发槽位
+            cache_key = None
+            full_result = None
+            if self.cache:
+                cache_key = self.cache.make_key(self.PROMPT_VERSION, labels_info, node.page_content)
+                full_result = await self.cache.get(cache_key)
+
+            # 2. 未命中才调用 LLM，解析成功的结果写回缓存
+            if full_result is None:
+                full_result = await self._call_llm(node, labels_info)
+                if full_result and self.cache:
+                    await self.cache.set(cache_key, full_result)
+
+            if full_result:
+                self._apply_result(node, full_result)
+        except Exception as e:
+            self.logger.error(f"节点处理异常: {e}")
+
+    async def _call_llm(self, node: Node, labels_info: str) -> Optional[Dict[str, Any]]:
         async with self.semaphore:
+            prompt = self.UNIFIED_PROMPT_TEMPLATE.format(
+                labels_info=labels_info,
+                content=node.page_content
+            )
+
+            # 只统计拿到并发槽位之后的调用耗时，排队时间不计入
             try:
-                prompt = self.UNIFIED_PROMPT_TEMPLATE.format(
-                    labels_info=labels_info,
-                    content=node.page_content
-                )
-            
-                response = await self.llm_client.get_llm().acomplete(prompt)
-                response_text = str(response.text) if hasattr(response, 'text') else str(response)
-                full_result = self._parse_json_response(response_text)
-                
-                if full_result:
-                    # 根据参数按需提取
-                    final_meta = {}
-                    final_meta["summary"] = full_result.get("summary", "")
-                    final_meta["keywords"] = full_result.get("keywords", [])
-                    final_meta["tags"] = full_result.get("tags", ["其他"])
-                    final_meta["facts"] = full_result.get("facts", ["其他"])
-
-                    # 提取 LLM 生成的元数据字段（publish_date/source/location/event_type）
-                    llm_metadata = full_result.get("metadata", {})
-                    if isinstance(llm_metadata, dict):
-                        final_meta["publish_date"] = llm_metadata.get("publish_date", "")
-                        final_meta["source"] = llm_metadata.get("source", "")
-                        final_meta["location"] = llm_metadata.get("location", "")
-                        final_meta["event_type"] = llm_metadata.get("event_type", "")
-
-                    # 合并到现有 metadata（保留原始时间字段如 insertDate 等）
-                    node.metadata.update(final_meta)
-            except Exception as e:
-                self.logger.error(f"节点处理异常: {e}")
+                with trace_step("enrich", "llm"):
+                    response = await self.llm_client.get_llm().acomplete(prompt)
+            except Exception:
+                LLM_REQUESTS.labels("error").inc()
+                raise
+            record_llm_usage(response)
+            response_text = str(response.text) if hasattr(response, 'text') else str(response)
+            result = self._parse_json_response(response_text)
+            LLM_REQUESTS.labels("ok" if result is not None else "unparsable").inc()
+            return result
+
+    def _apply_result(self, node: Node, full_result: Dict[str, Any]):
+        # 根据参数按需提取
+        final_meta = {}
+        final_meta["summary"] = full_result.get("summary", "")
+        final_meta["keywords"] = full_result.get("keywords", [])
+        final_meta["tags"] = full_result.get("tags", ["其他"])
+        final_meta["facts"] = full_result.get("facts", ["其他"])
+
+        # 提取 LLM 生成的元数据字段（publish_date/source/location/event_type）
+        llm_metadata = full_result.get("metadata", {})
+        if isinstance(llm_metadata, dict):
+            final_meta["publish_date"] = llm_metadata.get("publish_date", "")
+            final_meta["source"] = llm_metadata.get("source", "")
+            final_meta["location"] = llm_metadata.get("location", "")
+            final_meta["event_type"] = llm_metadata.get("event_type", "")
+
+        # 合并到现有 metadata（保留原始时间字段如 insertDate 等）
+        node.metadata.update(final_meta)
 
     def _parse_json_response(self, text: str) -> Optional[Dict[str, Any]]:
         try:
@@ -1,5 +1,6 @@
+import hashlib
 from abc import ABC, abstractmethod
-from typing import Dict, Any, List
+from typing import Dict, Any, List, Optional
 from constants import EnrichmentMethod
 
 class BaseEnrichmentStrategy(ABC):
@@ -43,4 +44,35 @@ class BaseEnrichmentStrategy(ABC):
 
     def failure_fallback(self) -> Any:
         """信息不足时的兜底返回"""
-        return ""
\ No newline at end of file
+        return ""
+
+class BaseEnrichmentCache(ABC):
+    """LLM 丰富化结果缓存：保存解析后的 full_result JSON，命中时跳过 LLM 调用"""
+
+    def __init__(self):
+        self.hits = 0
+        self.misses = 0
+
+    @staticmethod
+    def make_key(template_version: str, labels_info: str, content: str) -> str:
+        """按 (模板版本, 候选标签, 原文) 计算缓存 Key，任一变化都会使旧结果失效"""
+        raw = f"{template_version}\x00{labels_info}\x00{content}".encode("utf-8")
+        return hashlib.sha256(raw).hexdigest()
+
+    @abstractmethod
+    async def get(self, key: str) -> Optional[Dict[str, Any]]:
+        """读取缓存，未命中或已过期返回 None"""
+        pass
+
+    @abstractmethod
+    async def set(self, key: str, value: Dict[str, Any]):
+        """写入缓存，超出容量时由实现负责淘汰"""
+        pass
+
+    def stats(self) -> Dict[str, Any]:
+        total = self.hits + self.misses
+        return {
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_rate": self.hits / total if total else 0.0
+        }
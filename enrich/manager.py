@@ -1,35 +1,42 @@
 import asyncio
-from contextlib import closing
 import json
 import logging
-import os
-import time
-from typing import Dict, Any, List
+from typing import Dict, Any, List, Optional, Set
 
 from constants import EnrichmentMethod
-from database.interfaces import MessageQueueInterface
+from database.interfaces import AsyncMessageQueueInterface
 from .EnrichmentMaster import EnrichmentMaster
-from files.ContentLoaderFactory import ContentLoader
-from files.ContentSaverFactory import ContentSaver
+from .Deduplicator import NearDuplicateDetector
+from files.PayloadTransport import PayloadTransport
 from files.DocumentFormat import RAGTaskPayload
 from database.message import TaskMessage,QueueMessage
 from database.tagmanger import TagManager
+from metrics.tracing import stamp_message, trace_message, trace_step
 
 class EnrichmentManager:
     def __init__(
         self, 
-        consumer: MessageQueueInterface,  # 接收来自 Chunk 的消息
-        publisher:MessageQueueInterface, # 发送给 Index 的消息
+        consumer: AsyncMessageQueueInterface,  # 接收来自 Chunk 的消息
+        publisher: AsyncMessageQueueInterface, # 发送给 Index 的消息
         enrich_master:EnrichmentMaster, # 封装了 LLM 编排逻辑的 Master
         tag_manager:TagManager,
-        poll_interval: float = 5.0
+        batch_size: int = 1,
+        block_ms: int = 1000,
+        max_inflight: int = 1,
+        deduplicator: Optional[NearDuplicateDetector] = None,
+        transport: Optional[PayloadTransport] = None  # 分片载荷内联或落盘的策略
     ):
         self.logger = logging.getLogger(__name__)
         self.consumer = consumer
         self.publisher = publisher
         self.master = enrich_master
-        self.poll_interval = poll_interval
+        self.batch_size = batch_size
+        self.block_ms = block_ms
+        # 同时处理中的分片数上限；所有分片共享 master.semaphore 控制的 LLM 并发
+        self.max_inflight = max_inflight
+        self.deduplicator = deduplicator
         self.tag_manager = tag_manager
+        self.transport = transport or PayloadTransport()
         self.running = False
 
     async def start(self):
@@ -48,64 +55,96 @@ class EnrichmentManager:
             refresh_task.cancel()
 
     async def _main_loop(self):
-        """异步主循环：负责监听 MQ"""
-        while self.running:
-            raw_msg = self.consumer.consume()
-            if not raw_msg:
-                await asyncio.sleep(self.poll_interval)
-                continue
-            
+        """
+        异步主循环：负责监听 MQ。
+        最多保持 max_inflight 个分片同时处理，单个分片的长尾节点不会让 LLM 并发槽位闲置；
+        每条消息在自己的节点全部完成后独立发布与确认。
+        """
+        inflight: Set[asyncio.Task] = set()
+        try:
+            while self.running:
+                if len(inflight) >= self.max_inflight:
+                    _, inflight = await asyncio.wait(inflight, return_when=asyncio.FIRST_COMPLETED)
+                    continue
+
+                # 异步阻塞读：等待消息期间事件循环继续调度 LLM 调用与标签刷新
+                free_slots = self.max_inflight - len(inflight)
+                raw_msgs = await self.consumer.consume_batch(min(self.batch_size, free_slots), self.block_ms)
+                for raw_msg in raw_msgs:
+                    inflight.add(asyncio.create_task(self._handle_message(raw_msg)))
+                inflight = {t for t in inflight if not t.done()}
+        finally:
+            if inflight:
+                await asyncio.gather(*inflight, return_exceptions=True)
+
+    async def _handle_message(self, raw_msg: QueueMessage):
+        """处理单条消息，成功后立即确认"""
+        # 每条消息运行在独立的 Task 中，trace_id 与追踪记录互不干扰
+        with trace_message("enrich", raw_msg) as trace:
             try:
-                await self._process_task(raw_msg)
+                if await self._process_task(raw_msg):
+                    await self.consumer.ack(raw_msg.id)
             except Exception as e:
                 self.logger.error(f"处理任务过程中发生异常: {e}", exc_info=True)
+                trace.error = f"{type(e).__name__}: {e}"
+                # 失败消息由队列按投递次数退避重投，超过上限转入死信
+                await self.consumer.nack(raw_msg, trace.error, stage="enrich")
 
-    async def _process_task(self, raw_msg: QueueMessage):
+    async def _process_task(self, raw_msg: QueueMessage) -> bool:
         # 1. 消息解码 (TaskMessage 模式)
         task = TaskMessage.from_json(raw_msg.data)
         self.logger.info(f"开始丰富化处理: {task.file_path} (MessageID: {task.trace_id})")
 
-        # 2. 加载数据
-        stream = ContentLoader.load_content(task.file_path)
-        with closing(stream) as stream:
-                payload = RAGTaskPayload.model_validate_json(stream.getvalue())
+        # 2. 加载数据：内联载荷直接解码，否则从 file_path 读取（读写文件是同步 IO，放到线程中执行）
+        with trace_step("enrich", "load"):
+            payload = await asyncio.to_thread(self.transport.load, task)
 
         # 3. 提取待处理的方法和节点
         methods = payload.content.pipeline_instructions.enrichment_methods
         if EnrichmentMethod.NONE in methods or not methods:
             self.logger.info("无需丰富化，跳过执行")
-            self._finish_stage(task, payload)
-            return
+            await self._finish_stage(task, payload)
+            return True
 
         tag_list = self.tag_manager.get_all_tags()
 
         # 4. 调用 Master 进行批量/并发丰富化 (此处逻辑在 Master 中实现)
         # 注意：这里会修改 payload.content.nodes
-        await self.master.process_payload(payload, tag_list)
+        if self.deduplicator:
+            # 近似重复节点不调用 LLM，丰富化结束后复用规范节点的结果或直接剔除；
+            # 分词、MinHash 与 sqlite 读写放到线程中执行，避免阻塞其它在途分片
+            plan = await asyncio.to_thread(self.deduplicator.plan, payload.content.nodes, task.file_path)
+            await self.master.process_nodes(plan.to_enrich, tag_list)
+            dropped = {id(n) for n in await asyncio.to_thread(self.deduplicator.commit, plan)}
+            if plan.retry:
+                # 同一分片内的规范节点丰富化失败，它的重复节点没有结果可复制，单独调用 LLM
+                await self.master.process_nodes(plan.retry, tag_list)
+            if dropped:
+                payload.content.nodes = [n for n in payload.content.nodes if id(n) not in dropped]
+        else:
+            await self.master.process_payload(payload, tag_list)
 
         # 5. 状态转换：清空方法列表防止重复执行
         payload.content.pipeline_instructions.enrichment_methods = [EnrichmentMethod.NONE]
 
         # 6. 持久化并发送下一阶段消息
-        self._finish_stage(task, payload)
-        self.consumer.ack(raw_msg.id) 
+        await self._finish_stage(task, payload)
+        return True
 
-    def _finish_stage(self, task, payload:RAGTaskPayload):
-        base_path, ext = os.path.splitext(task.file_path)
-        output_path = f"{base_path}_enriched{ext}"
-        
-        ContentSaver.save_content(
-            content=payload.model_dump_json(ensure_ascii=False),
-            path=output_path,
-            metadata=payload.metadata
-        )
-
-        next_msg = TaskMessage(
-            file_path=output_path,
-            stage="enrichment_complete",
-            trace_id=task.trace_id
-        )
-        self.publisher.produce(next_msg.to_json())
+    async def _finish_stage(self, task, payload:RAGTaskPayload):
+        output_path = self.transport.artifact_path(task.file_path, "_enriched")
+
+        # 避免阻塞其它在途分片
+        with trace_step("enrich", "publish"):
+            next_msg = await asyncio.to_thread(
+                self.transport.publish,
+                payload,
+                path=output_path,
+                stage="enrichment_complete",
+                trace_id=task.trace_id
+            )
+            stamp_message(next_msg)
+            await self.publisher.produce(next_msg)
 
     def stop(self):
         self.running = False
\ No newline at end of file
@@ -0,0 +1,131 @@
+import gzip
+import os
+from abc import ABC, abstractmethod
+from typing import Dict, Type
+
+from files.DocumentFormat import RAGTaskPayload
+
+class ArtifactCodec(ABC):
+    """
+    阶段中间产物（RAGTaskPayload 文件）的编解码器。
+    写入时按配置选择格式，读取时按文件扩展名自动识别。
+    """
+    # 文件扩展名（可以是 .msgpack.zst 这样的复合扩展名）
+    extension: str = ""
+
+    @abstractmethod
+    def encode(self, payload: RAGTaskPayload) -> bytes:
+        pass
+
+    @abstractmethod
+    def decode(self, data: bytes) -> RAGTaskPayload:
+        pass
+
+class JsonCodec(ArtifactCodec):
+    """原有格式：UTF-8 JSON"""
+    extension = ".json"
+
+    def encode(self, payload: RAGTaskPayload) -> bytes:
+        return payload.model_dump_json(ensure_ascii=False).encode("utf-8")
+
+    def decode(self, data: bytes) -> RAGTaskPayload:
+        return RAGTaskPayload.model_validate_json(data)
+
+class GzipJsonCodec(ArtifactCodec):
+    """gzip 压缩的 JSON，仅依赖标准库"""
+    extension = ".json.gz"
+
+    def __init__(self, level: int = 6):
+        self.level = level
+
+    def encode(self, payload: RAGTaskPayload) -> bytes:
+        # mtime=0 保证相同内容得到相同字节
+        return gzip.compress(JsonCodec().encode(payload), compresslevel=self.level, mtime=0)
+
+    def decode(self, data: bytes) -> RAGTaskPayload:
+        return RAGTaskPayload.model_validate_json(gzip.decompress(data))
+
+class MsgpackCodec(ArtifactCodec):
+    """msgpack 二进制格式"""
+    extension = ".msgpack"
+
+    def __init__(self):
+        # 延迟导入：只在选用该格式时才需要 msgpack
+        import msgpack
+        self._msgpack = msgpack
+
+    def encode(self, payload: RAGTaskPayload) -> bytes:
+        return self._msgpack.packb(payload.model_dump(mode="json"), use_bin_type=True)
+
+    def decode(self, data: bytes) -> RAGTaskPayload:
+        return RAGTaskPayload.model_validate(self._msgpack.unpackb(data, raw=False))
+
+class ZstdMsgpackCodec(MsgpackCodec):
+    """zstd 压缩的 msgpack，体积与编解码速度的默认推荐组合"""
+    extension = ".msgpack.zst"
+
+    def __init__(self, level: int = 3):
+        super().__init__()
+        import zstandard
+        self._compressor = zstandard.ZstdCompressor(level=level)
+        self._decompressor = zstandard.ZstdDecompressor()
+
+    def encode(self, payload: RAGTaskPayload) -> bytes:
+        return self._compressor.compress(super().encode(payload))
+
+    def decode(self, data: bytes) -> RAGTaskPayload:
+        return super().decode(self._decompressor.decompress(data))
+
+class ArtifactCodecFactory:
+    """
+    编解码器工厂：按格式名创建写入用的编解码器，按扩展名识别读取用的编解码器。
+    """
+    _REGISTERED_CODECS: Dict[str, Type[ArtifactCodec]] = {
+        "json": JsonCodec,
+        "json.gz": GzipJsonCodec,
+        "msgpack": MsgpackCodec,
+        "msgpack.zst": ZstdMsgpackCodec,
+    }
+    _instances: Dict[str, ArtifactCodec] = {}
+
+    @classmethod
+    def get_codec(cls, name: str) -> ArtifactCodec:
+        """按格式名获取编解码器（实例缓存复用）"""
+        name = name.lower().lstrip(".")
+        codec = cls._instances.get(name)
+        if codec is None:
+            codec_class = cls._REGISTERED_CODECS.get(name)
+            if not codec_class:
+                raise ValueError(f"不支持的中间产物格式: {name}")
+            codec = codec_class()
+            cls._instances[name] = codec
+        return codec
+
+    @classmethod
+    def for_path(cls, path: str) -> ArtifactCodec:
+        """按文件扩展名识别编解码器，无法识别时按 JSON 处理"""
+        ext = cls._match_extension(path)
+        return cls.get_codec(ext) if ext else cls.get_codec("json")
+
+    @classmethod
+    def strip_extension(cls, path: str) -> str:
+        """去掉中间产物扩展名（支持 .msgpack.zst 等复合扩展名），其它文件按 splitext 处理"""
+        ext = cls._match_extension(path)
+        if ext:
+            return path[: -(len(ext) + 1)]
+        return os.path.splitext(path)[0]
+
+    @classmethod
+    def _match_extension(cls, path: str):
+        lower = path.lower()
+        # 先匹配最长的复合扩展名
+        for name in sorted(cls._REGISTERED_CODECS, key=len, reverse=True):
+            if lower.endswith("." + name):
+                return name
+        return None
+
+    @classmethod
+    def register_codec(cls, name: str, codec_class: Type[ArtifactCodec]):
+        """允许动态注册新的格式（扩展性支持）"""
+        cls._REGISTERED_CODECS[name.lower().lstrip(".")] = codec_class
+        cls._instances.pop(name.lower().lstrip("."), None)
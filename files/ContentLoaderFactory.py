@@ -1,10 +1,16 @@
 from io import BytesIO
+from tempfile import SpooledTemporaryFile
+from typing import BinaryIO
 import logging
 import os
 from typing import List, Dict, Any, Optional
 
+from .ObjectStore import ObjectPrefetcher, S3ClientPool, is_missing_key, split_s3_path
+
 class ContentLoader:
     logger = logging.getLogger(__name__)
+    # 远程对象的后台预取，由 prefetch 提交、load_content 取用
+    prefetcher = ObjectPrefetcher()
     
     @staticmethod
     def load_content(path: str, storage_type: Optional[str] = None) -> BytesIO:
@@ -17,12 +23,48 @@ class ContentLoader:
         
         # 2. 路由到具体的私有处理方法
         if storage_type == "s3":
+            prefetched = ContentLoader.prefetcher.take(path)
+            if prefetched is not None:
+                return prefetched
             return ContentLoader._load_from_s3(path)
         elif storage_type == "azure":
             return ContentLoader._load_from_azure(path)
         else:
             return ContentLoader._load_from_local(path)
 
+    @staticmethod
+    def open_stream(path: str, storage_type: Optional[str] = None, seekable: bool = False) -> BinaryIO:
+        """
+        以流的方式打开内容，供流式解析器使用，不整体读入内存。调用方负责关闭。
+        - 本地文件直接返回文件句柄
+        - S3 返回边下载边读取的响应体；seekable=True 时（如 xlsx 需要随机访问）
+          并发分段下载到临时文件，超过 spool_max_size 才落磁盘
+        - 其它存储暂时回退为 load_content
+        """
+        if not storage_type:
+            storage_type = ContentLoader._guess_storage_type(path)
+
+        if storage_type == "local":
+            if not os.path.exists(path):
+                raise FileNotFoundError(f"Local file not found: {path}")
+            return open(path, "rb")
+        if storage_type == "s3":
+            return ContentLoader._open_s3_stream(path, seekable)
+        return ContentLoader.load_content(path, storage_type)
+
+    @staticmethod
+    def prefetch(path: str, storage_type: Optional[str] = None):
+        """
+        在后台线程提前下载远程对象，随后的 load_content(path) 直接取用结果；本地路径无需预取
+        """
+        if ContentLoader.can_prefetch(path, storage_type):
+            ContentLoader.prefetcher.submit(path, ContentLoader._load_from_s3)
+
+    @staticmethod
+    def can_prefetch(path: str, storage_type: Optional[str] = None) -> bool:
+        """目前只有 S3 对象支持后台预取"""
+        return (storage_type or ContentLoader._guess_storage_type(path)) == "s3"
+
     @staticmethod
     def _guess_storage_type(path: str) -> str:
         if path.startswith("s3://"): return "s3"
@@ -39,9 +81,45 @@ class ContentLoader:
 
     @staticmethod
     def _load_from_s3(path: str) -> BytesIO:
-        # 逻辑：使用 boto3 下载并 json.loads
-        ContentLoader.logger.info(f"DEBUG: Downloading from S3: {path}")
-        return BytesIO(b"dummy s3 data")
+        """整体下载到内存；大对象按 multipart_chunksize 并发分段下载"""
+        buffer = BytesIO()
+        ContentLoader._download_s3(path, buffer)
+        buffer.seek(0)
+        return buffer
+
+    @staticmethod
+    def _open_s3_stream(path: str, seekable: bool) -> BinaryIO:
+        if seekable:
+            spool = SpooledTemporaryFile(max_size=S3ClientPool.option("spool_max_size"))
+            try:
+                ContentLoader._download_s3(path, spool)
+            except Exception:
+                spool.close()
+                raise
+            spool.seek(0)
+            return spool
+
+        bucket, key = split_s3_path(path)
+        try:
+            response = S3ClientPool.get_client().get_object(Bucket=bucket, Key=key)
+        except Exception as e:
+            if is_missing_key(e):
+                raise FileNotFoundError(f"S3 object not found: {path}") from e
+            raise
+        return response["Body"]
+
+    @staticmethod
+    def _download_s3(path: str, fileobj: BinaryIO):
+        bucket, key = split_s3_path(path)
+        ContentLoader.logger.debug(f"从 S3 下载: {path}")
+        try:
+            S3ClientPool.get_client().download_fileobj(
+                bucket, key, fileobj, Config=S3ClientPool.transfer_config()
+            )
+        except Exception as e:
+            if is_missing_key(e):
+                raise FileNotFoundError(f"S3 object not found: {path}") from e
+            raise
 
     @staticmethod
     def _load_from_azure(path: str) -> BytesIO:
@@ -2,7 +2,9 @@ import json
 import os
 import logging
 from io import BytesIO
-from typing import Any, Optional, Dict
+from typing import Any, Optional, Dict, Union
+
+from .ObjectStore import S3ClientPool, split_s3_path
 
 class ContentSaver:
     """
@@ -12,9 +14,10 @@ class ContentSaver:
     logger = logging.getLogger(__name__)
 
     @staticmethod
-    def save_content(content: str, path: str, storage_type: Optional[str] = None, metadata: Optional[Dict] = None) -> str:
+    def save_content(content: Union[str, bytes], path: str, storage_type: Optional[str] = None, metadata: Optional[Dict] = None) -> str:
         """
         统一入口：将清洗后的文本和元数据封装并存储
+        content 为 bytes 时按二进制写入（压缩/二进制格式的中间产物）
         """
         # 1. 自动判定存储介质
         if not storage_type:
@@ -45,26 +48,34 @@ class ContentSaver:
     # --- 具体的私有存储方法 ---
 
     @staticmethod
-    def _save_to_local(path: str, data: str) -> str:
+    def _save_to_local(path: str, data: Union[str, bytes]) -> str:
         """保存到本地磁盘"""
         # 确保目录存在
         os.makedirs(os.path.dirname(path), exist_ok=True)
         
-        with open(path, "w", encoding="utf-8") as f:
-            f.write(data)
+        if isinstance(data, bytes):
+            with open(path, "wb") as f:
+                f.write(data)
+        else:
+            with open(path, "w", encoding="utf-8") as f:
+                f.write(data)
         
         ContentSaver.logger.info(f"本地文件已成功写入: {path}")
         return path
 
     @staticmethod
-    def _save_to_s3(path: str, data: str) -> str:
-        """保存到 AWS S3 (示例接口)"""
-        # 逻辑：s3_client.put_object(Body=json.dumps(data), ...)
-        ContentSaver.logger.info(f"DEBUG: Uploading JSON to S3: {path}")
+    def _save_to_s3(path: str, data: Union[str, bytes]) -> str:
+        """保存到 S3；超过 multipart_threshold 的对象自动分片并发上传"""
+        bucket, key = split_s3_path(path)
+        body = data.encode("utf-8") if isinstance(data, str) else data
+        S3ClientPool.get_client().upload_fileobj(
+            BytesIO(body), bucket, key, Config=S3ClientPool.transfer_config()
+        )
+        ContentSaver.logger.info(f"S3 对象已成功写入: {path} ({len(body)} bytes)")
         return path
 
     @staticmethod
-    def _save_to_azure(path: str, data: str) -> str:
+    def _save_to_azure(path: str, data: Union[str, bytes]) -> str:
         """保存到 Azure Blob (示例接口)"""
         # 逻辑：blob_client.upload_blob(json.dumps(data))
         ContentSaver.logger.info(f"DEBUG: Uploading JSON to Azure: {path}")
@@ -1,21 +1,42 @@
+import datetime
+import math
 import pandas as pd
 from io import BytesIO
-from typing import Iterable, Dict, Any
+from typing import Any, Dict, Iterable, List, Optional
+from openpyxl import load_workbook
+from files.interfaces import BaseParser
 
-class ExcelParser:
+DATETIME_FORMAT = '%Y-%m-%d %H:%M:%S'
+
+class ExcelParser(BaseParser):
     """
     Excel 解析器：将每一行视为一个独立的语义单元
+    :param streaming: True 时使用 openpyxl 只读模式逐行读取，内存占用与表格大小无关；
+                      False 时使用 pandas 一次性读入整张表
+    :param usecols: 只读取这些列（按表头名称），None 表示全部列
     """
+    # xlsx 是 zip 容器，读取中央目录需要随机访问
+    requires_seekable = True
+
+    def __init__(self, streaming: bool = False, usecols: Optional[List[str]] = None):
+        self.streaming = streaming
+        self.usecols = set(usecols) if usecols else None
+
     def parse(self, stream: BytesIO) -> Iterable[Dict[str, Any]]:
-        # 1. 读取 Excel
-        # 注意：如果 Excel 很大，可以使用 usecols 参数只读取需要的列
-        df = pd.read_excel(stream)
+        if self.streaming:
+            return self._parse_streaming(stream)
+        return self._parse_dataframe(stream)
+
+    def _parse_dataframe(self, stream: BytesIO) -> Iterable[Dict[str, Any]]:
+        # 1. 读取 Excel，只保留需要的列
+        usecols = (lambda c: c in self.usecols) if self.usecols else None
+        df = pd.read_excel(stream, usecols=usecols)
         
         # 2. 核心修改：处理不可序列化的类型
         # 处理日期时间类型：转换为 ISO 格式的字符串
         for col in df.select_dtypes(include=['datetime', 'datetimetz']).columns:
             # 使用 isoformat() 或者 strftime，推荐 isoformat 保持标准
-            df[col] = df[col].dt.strftime('%Y-%m-%d %H:%M:%S')
+            df[col] = df[col].dt.strftime(DATETIME_FORMAT)
     
         # 3. 处理空值
         # 注意：fillna("") 要在日期转换后执行，否则 NaN 会干扰日期处理
@@ -24,4 +45,40 @@ class ExcelParser:
         # 4. 将 DataFrame 转换为原生 Python 列表字典
         # orient="records" 生成 List[Dict]
         for row in df.to_dict(orient="records"):
-            yield row # 逐行产出数据
\ No newline at end of file
+            yield row # 逐行产出数据
+
+    def _parse_streaming(self, stream: BytesIO) -> Iterable[Dict[str, Any]]:
+        stream.seek(0)
+        workbook = load_workbook(stream, read_only=True, data_only=True)
+        try:
+            rows = workbook.active.iter_rows(values_only=True)
+            header = next(rows, None)
+            if header is None:
+                return
+
+            # 表头为空的列与 usecols 之外的列都不读取
+            columns = [
+                (idx, str(name)) for idx, name in enumerate(header)
+                if name is not None and (self.usecols is None or str(name) in self.usecols)
+            ]
+            for values in rows:
+                # 与 pandas 一致：跳过整行为空的行
+                if all(v is None for v in values):
+                    continue
+                yield {
+                    name: self._normalize(values[idx] if idx < len(values) else None)
+                    for idx, name in columns
+                }
+        finally:
+            workbook.close()
+
+    @staticmethod
+    def _normalize(value: Any) -> Any:
+        """逐个单元格做与 pandas 模式相同的日期格式化与空值填充"""
+        if value is None:
+            return ""
+        if isinstance(value, float) and math.isnan(value):
+            return ""
+        if isinstance(value, (datetime.datetime, datetime.date)):
+            return value.strftime(DATETIME_FORMAT)
+        return value
@@ -2,7 +2,7 @@ from io import BytesIO
 import io
 import json
 import logging
-from typing import Any, Dict, List
+from typing import Any, Dict, Iterator, List
 from files.interfaces import BaseParser
 
 
@@ -10,14 +10,25 @@ class JsonParser(BaseParser):
     """
     针对 JSON 文件的解析器。
     它将字节流转化为字典，并提取核心文本内容。
+    streaming=True 时顶层数组按元素增量解析、逐个产出，内存只与单个元素大小相关；
+    顶层不是数组时整体解析后作为唯一元素产出。
     """
+
+    # 每次从流中读取的字符数
+    READ_SIZE = 64 * 1024
+    _WHITESPACE = " \t\n\r"
+    # 数组元素之后合法的下一个字符
+    _DELIMITERS = ",]" + _WHITESPACE
     
-    def __init__(self):
+    def __init__(self, streaming: bool = False):
         self.logger = logging.getLogger(__name__)
+        self.streaming = streaming
 
     def parse(self, stream: BytesIO, encoding: str = 'utf-8') -> List[Dict[str, Any]]:
+        if self.streaming:
+            return self._parse_streaming(stream, encoding)
         try:
-            stream.seek(0)
+            self._rewind(stream)
             text_reader = io.TextIOWrapper(stream, encoding=encoding)
             data = json.load(text_reader)
             text_reader.detach()
@@ -27,4 +38,103 @@ class JsonParser(BaseParser):
             raise ValueError(f"Failed to parse JSON stream: {e}")
         except UnicodeDecodeError as e:
             logging.error(f"Encoding error: {e}")
-            raise ValueError(f"Failed to decode stream using {encoding}")
\ No newline at end of file
+            raise ValueError(f"Failed to decode stream using {encoding}")
+
+    @staticmethod
+    def _rewind(stream: BytesIO):
+        # 远程对象的响应体只能顺序读取，从头开始读即可
+        if stream.seekable():
+            stream.seek(0)
+
+    def _parse_streaming(self, stream: BytesIO, encoding: str) -> Iterator[Any]:
+        self._rewind(stream)
+        # utf-8-sig 同时兼容带 BOM 的文件
+        text_reader = io.TextIOWrapper(stream, encoding='utf-8-sig' if encoding.lower() in ('utf-8', 'utf8') else encoding)
+        try:
+            yield from self._iter_elements(text_reader)
+        except json.JSONDecodeError as e:
+            logging.error(f"Invalid JSON format: {e}")
+            raise ValueError(f"Failed to parse JSON stream: {e}")
+        except UnicodeDecodeError as e:
+            logging.error(f"Encoding error: {e}")
+            raise ValueError(f"Failed to decode stream using {encoding}")
+        finally:
+            # 与 json.load 分支一致：不随 reader 关闭底层流，由调用方负责
+            text_reader.detach()
+
+    def _iter_elements(self, reader: io.TextIOBase) -> Iterator[Any]:
+        decoder = json.JSONDecoder()
+        buf = ""
+        pos = 0
+        eof = False
+
+        def fill(min_size: int) -> bool:
+            """丢弃已消费部分并读取更多数据，返回是否读到了新内容"""
+            nonlocal buf, pos, eof
+            if eof:
+                return False
+            chunk = reader.read(max(self.READ_SIZE, min_size))
+            if not chunk:
+                eof = True
+                return False
+            buf = buf[pos:] + chunk
+            pos = 0
+            return True
+
+        def skip_whitespace() -> bool:
+            """跳过空白，返回缓冲区中是否还有字符"""
+            nonlocal pos
+            while True:
+                while pos < len(buf) and buf[pos] in self._WHITESPACE:
+                    pos += 1
+                if pos < len(buf) or not fill(0):
+                    return pos < len(buf)
+
+        if not skip_whitespace():
+            return
+
+        if buf[pos] != "[":
+            # 顶层不是数组：无法增量处理，读完后整体解析
+            while fill(0):
+                pass
+            yield decoder.decode(buf[pos:])
+            return
+        pos += 1
+
+        expect_value = True
+        after_comma = False
+        while True:
+            if not skip_whitespace():
+                raise json.JSONDecodeError("Unterminated array", buf, pos)
+
+            ch = buf[pos]
+            if ch == "]":
+                if after_comma:
+                    raise json.JSONDecodeError("Expecting value", buf, pos)
+                return
+            if ch == ",":
+                if expect_value:
+                    raise json.JSONDecodeError("Expecting value", buf, pos)
+                expect_value = after_comma = True
+                pos += 1
+                continue
+            if not expect_value:
+                raise json.JSONDecodeError("Expecting ',' delimiter", buf, pos)
+
+            # 元素可能跨越缓冲区边界：解码失败，或元素后面不是分隔符（如数字在 "12e5" 的 e 处被截断，
+            # raw_decode 只解出 12）时补读后重试；每次补读量翻倍，超大元素的重试次数为对数级
+            need = self.READ_SIZE
+            while True:
+                try:
+                    value, end = decoder.raw_decode(buf, pos)
+                    if eof or (end < len(buf) and buf[end] in self._DELIMITERS):
+                        break
+                except json.JSONDecodeError:
+                    if eof:
+                        raise
+                fill(need)
+                need *= 2
+
+            yield value
+            pos = end
+            expect_value = after_comma = False
@@ -0,0 +1,127 @@
+import logging
+import threading
+from concurrent.futures import Future, ThreadPoolExecutor
+from io import BytesIO
+from typing import Any, Dict, Optional, Tuple
+
+class S3ClientPool:
+    """
+    进程内共享的 S3 客户端：boto3 client 线程安全，所有 Loader/Saver 调用复用同一个实例及其连接池。
+    endpoint_url 指向 MinIO / moto server 等兼容服务时即可脱离 AWS 运行。
+    """
+    logger = logging.getLogger(__name__)
+
+    _options: Dict[str, Any] = {
+        "endpoint_url": None,
+        "region_name": None,
+        "max_pool_connections": 32,
+        # 超过该大小的对象使用分片上传 / 并发分段下载
+        "multipart_threshold": 8 * 1024 * 1024,
+        "multipart_chunksize": 8 * 1024 * 1024,
+        "max_concurrency": 8,
+        # 需要随机访问的流（如 xlsx）先落到临时文件，超过该大小才写磁盘
+        "spool_max_size": 64 * 1024 * 1024,
+    }
+    _client = None
+    _transfer_config = None
+    _lock = threading.Lock()
+
+    @classmethod
+    def configure(cls, **options):
+        """覆盖默认参数，下次 get_client 时按新参数重建客户端"""
+        unknown = set(options) - set(cls._options)
+        if unknown:
+            raise ValueError(f"未知的 S3 配置项: {sorted(unknown)}")
+        with cls._lock:
+            cls._options = {**cls._options, **options}
+            cls._client = None
+            cls._transfer_config = None
+
+    @classmethod
+    def option(cls, name: str) -> Any:
+        return cls._options[name]
+
+    @classmethod
+    def get_client(cls):
+        if cls._client is None:
+            with cls._lock:
+                if cls._client is None:
+                    # 延迟导入：只有访问 s3:// 路径时才需要 boto3
+                    import boto3
+                    from botocore.config import Config
+
+                    cls._client = boto3.session.Session().client(
+                        "s3",
+                        endpoint_url=cls._options["endpoint_url"],
+                        region_name=cls._options["region_name"],
+                        config=Config(
+                            max_pool_connections=cls._options["max_pool_connections"],
+                            retries={"max_attempts": 5, "mode": "adaptive"}
+                        )
+                    )
+                    cls.logger.info(f"S3 客户端已创建 (endpoint={cls._options['endpoint_url'] or 'aws'})")
+        return cls._client
+
+    @classmethod
+    def transfer_config(cls):
+        if cls._transfer_config is None:
+            from boto3.s3.transfer import TransferConfig
+
+            cls._transfer_config = TransferConfig(
+                multipart_threshold=cls._options["multipart_threshold"],
+                multipart_chunksize=cls._options["multipart_chunksize"],
+                max_concurrency=cls._options["max_concurrency"],
+                use_threads=cls._options["max_concurrency"] > 1
+            )
+        return cls._transfer_config
+
+def split_s3_path(path: str) -> Tuple[str, str]:
+    """s3://bucket/a/b.json -> ("bucket", "a/b.json")"""
+    if not path.startswith("s3://"):
+        raise ValueError(f"不是 S3 路径: {path}")
+    bucket, _, key = path[len("s3://"):].partition("/")
+    if not bucket or not key:
+        raise ValueError(f"S3 路径缺少 bucket 或 key: {path}")
+    return bucket, key
+
+def is_missing_key(error: Exception) -> bool:
+    """判断 botocore ClientError 是否为对象不存在"""
+    code = getattr(error, "response", {}).get("Error", {}).get("Code")
+    return code in ("404", "NoSuchKey", "NotFound")
+
+class ObjectPrefetcher:
+    """
+    远程对象预取：处理当前消息时在后台线程下载下一条消息引用的对象，
+    load 时命中则直接取结果，把网络等待与本条消息的计算重叠。
+    只保留最近 max_pending 个预取结果，未被取用的条目按提交顺序淘汰。
+    """
+    def __init__(self, max_workers: int = 4, max_pending: int = 8):
+        self.max_pending = max_pending
+        self._executor: Optional[ThreadPoolExecutor] = None
+        self._max_workers = max_workers
+        self._pending: Dict[str, Future] = {}
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+    def submit(self, path: str, loader) -> None:
+        with self._lock:
+            if path in self._pending:
+                return
+            if self._executor is None:
+                self._executor = ThreadPoolExecutor(max_workers=self._max_workers, thread_name_prefix="prefetch")
+            while len(self._pending) >= self.max_pending:
+                oldest = next(iter(self._pending))
+                self._pending.pop(oldest).cancel()
+            self._pending[path] = self._executor.submit(loader, path)
+
+    def take(self, path: str) -> Optional[BytesIO]:
+        """取出预取结果；未预取时返回 None，预取失败时抛出原异常"""
+        with self._lock:
+            future = self._pending.pop(path, None)
+        if future is None or future.cancelled():
+            self.misses += 1
+            return None
+        result = future.result()
+        self.hits += 1
+        return result
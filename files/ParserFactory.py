@@ -21,10 +21,11 @@ class ParserFactory:
     }
 
     @classmethod
-    def get_parser(cls, filename: str) -> BaseParser:
+    def get_parser(cls, filename: str, **options) -> BaseParser:
         """
         获取解析器实例
         :param filename: 文件全名或路径
+        :param options: 透传给解析器构造函数的参数（由 Cleaner.parser_options 提供）
         :return: 对应的解析器实例
         """
         # 1. 提取后缀并转化为小写（例如: '.PDF' -> '.pdf'）
@@ -41,7 +42,7 @@ class ParserFactory:
             raise NotImplementedError(f"目前尚未支持 {ext} 格式的解析器。")
             
         # 3. 实例化并返回
-        return parser_class()
+        return parser_class(**options)
 
     @classmethod
     def register_parser(cls, extension: str, parser_class: Type[BaseParser]):
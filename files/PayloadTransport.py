@@ -0,0 +1,113 @@
+import base64
+import logging
+import zlib
+from contextlib import closing
+from typing import Any, Optional
+
+from database.message import TaskMessage
+from files.ContentLoaderFactory import ContentLoader
+from files.ContentSaverFactory import ContentSaver
+from files.ArtifactCodec import ArtifactCodecFactory
+from files.DocumentFormat import RAGTaskPayload
+
+class PayloadTransport:
+    """
+    阶段间载荷传递（claim-check 模式）：
+    编码后不超过 inline_max_bytes 的载荷直接内联在 TaskMessage 中，省去一次写盘与读盘；
+    更大的载荷照旧写入 file_path，消息只携带路径。读取端对两种形式透明。
+    :param inline_max_bytes: 内联上限（字节），0 表示始终写文件
+    :param compress: 是否对内联载荷做 zlib 压缩（压缩后更小时才使用）
+    :param in_memory: 单进程融合模式：载荷对象直接挂在消息上经进程内队列传递，完全跳过序列化
+    :param artifact_format: 落盘文件格式 json / json.gz / msgpack / msgpack.zst；读取时按扩展名识别
+    """
+
+    ENCODING_JSON = "json"
+    ENCODING_ZLIB = "zlib+base64"
+
+    def __init__(self, inline_max_bytes: int = 0, compress: bool = False, compress_level: int = 6,
+                 in_memory: bool = False, artifact_format: str = "json"):
+        self.logger = logging.getLogger(__name__)
+        self.codec = ArtifactCodecFactory.get_codec(artifact_format)
+        self.in_memory = in_memory
+        self.inline_max_bytes = inline_max_bytes
+        self.compress = compress
+        self.compress_level = compress_level
+
+    def publish(self, payload: RAGTaskPayload, path: str, stage: str, trace_id: Optional[str]) -> TaskMessage:
+        """按大小决定内联或落盘，返回待发送的 TaskMessage"""
+        if self.in_memory:
+            message = TaskMessage(file_path=path, stage=stage, trace_id=trace_id)
+            message._payload = payload
+            return message
+
+        if self.inline_max_bytes > 0:
+            inline, encoding = self._encode(payload.model_dump_json(ensure_ascii=False))
+            if inline is not None:
+                self.logger.debug(f"载荷内联传递: {path} ({len(inline)} bytes, {encoding})")
+                return TaskMessage(file_path=path, stage=stage, trace_id=trace_id,
+                                   payload=inline, payload_encoding=encoding)
+
+        ContentSaver.save_content(content=self.codec.encode(payload), path=path, metadata=payload.metadata)
+        return TaskMessage(file_path=path, stage=stage, trace_id=trace_id)
+
+    def artifact_path(self, source_path: str, suffix: str) -> str:
+        """
+        由上游文件路径派生本阶段产物路径，例如 a_part0.json.gz + _chunked -> a_part0_chunked.json.gz
+        """
+        return f"{ArtifactCodecFactory.strip_extension(source_path)}{suffix}{self.codec.extension}"
+
+    def prefetch(self, data: Any):
+        """
+        后台预取消息引用的远程载荷文件，随后 load 同一条消息时直接取用；
+        内联或进程内载荷无需预取，消息无法解析时忽略（由正式处理时报错）
+        """
+        path = self._file_path(data)
+        if path:
+            ContentLoader.prefetch(path)
+
+    def prefetchable(self, data: Any) -> bool:
+        """消息的载荷需要从远程存储下载、且支持后台预取时返回 True"""
+        path = self._file_path(data)
+        return bool(path) and ContentLoader.can_prefetch(path)
+
+    @staticmethod
+    def _file_path(data: Any) -> Optional[str]:
+        """载荷通过 file_path 传递时返回该路径；内联、进程内载荷或无法解析的消息返回 None"""
+        try:
+            task = TaskMessage.from_json(data)
+        except Exception:
+            return None
+        if task._payload is None and task.payload is None:
+            return task.file_path
+        return None
+
+    def load(self, task: TaskMessage) -> RAGTaskPayload:
+        """从进程内对象、内联载荷或 file_path 还原 RAGTaskPayload"""
+        if task._payload is not None:
+            return task._payload
+        if task.payload is not None:
+            return RAGTaskPayload.model_validate_json(self._decode(task.payload, task.payload_encoding))
+
+        with closing(ContentLoader.load_content(task.file_path)) as stream:
+            return ArtifactCodecFactory.for_path(task.file_path).decode(stream.getvalue())
+
+    def _encode(self, content: str):
+        """返回 (内联字符串, 编码)；超过上限时返回 (None, None)"""
+        raw = content.encode("utf-8")
+        inline, encoding = content, self.ENCODING_JSON
+        size = len(raw)
+        if self.compress:
+            packed = base64.b64encode(zlib.compress(raw, self.compress_level)).decode("ascii")
+            if len(packed) < size:
+                inline, encoding, size = packed, self.ENCODING_ZLIB, len(packed)
+
+        if size > self.inline_max_bytes:
+            return None, None
+        return inline, encoding
+
+    def _decode(self, data: str, encoding: Optional[str]) -> str:
+        if encoding in (None, self.ENCODING_JSON):
+            return data
+        if encoding == self.ENCODING_ZLIB:
+            return zlib.decompress(base64.b64decode(data)).decode("utf-8")
+        raise ValueError(f"不支持的载荷编码: {encoding}")
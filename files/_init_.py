@@ -2,12 +2,16 @@ from .ContentLoaderFactory import ContentLoader
 from .ContentSaverFactory import ContentSaver
 from .interfaces import BaseParser
 from .JsonFileParser import JsonParser
+from .ObjectStore import S3ClientPool
 from .ParserFactory import ParserFactory
+from .PayloadTransport import PayloadTransport
 
 __all__ = [
     "ContentLoader",
     "ContentSaver",
     "BaseParser",
     "JsonParser",
-    "ParserFactory"
+    "S3ClientPool",
+    "ParserFactory",
+    "PayloadTransport"
 ]
\ No newline at end of file
@@ -5,6 +5,9 @@ from typing import Any
 # --- 接口定义 ---
 class BaseParser(ABC):
     """所有解析器的基类"""
+    # 为 True 时解析需要随机访问（如 zip 格式的 xlsx），远程内容会先下载到可 seek 的临时文件
+    requires_seekable: bool = False
+
     @abstractmethod
     def parse(self, stream: BytesIO) -> Any:
         pass
\ No newline at end of file
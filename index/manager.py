@@ -1,118 +1,144 @@
-from contextlib import closing
 import hashlib
 import logging
-import time
-from typing import List, Dict, Any, Optional
-import uuid
-from files.ContentLoaderFactory import ContentLoader
+from typing import List, Dict, Any, Optional, Set
 from database.interfaces import MessageQueueInterface, BaseStore, BaseStatusRegistry
+from embedding.interfaces import EmbeddingService
 from database.message import TaskMessage,QueueMessage
-from files.ParserFactory import ParserFactory
+from files.DocumentFormat import RAGTaskPayload
+from files.PayloadTransport import PayloadTransport
 from logfilter.logging_context import trace_id_var
+from metrics.tracing import trace_message, trace_step
 from llama_index.core.schema import TextNode
 
 class IngestionManager:
     def __init__(
         self, 
         mq: MessageQueueInterface,
-        embed_model: Any,
+        embed_service: EmbeddingService,
         vector_store: Optional[BaseStore] = None, 
         registry: Optional[BaseStatusRegistry] = None,
-        strict_consistency: bool = True
+        strict_consistency: bool = True,
+        embed_batch_size: int = 32,
+        batch_size: int = 1,
+        block_ms: int = 1000,
+        transport: Optional[PayloadTransport] = None  # 读取内联或落盘的分片载荷
     ):
         self.logger = logging.getLogger(__name__)
         self.v_store = vector_store
         self.registry = registry
         self.strict_consistency = strict_consistency
         self.mq = mq
-        self.embed_model = embed_model
-        
+        self.embed_service = embed_service
+        self.embed_batch_size = embed_batch_size
+        self.batch_size = batch_size
+        self.block_ms = block_ms
+        self.transport = transport or PayloadTransport()
+        self.running = False
+        # 处理本批最后一条消息时预读的下一批，下一轮循环直接使用
+        self._read_ahead: List[QueueMessage] = []
 
     def start_listening(self):
+        self.running = True
         self.logger.info("IngestionManager 正在运行...")
         
         try:
-            while True:
-                raw_msg = self.mq.consume()
-                if raw_msg:
-                    self._handle_task(raw_msg)
+            # 停止后仍处理完已预读的批次，内存队列中的消息不会因此丢失
+            while self.running or self._read_ahead:
+                if self._read_ahead:
+                    raw_msgs, self._read_ahead = self._read_ahead, []
                 else:
-                    time.sleep(1) # 无消息时避免占用过多 CPU
+                    # 队列为空时 consume_batch 在服务端阻塞 block_ms，无需额外 sleep
+                    raw_msgs = self.mq.consume_batch(self.batch_size, self.block_ms)
+                if raw_msgs:
+                    acked_ids = []
+                    for i, message in enumerate(raw_msgs):
+                        # 入库当前消息时，后台预取下一条消息引用的远程载荷；
+                        # 本批最后一条的载荷需要远程下载时，不阻塞地预读下一批，预取跨越两次拉取
+                        if i + 1 < len(raw_msgs):
+                            self.transport.prefetch(raw_msgs[i + 1].data)
+                        elif self.running and self.transport.prefetchable(message.data):
+                            self._read_ahead = self.mq.consume_batch(self.batch_size, 0)
+                            if self._read_ahead:
+                                self.transport.prefetch(self._read_ahead[0].data)
+                        # 入库是最后一个阶段：成功时记录源头到入库的端到端耗时
+                        with trace_message("index", message, final=True) as trace:
+                            trace.error = self._handle_task(message)
+                            if trace.error is None:
+                                acked_ids.append(message.id)
+                            else:
+                                # 失败消息由队列按投递次数退避重投，超过上限转入死信
+                                self.mq.nack(message, trace.error, stage="index")
+                    self.mq.ack_batch(acked_ids)
         except KeyboardInterrupt:
             self.mq.close()
 
-    def _handle_task(self, raw_message: QueueMessage):
+    def stop(self):
+        """停止监听；当前批次处理完后 start_listening 返回"""
+        self.running = False
+        self.logger.info("正在停止 IngestionManager...")
+
+    def _handle_task(self, raw_message: QueueMessage) -> Optional[str]:
+        """处理单个入库任务，返回 None 表示可以确认该消息，失败时返回错误信息"""
         try:
             # 1. 使用 Schema 自动验证并解析消息内容
             task = TaskMessage.from_json(raw_message.data)
             self.logger.info(f"收到合法任务: {task.file_path}")
 
-            # 2. 从消息指定的路径读取真实的内容文件,并转换为chunks
-            raw_content = ContentLoader.load_content(task.file_path)
-            with closing(raw_content) as stream:
-                # 拿到流后，交给 Factory 和 Parser 
-                parser = ParserFactory.get_parser(task.file_path)
-                raw_data = parser.parse(stream)
+            # 2. 读取内联载荷或消息指定路径的内容文件
+            with trace_step("index", "load"):
+                payload = self.transport.load(task)
+            self.logger.info("loaded %d chunks", len(payload.content.nodes))
 
-            self.logger.info("loaded %d chunks", len(raw_data))
+            # 3. 续跑：同一内容版本已整体入库的文件直接确认，不再计算向量；
+            # 同名文件重新上传且内容变化时 file_hash 不同，按新版本重新入库
+            file_hash = self._content_hash(payload)
+            if self.registry and self.registry.is_file_processed(task.file_path, file_hash):
+                self.logger.info(f"File {task.file_path} already fully processed.")
+                return None
+            processed_chunk_ids = self.registry.get_processed_chunks(task.file_path, file_hash) if self.registry else set()
 
-            nodes = self._build_nodes(raw_data, task)
+            nodes = self._build_nodes(payload, task, skip_ids=processed_chunk_ids)
             self.logger.info("built %d nodes", len(nodes))
 
-            # 3. 将数据插入数据库中
-            success = self._process_file_batches(
-                file_name=task.file_path,
-                chunks=nodes
-            )
-
-            if success:
-                self.logger.info(f"任务完成: {task.file_path}")
-                self.mq.ack(raw_message.id) 
+            # 4. 将数据插入数据库中
+            if not self._process_file_batches(file_name=task.file_path, chunks=nodes, file_hash=file_hash):
+                return "入库未完成"
+            self.logger.info(f"任务完成: {task.file_path}")
+            return None
         except Exception as e:
             self.logger.error(f"任务处理异常: {str(e)}")
+            return f"{type(e).__name__}: {e}"
 
-    def _build_nodes(self, raw_content: Dict[str, Any], task: TaskMessage) -> List[TextNode]:
+    def _build_nodes(self, payload: RAGTaskPayload, task: TaskMessage,
+                     skip_ids: Optional[Set[str]] = None) -> List[TextNode]:
+        """构造 TextNode 并批量计算向量；skip_ids 中已入库的 chunk 不再构造，也不再计算向量"""
         nodes = []
+        embedding_texts = []
         
         # 提取实际的节点列表，新结构在 content -> nodes 下
-        content_data = raw_content.get("content", {})
-        blocks = content_data.get("nodes", [])
+        blocks = payload.content.nodes
         
         for block in blocks:
             # 1. 过滤掉 page_content 为空的无效节点
-            if not block.get("page_content"):
+            if not block.page_content:
                 continue
             try:
-                # 2. 获取稳定 ID：优先使用 internal_id，若无则使用 page_content 的哈希
-                inner_id = block.get("metadata").get("internal_id")
+                # 2. 提取元数据（适配新 JSON 字段）
+                metadata = block.metadata or {}
+
+                # 3. 获取稳定 ID：优先使用 internal_id，若无则使用 page_content 的哈希
+                inner_id = metadata.get("internal_id")
                 if not inner_id:
-                    inner_id = hashlib.md5(block["page_content"].encode()).hexdigest()
+                    inner_id = hashlib.md5(block.page_content.encode()).hexdigest()
                     
                 # 构造全局唯一的 chunk_id
                 chunk_id = f"{task.file_path}:{inner_id}"
-                
-                # 3. 提取元数据（适配新 JSON 字段）
-                metadata = block.get("metadata", {})
-                embedding_content = metadata.get("summary", "") + " ".join(metadata.get("facts", []))
-                summary_embedding = self.embed_model.get_text_embedding(embedding_content)
-                node = TextNode(
-                    id_=chunk_id,          
-                    text=block["page_content"] + " ".join(metadata.get("keywords", [])), 
-                    embedding=summary_embedding,
-                    metadata={
-                        "file_name": task.file_path,
-                        "internal_id": inner_id,
-                        "tags": metadata.get("tags", []),
-                        "insert_date": metadata.get("insert_date", "")
-                    }
-                )
-            
-                # 3. 提取元数据（适配新 JSON 字段）
-                metadata = block.get("metadata", {})
+                if skip_ids and chunk_id in skip_ids:
+                    continue
                 
                 node = TextNode(
                     id_=chunk_id,
-                    text=block["page_content"],
+                    text=block.page_content,
                     metadata={
                         "file_name": task.file_path,
                         "internal_id": inner_id,
@@ -133,24 +159,40 @@ class IngestionManager:
                         "event_type": metadata.get("event_type", "")
                     }
                 )
-            
+
+                # 4. 向量基于 summary + facts；未经丰富化的节点回退到原文（与查询向量同一模型、同一空间）
+                embedding_content = metadata.get("summary", "") + " ".join(metadata.get("facts", []))
+                embedding_texts.append(embedding_content or block.page_content)
                 nodes.append(node)
             except Exception as e:
                 self.logger.error(f"节点处理异常: {str(e)}")
+
+        # 5. 整个分片批量计算向量并挂到节点上，insert_nodes 时不再重复计算
+        with trace_step("index", "embed"):
+            embeddings = self._embed_texts(embedding_texts)
+        for node, embedding in zip(nodes, embeddings):
+            node.embedding = embedding
         
         return nodes
 
-    def _process_file_batches(self, file_name: str, chunks: List[TextNode], batch_size: int = 50) -> bool:
-        """处理文件级别的批量入库逻辑"""
-        namespace = uuid.NAMESPACE_DNS
-        file_hash = str(uuid.uuid5(namespace, file_name))
-        # 1. 检查文件是否整体已完成
-        if self.registry and self.registry.is_file_processed(file_name):
-            self.logger.info(f"File {file_name} already fully processed.")
-            return True
-
-        # 获取当前文件已处理的 chunk 集合以实现续传
-        processed_chunk_ids = self.registry.get_processed_chunks(file_name) if self.registry else set()
+    def _embed_texts(self, texts: List[str]) -> List[List[float]]:
+        """按 embed_batch_size 分批调用 Embedding 服务"""
+        embeddings: List[List[float]] = []
+        for i in range(0, len(texts), self.embed_batch_size):
+            embeddings.extend(self.embed_service.get_embeddings(texts[i : i + self.embed_batch_size]))
+        return embeddings
+
+    @staticmethod
+    def _content_hash(payload: RAGTaskPayload) -> str:
+        """分片内容（节点与处理指令）的摘要，作为 Registry 中的文件版本"""
+        return hashlib.sha256(payload.content.model_dump_json().encode("utf-8")).hexdigest()
+
+    def _process_file_batches(self, file_name: str, chunks: List[TextNode], file_hash: str,
+                              batch_size: int = 50) -> bool:
+        """处理文件级别的批量入库逻辑；file_hash 为 _content_hash 得到的内容版本"""
+        # 1. 文件是否整体已完成由 _handle_task 在加载载荷后检查；
+        # 获取当前版本已处理的 chunk 集合以实现续传（持久化 Registry 在本地缓存，不再访问后端）
+        processed_chunk_ids = self.registry.get_processed_chunks(file_name, file_hash) if self.registry else set()
 
         for i in range(0, len(chunks), batch_size):
             batch = chunks[i : i + batch_size]
@@ -162,12 +204,14 @@ class IngestionManager:
             try:
                 # 3. 批量执行双写
                 if self.v_store:
-                    if self.v_store.insert(to_process):
+                    with trace_step("index", "insert"):
+                        inserted = self.v_store.insert(to_process)
+                    if inserted:
                         v_success_ids = [c.id_ for c in to_process]
 
                 # 4. 记录当前 batch 的 chunk 进度
                 if self.registry:
-                    self.registry.mark_chunks_processed(file_name, [c.id_ for c in to_process])
+                    self.registry.mark_chunks_processed(file_name, file_hash, [c.id_ for c in to_process])
 
             except Exception as e:
                 self.logger.error(f"Batch failed: {e}")
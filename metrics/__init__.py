@@ -0,0 +1,16 @@
+from .registry import REGISTRY, DEFAULT_BUCKETS, CallbackCollector, register_callback, sample_value
+from .server import start_metrics_server
+from .tracing import JsonlSpanExporter, configure_exporter, trace_message, trace_step
+
+__all__ = [
+    "REGISTRY",
+    "DEFAULT_BUCKETS",
+    "CallbackCollector",
+    "register_callback",
+    "sample_value",
+    "start_metrics_server",
+    "JsonlSpanExporter",
+    "configure_exporter",
+    "trace_message",
+    "trace_step"
+]
@@ -0,0 +1,119 @@
+import logging
+from typing import Any, Dict, Optional
+
+import redis
+from prometheus_client import Counter, Histogram
+
+from .registry import DEFAULT_BUCKETS, register_callback
+
+# 各阶段共用的指标。stage 取值 clean / chunk / enrich / index，与 nack 时的 stage 一致
+STAGE_MESSAGES = Counter(
+    "rag_stage_messages_total", "各阶段处理完成的消息数，outcome 为 ok 或 failed", ("stage", "outcome")
+)
+STAGE_SECONDS = Histogram(
+    "rag_stage_message_seconds", "单条消息在阶段内的处理耗时（秒）", ("stage",), buckets=DEFAULT_BUCKETS
+)
+# step: load / parse / clean / chunk / llm / embed / insert / publish
+STEP_SECONDS = Histogram(
+    "rag_stage_step_seconds", "阶段内各子步骤的耗时（秒）", ("stage", "step"), buckets=DEFAULT_BUCKETS
+)
+END_TO_END_SECONDS = Histogram(
+    "rag_end_to_end_seconds", "源文件任务进入流水线到分片入库完成的耗时（秒）",
+    buckets=(1, 5, 15, 30, 60, 120, 300, 600, 1800, 3600, 7200, 21600)
+)
+LLM_REQUESTS = Counter(
+    "rag_llm_requests_total", "LLM 调用次数，outcome 为 ok / unparsable / error", ("outcome",)
+)
+LLM_TOKENS = Counter(
+    "rag_llm_tokens_total", "LLM 消耗的 token 数，kind 为 prompt 或 completion", ("kind",)
+)
+
+def record_llm_usage(response: Any):
+    """
+    从 LLM 响应中读取 token 用量：llama_index 的 OpenAI 兼容实现写在 additional_kwargs，
+    其它实现从原始响应的 usage 字段读取；都没有时不记录
+    """
+    usage = getattr(response, "additional_kwargs", None) or {}
+    if "prompt_tokens" not in usage:
+        raw = getattr(response, "raw", None)
+        raw_usage = raw.get("usage") if isinstance(raw, dict) else getattr(raw, "usage", None)
+        if raw_usage is None:
+            return
+        usage = raw_usage if isinstance(raw_usage, dict) else {
+            "prompt_tokens": getattr(raw_usage, "prompt_tokens", 0),
+            "completion_tokens": getattr(raw_usage, "completion_tokens", 0),
+        }
+    LLM_TOKENS.labels("prompt").inc(usage.get("prompt_tokens") or 0)
+    LLM_TOKENS.labels("completion").inc(usage.get("completion_tokens") or 0)
+
+def track_queue(queue: Any, stage: str, role: str):
+    """
+    抓取时读取队列自身维护的计数：Redis 队列的接管、死信与背压等待，进程内队列的积压长度。
+    role 为 consumer 或 publisher，用于区分同一阶段的两端
+    """
+    labels = (stage, role)
+
+    def counter(attr: str):
+        return lambda: [(labels, getattr(queue, attr, None))]
+
+    register_callback(
+        "rag_queue_reclaimed_total", "从失联消费者接管的 Pending 消息数",
+        counter("reclaimed_total"), "counter", ("stage", "role")
+    )
+    register_callback(
+        "rag_queue_dead_lettered_total", "转入死信流的消息数",
+        counter("dead_lettered_total"), "counter", ("stage", "role")
+    )
+    register_callback(
+        "rag_queue_throttled_seconds_total", "因下游积压超过高水位而暂停生产的累计时长（秒）",
+        counter("throttled_seconds"), "counter", ("stage", "role")
+    )
+    if hasattr(queue, "qsize"):
+        register_callback(
+            "rag_queue_depth", "进程内队列中待消费的消息数",
+            lambda: [(labels, queue.qsize())], "gauge", ("stage", "role")
+        )
+
+def track_cache(name: str, cache: Any):
+    """抓取时读取缓存的 hits / misses 计数；命中率在查询端用 hit / (hit + miss) 计算"""
+    register_callback(
+        "rag_cache_requests_total", "缓存查询次数，result 为 hit 或 miss",
+        lambda: [((name, "hit"), getattr(cache, "hits", None)), ((name, "miss"), getattr(cache, "misses", None))],
+        "counter", ("cache", "result")
+    )
+
+def track_stream_lag(config: Dict[str, Any], stream: str, group: str):
+    """
+    抓取时通过 XINFO GROUPS 读取消费者组的 lag 与 pending。
+    使用独立的同步连接，异步 Worker 的事件循环连接不会被抓取线程占用
+    """
+    client: Optional[redis.Redis] = None
+
+    def collect_group() -> Optional[Dict[str, Any]]:
+        nonlocal client
+        if client is None:
+            client = redis.Redis(
+                host=config.get('host', 'localhost'),
+                port=config.get('port', 6379),
+                db=config.get('db', 0),
+                decode_responses=True,
+                socket_timeout=2
+            )
+        try:
+            return next((g for g in client.xinfo_groups(stream) if g['name'] == group), None)
+        except redis.ResponseError:
+            # Stream 尚未创建
+            return None
+        except Exception as e:
+            logging.getLogger(__name__).warning(f"读取 {stream}/{group} 积压失败: {e}")
+            return None
+
+    def collect():
+        info = collect_group() or {}
+        return [((stream, group, "lag"), info.get('lag')), ((stream, group, "pending"), info.get('pending'))]
+
+    # lag 与 pending 来自同一次 XINFO，抓取一次只访问 Redis 一次
+    register_callback(
+        "rag_stream_backlog", "消费者组积压：kind=lag 为尚未读取的消息数（Redis 7+），kind=pending 为已读取未确认的消息数",
+        collect, "gauge", ("stream", "group", "kind")
+    )
@@ -0,0 +1,77 @@
+import logging
+import threading
+from typing import Callable, Dict, Iterable, List, Mapping, Optional, Sequence, Tuple
+
+from prometheus_client import REGISTRY, CollectorRegistry
+from prometheus_client.core import CounterMetricFamily, GaugeMetricFamily
+from prometheus_client.registry import Collector
+
+LabelValues = Tuple[str, ...]
+# 采集回调返回 [(标签值元组, 数值), ...]，在抓取时调用，不占用热路径
+Callback = Callable[[], Iterable[Tuple[LabelValues, Optional[float]]]]
+
+# 默认延迟分桶（秒）：覆盖毫秒级的解析/入库到分钟级的 LLM 长尾
+DEFAULT_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0, 60.0, 120.0)
+
+_FAMILIES = {"counter": CounterMetricFamily, "gauge": GaugeMetricFamily}
+
+class CallbackCollector(Collector):
+    """
+    抓取时才读取的指标：队列、缓存等组件已经自行维护计数，
+    这里只在抓取时读出，热路径上没有任何额外开销。同名指标可挂多个回调（如融合模式下的多个队列）。
+    """
+    def __init__(self, name: str, documentation: str, metric_type: str, labelnames: Sequence[str] = ()):
+        if metric_type not in _FAMILIES:
+            raise ValueError(f"不支持的回调指标类型: {metric_type}")
+        self.name = name
+        self.documentation = documentation
+        self.metric_type = metric_type
+        self.labelnames = tuple(labelnames)
+        self._callbacks: List[Callback] = []
+        self._lock = threading.Lock()
+
+    def add(self, callback: Callback):
+        with self._lock:
+            self._callbacks.append(callback)
+
+    def _family(self):
+        return _FAMILIES[self.metric_type](self.name, self.documentation, labels=self.labelnames)
+
+    def describe(self):
+        # 注册时只声明指标名，不触发回调
+        return [self._family()]
+
+    def collect(self):
+        family = self._family()
+        with self._lock:
+            callbacks = list(self._callbacks)
+        for callback in callbacks:
+            try:
+                for labelvalues, value in callback():
+                    if value is not None:
+                        family.add_metric(list(labelvalues), value)
+            except Exception as e:
+                # 单个组件读取失败不影响其它指标的输出
+                logging.getLogger(__name__).warning(f"采集指标 {self.name} 失败: {e}")
+        yield family
+
+_callback_collectors: Dict[Tuple[int, str], CallbackCollector] = {}
+_callback_lock = threading.Lock()
+
+def register_callback(name: str, documentation: str, callback: Callback, metric_type: str = "gauge",
+                      labelnames: Sequence[str] = (), registry: CollectorRegistry = REGISTRY):
+    """登记抓取时调用的回调；同名指标复用同一个 Collector"""
+    with _callback_lock:
+        collector = _callback_collectors.get((id(registry), name))
+        if collector is None:
+            collector = CallbackCollector(name, documentation, metric_type, labelnames)
+            registry.register(collector)
+            _callback_collectors[(id(registry), name)] = collector
+        elif collector.metric_type != metric_type or collector.labelnames != tuple(labelnames):
+            raise ValueError(f"指标 {name} 已以不同的类型或标签注册")
+    collector.add(callback)
+
+def sample_value(name: str, labels: Optional[Mapping[str, str]] = None,
+                 registry: CollectorRegistry = REGISTRY) -> float:
+    """读取单个样本的当前值，序列尚未出现时为 0；会完整采集一次注册表，不要用在热路径上"""
+    return registry.get_sample_value(name, dict(labels or {})) or 0
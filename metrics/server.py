@@ -0,0 +1,18 @@
+import logging
+from typing import Optional
+
+from prometheus_client import CollectorRegistry, start_http_server
+from prometheus_client.registry import REGISTRY
+
+def start_metrics_server(port: int, addr: str = "0.0.0.0", registry: CollectorRegistry = REGISTRY):
+    """
+    在守护线程中提供 /metrics (Prometheus 文本格式)。
+    端口被占用等错误只记录警告并返回 None，不影响 Worker 本身运行。
+    """
+    try:
+        server, _ = start_http_server(port, addr, registry)
+    except OSError as e:
+        logging.getLogger(__name__).warning(f"指标端口 {addr}:{port} 启动失败，指标不可用: {e}")
+        return None
+    logging.getLogger(__name__).info(f"指标服务已启动: http://{addr}:{server.server_port}/metrics")
+    return server
@@ -0,0 +1,107 @@
+"""
+追踪记录分析：python -m metrics.trace_report /data/traces/*.jsonl --top 10
+
+读取 JsonlSpanExporter 导出的文件（可同时传入各 Worker 的文件），输出：
+- 各阶段处理耗时、阶段间排队耗时与端到端耗时的 p50 / p90 / p99 / max（毫秒）
+- 各阶段吞吐：处理条数 / 首条开始到末条结束的时长
+- 各子步骤耗时的分位数
+- 端到端最慢的若干条 trace 及其逐阶段时间线，用于定位长尾
+"""
+import argparse
+import json
+import math
+from collections import defaultdict
+from typing import Any, Dict, Iterable, List
+
+def percentile(values: List[float], q: float) -> float:
+    """最近秩法分位数，values 需已排序"""
+    if not values:
+        return 0.0
+    rank = max(math.ceil(q / 100 * len(values)) - 1, 0)
+    return values[rank]
+
+def summarize(values: Iterable[float]) -> Dict[str, float]:
+    values = sorted(values)
+    return {
+        "count": len(values),
+        "p50": round(percentile(values, 50), 1),
+        "p90": round(percentile(values, 90), 1),
+        "p99": round(percentile(values, 99), 1),
+        "max": round(values[-1], 1) if values else 0.0,
+    }
+
+def read_records(paths: List[str]) -> Iterable[Dict[str, Any]]:
+    for path in paths:
+        with open(path, encoding="utf-8") as f:
+            for line in f:
+                line = line.strip()
+                if line:
+                    yield json.loads(line)
+
+def build_report(records: Iterable[Dict[str, Any]], top: int = 10) -> Dict[str, Any]:
+    stage_ms: Dict[str, List[float]] = defaultdict(list)
+    step_ms: Dict[str, List[float]] = defaultdict(list)
+    queue_ms: Dict[str, List[float]] = defaultdict(list)
+    failed: Dict[str, int] = defaultdict(int)
+    # 各阶段 [最早开始, 最晚结束]
+    window: Dict[str, List[float]] = {}
+    traces: List[Dict[str, Any]] = []
+
+    for record in records:
+        kind = record.get("kind")
+        if kind == "stage":
+            stage_ms[record["stage"]].append(record["duration_ms"])
+            span = window.setdefault(record["stage"], [record["start"], record["end"]])
+            span[0] = min(span[0], record["start"])
+            span[1] = max(span[1], record["end"])
+            if record.get("status") == "error":
+                failed[record["stage"]] += 1
+        elif kind == "step":
+            step_ms[record["name"]].append(record["duration_ms"])
+        elif kind == "trace":
+            traces.append(record)
+            # 上一阶段发出消息到下一阶段开始处理之间的等待，包括队列积压与背压
+            timeline = record["timeline"]
+            if timeline:
+                queue_ms[timeline[0]["stage"]].append((timeline[0]["start"] - record["origin_timestamp"]) * 1000)
+            for prev, cur in zip(timeline, timeline[1:]):
+                queue_ms[cur["stage"]].append((cur["start"] - prev["end"]) * 1000)
+
+    traces.sort(key=lambda t: t["total_ms"], reverse=True)
+    return {
+        "end_to_end_ms": summarize(t["total_ms"] for t in traces),
+        "stage_ms": {stage: summarize(v) for stage, v in stage_ms.items()},
+        "queue_wait_ms": {stage: summarize(v) for stage, v in queue_ms.items()},
+        "stage_throughput_per_s": {
+            stage: round(len(stage_ms[stage]) / (end - start), 2) if end > start else 0.0
+            for stage, (start, end) in window.items()
+        },
+        "step_ms": {name: summarize(v) for name, v in sorted(step_ms.items())},
+        "failed": dict(failed),
+        "slowest": [
+            {
+                "trace_id": t["trace_id"],
+                "total_ms": t["total_ms"],
+                "stages": [
+                    {
+                        "stage": s["stage"],
+                        "offset_ms": round((s["start"] - t["origin_timestamp"]) * 1000, 1),
+                        "duration_ms": round((s["end"] - s["start"]) * 1000, 1),
+                        "steps_ms": {k: round(v * 1000, 1) for k, v in s["steps"].items()},
+                    }
+                    for s in t["timeline"]
+                ],
+            }
+            for t in traces[:top]
+        ],
+    }
+
+def main():
+    parser = argparse.ArgumentParser(description="追踪记录分析")
+    parser.add_argument("paths", nargs="+", help="JsonlSpanExporter 导出的文件")
+    parser.add_argument("--top", type=int, default=10, help="列出端到端最慢的 trace 数量")
+    args = parser.parse_args()
+    print(json.dumps(build_report(read_records(args.paths), args.top), ensure_ascii=False, indent=2))
+
+if __name__ == "__main__":
+    main()
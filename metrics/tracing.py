@@ -0,0 +1,204 @@
+import atexit
+import json
+import logging
+import os
+import queue
+import threading
+import time
+import uuid
+from contextlib import contextmanager
+from contextvars import ContextVar
+from typing import Any, Dict, Iterable, Iterator, List, Optional, Tuple
+
+from database.message import QueueMessage, StageTiming, TaskMessage
+from logfilter.logging_context import trace_id_var
+from .pipeline import END_TO_END_SECONDS, STAGE_MESSAGES, STAGE_SECONDS, STEP_SECONDS
+
+class StageTrace:
+    """
+    一条消息在一个阶段内的追踪记录：阶段 span 及其子步骤 span。
+    trace_id 沿用上游消息携带的值，日志、导出的 span 与下游消息都以它串联。
+    """
+    __slots__ = ("stage", "trace_id", "span_id", "origin_timestamp", "timeline",
+                 "start", "_perf_start", "steps", "error")
+
+    def __init__(self, stage: str, task: Optional[TaskMessage]):
+        self.stage = stage
+        self.trace_id = task.trace_id if task is not None and task.trace_id else uuid.uuid4().hex
+        self.span_id = os.urandom(8).hex()
+        self.origin_timestamp = (task.origin_timestamp or task.timestamp) if task is not None else None
+        self.timeline: List[StageTiming] = list(task.timeline) if task is not None else []
+        self.start = time.time()
+        self._perf_start = time.perf_counter()
+        # (步骤名, 开始时间戳, 耗时秒)
+        self.steps: List[Tuple[str, float, float]] = []
+        self.error: Optional[str] = None
+
+    def add_step(self, name: str, start: float, duration: float):
+        self.steps.append((name, start, duration))
+
+    def step_totals(self) -> Dict[str, float]:
+        """同名步骤（如多次 LLM 调用）累计耗时；并发执行的步骤累计值可能超过阶段墙钟耗时"""
+        totals: Dict[str, float] = {}
+        for name, _, duration in self.steps:
+            totals[name] = totals.get(name, 0.0) + duration
+        # 微秒精度足够，避免随消息传递的时间线过长
+        return {name: round(total, 6) for name, total in totals.items()}
+
+    def stamp(self, message: TaskMessage):
+        """把源头时间与截至目前的时间线写入发往下游的消息"""
+        message.origin_timestamp = self.origin_timestamp
+        message.timeline = self.timeline + [StageTiming(
+            stage=self.stage, start=self.start, end=time.time(), steps=self.step_totals()
+        )]
+
+_current_trace: ContextVar[Optional[StageTrace]] = ContextVar("current_stage_trace", default=None)
+
+class JsonlSpanExporter:
+    """
+    以 JSON Lines 导出 span：每个阶段一条 kind=stage、每个子步骤一条 kind=step，
+    最终阶段另写一条 kind=trace 的端到端汇总。写文件在后台线程中进行，处理线程只做入队。
+    字段沿用 OTLP 的 trace_id / span_id / parent_span_id 命名，便于转换后导入其它追踪系统。
+    """
+    def __init__(self, path: str):
+        if os.path.dirname(path):
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+        self.path = path
+        self._queue: "queue.SimpleQueue[Optional[Dict[str, Any]]]" = queue.SimpleQueue()
+        self._file = open(path, "a", encoding="utf-8")
+        self._thread = threading.Thread(target=self._run, name="trace-export", daemon=True)
+        self._thread.start()
+        atexit.register(self.close)
+        logging.getLogger(__name__).info(f"追踪记录导出到: {path}")
+
+    def export(self, record: Dict[str, Any]):
+        self._queue.put(record)
+
+    def _run(self):
+        while True:
+            record = self._queue.get()
+            if record is None:
+                break
+            self._file.write(json.dumps(record, ensure_ascii=False) + "\n")
+            # 队列暂时为空时才刷盘，高吞吐时合并写入
+            if self._queue.empty():
+                self._file.flush()
+        self._file.flush()
+
+    def close(self):
+        if self._thread.is_alive():
+            self._queue.put(None)
+            self._thread.join(timeout=5)
+        if not self._file.closed:
+            self._file.close()
+
+_exporter: Optional[JsonlSpanExporter] = None
+
+def configure_exporter(exporter: Optional[JsonlSpanExporter]):
+    """设置进程级的 span 导出器；为 None 时只记录指标与日志 trace_id，不导出 span"""
+    global _exporter
+    _exporter = exporter
+
+def current_trace() -> Optional[StageTrace]:
+    return _current_trace.get()
+
+def stamp_message(message: TaskMessage):
+    """在当前阶段追踪的上下文中发送下游消息前调用；不在追踪上下文中时不做任何事"""
+    trace = _current_trace.get()
+    if trace is not None:
+        trace.stamp(message)
+
+@contextmanager
+def trace_message(stage: str, message: QueueMessage, final: bool = False) -> Iterator[StageTrace]:
+    """
+    包裹一条消息在阶段内的处理：设置日志 trace_id 与当前追踪，
+    结束时记录阶段指标并导出 span。处理失败时由调用方设置 trace.error。
+    final=True 表示流水线最后一个阶段，成功时额外记录源头到入库的端到端耗时。
+    """
+    try:
+        task = TaskMessage.from_json(message.data)
+        # 解析结果放回消息，阶段内再次 from_json 时直接返回，不重复反序列化
+        message.data = task
+    except Exception:
+        # 消息本身无法解析：由阶段的处理逻辑按失败处理，这里只生成新的 trace_id
+        task = None
+
+    trace = StageTrace(stage, task)
+    log_token = trace_id_var.set(trace.trace_id)
+    trace_token = _current_trace.set(trace)
+    try:
+        yield trace
+    except Exception as e:
+        trace.error = f"{type(e).__name__}: {e}"
+        raise
+    finally:
+        duration = time.perf_counter() - trace._perf_start
+        ok = trace.error is None
+        STAGE_SECONDS.labels(stage).observe(duration)
+        STAGE_MESSAGES.labels(stage, "ok" if ok else "failed").inc()
+        end = trace.start + duration
+        if final and ok and trace.origin_timestamp:
+            END_TO_END_SECONDS.observe(end - trace.origin_timestamp)
+        if _exporter is not None:
+            _export(trace, end, final and ok)
+        _current_trace.reset(trace_token)
+        trace_id_var.reset(log_token)
+
+def _export(trace: StageTrace, end: float, completed: bool):
+    _exporter.export({
+        "kind": "stage", "trace_id": trace.trace_id, "span_id": trace.span_id, "parent_span_id": None,
+        "name": trace.stage, "stage": trace.stage, "start": trace.start, "end": end,
+        "duration_ms": round((end - trace.start) * 1000, 3),
+        "status": "ok" if trace.error is None else "error", "error": trace.error,
+        "origin_timestamp": trace.origin_timestamp
+    })
+    for name, start, duration in trace.steps:
+        _exporter.export({
+            "kind": "step", "trace_id": trace.trace_id, "span_id": os.urandom(8).hex(),
+            "parent_span_id": trace.span_id, "name": f"{trace.stage}.{name}", "stage": trace.stage,
+            "start": start, "end": start + duration, "duration_ms": round(duration * 1000, 3)
+        })
+    if completed and trace.origin_timestamp:
+        timeline = trace.timeline + [StageTiming(stage=trace.stage, start=trace.start, end=end,
+                                                 steps=trace.step_totals())]
+        _exporter.export({
+            "kind": "trace", "trace_id": trace.trace_id, "origin_timestamp": trace.origin_timestamp,
+            "end": end, "total_ms": round((end - trace.origin_timestamp) * 1000, 3),
+            "timeline": [t.model_dump() for t in timeline]
+        })
+
+class _StepSpan:
+    __slots__ = ("stage", "step", "_start", "_perf_start")
+
+    def __init__(self, stage: str, step: str):
+        self.stage = stage
+        self.step = step
+
+    def __enter__(self):
+        self._start = time.time()
+        self._perf_start = time.perf_counter()
+        return self
+
+    def __exit__(self, *exc):
+        duration = time.perf_counter() - self._perf_start
+        STEP_SECONDS.labels(self.stage, self.step).observe(duration)
+        trace = _current_trace.get()
+        if trace is not None:
+            trace.add_step(self.step, self._start, duration)
+        return False
+
+def trace_step(stage: str, step: str) -> _StepSpan:
+    """with trace_step("clean", "parse"): ... 记录子步骤耗时到直方图，并作为当前追踪的子 span"""
+    return _StepSpan(stage, step)
+
+def trace_iter(iterable: Iterable, stage: str, step: str):
+    """逐项计时迭代器的 next()，用于惰性产出结果的清洗器等；循环体自身的耗时不计入"""
+    iterator = iter(iterable)
+    while True:
+        span = _StepSpan(stage, step).__enter__()
+        try:
+            item = next(iterator)
+        except StopIteration:
+            return
+        span.__exit__(None, None, None)
+        yield item
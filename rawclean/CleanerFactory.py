@@ -10,6 +10,8 @@ class CleanerFactory:
         ".xls": ExcelCleaner,
         ".json":JsonCleaner,
     }
+    # 各清洗器的构造参数，由启动流程通过 configure 注入
+    _OPTIONS: Dict[Type[BaseCleaner], Dict[str, Any]] = {}
 
     @classmethod
     def get_cleaner(cls, file_extension: str) -> BaseCleaner:
@@ -17,7 +19,14 @@ class CleanerFactory:
         if not cleaner_class:
             # 如果没有专门的清洗器，返回一个通用的或者默认不做处理
             return DefaultCleaner() 
-        return cleaner_class()
+        return cleaner_class(**cls._OPTIONS.get(cleaner_class, {}))
+
+    @classmethod
+    def configure(cls, cleaner_class: Type[BaseCleaner], **options):
+        """
+        设置某类清洗器的构造参数，例如 configure(ExcelCleaner, workers=4)
+        """
+        cls._OPTIONS[cleaner_class] = {**cls._OPTIONS.get(cleaner_class, {}), **options}
 
 class DefaultCleaner(BaseCleaner):
     def clean(self, raw_data: Any) -> str:
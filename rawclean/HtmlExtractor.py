@@ -0,0 +1,83 @@
+from abc import ABC, abstractmethod
+from typing import Dict, Type
+
+import lxml.html
+from lxml import etree
+
+class BaseTextExtractor(ABC):
+    """HTML 正文提取器：输入 HTML 片段，输出纯文本"""
+    @abstractmethod
+    def extract(self, html: str) -> str:
+        pass
+
+class NewspaperTextExtractor(BaseTextExtractor):
+    """
+    newspaper3k 提取：对每段 HTML 做完整的 DOM 评分与正文识别，结果准确但开销大。
+    """
+    def extract(self, html: str) -> str:
+        # 延迟导入：只选用 lxml 提取器时不加载 newspaper 及其 NLP 依赖
+        from newspaper import Article
+        article = Article(url='', language='zh')
+        article.set_html(html)
+        article.parse()
+        return article.text
+
+class HtmlTextExtractor(BaseTextExtractor):
+    """
+    基于 lxml 的轻量提取：删除脚本、样式、导航等样板标签，按块级元素切段，
+    段落之间以空行分隔（与 newspaper 输出格式一致），newspaper 能识别出正文的行两者输出相同。
+    有意保留的差异：
+    - newspaper 只在 p / pre / td 中找正文，且要求段落含足够多的停用词；纯文本、列表、只有标题
+      或段落过短的行在 newspaper 下提取为空串，这里保留其文本，不丢弃整行内容
+    - 正文容器内的导航、页脚等样板标签这里整体删除，newspaper 会把其中的文字当作正文保留
+    """
+
+    BOILERPLATE_TAGS = (
+        "script", "style", "noscript", "iframe", "object", "embed", "head", "nav",
+        "header", "footer", "aside", "form", "button", "select", "svg", "template",
+    )
+    BLOCK_TAGS = frozenset((
+        "p", "div", "li", "ul", "ol", "dl", "dd", "dt", "h1", "h2", "h3", "h4", "h5", "h6",
+        "pre", "blockquote", "table", "tr", "td", "th", "section", "article", "main", "figure", "figcaption",
+    ))
+
+    def extract(self, html: str) -> str:
+        if not html or not html.strip():
+            return ""
+        try:
+            root = lxml.html.fragment_fromstring(html, create_parent="div")
+        except (etree.ParserError, ValueError):
+            return " ".join(html.split())
+
+        etree.strip_elements(root, *self.BOILERPLATE_TAGS, etree.Comment, with_tail=False)
+
+        has_blocks = False
+        for el in root.iterdescendants():
+            if not isinstance(el.tag, str):
+                continue
+            if el.tag in self.BLOCK_TAGS:
+                has_blocks = True
+                el.text = "\n" + (el.text or "")
+                el.tail = "\n" + (el.tail or "")
+            elif el.tag == "br":
+                el.tail = "\n" + (el.tail or "")
+
+        if has_blocks:
+            # 与 newspaper 一致：存在正文段落时丢弃块外的零散文本（如拼接的 "title: ... |" 前缀）
+            root.text = None
+            for child in root:
+                child.tail = "\n"
+
+        lines = (" ".join(line.split()) for line in root.text_content().split("\n"))
+        return "\n\n".join(line for line in lines if line)
+
+_EXTRACTORS: Dict[str, Type[BaseTextExtractor]] = {
+    "newspaper": NewspaperTextExtractor,
+    "lxml": HtmlTextExtractor,
+}
+
+def get_extractor(name: str) -> BaseTextExtractor:
+    extractor_class = _EXTRACTORS.get(name.lower())
+    if not extractor_class:
+        raise ValueError(f"不支持的 HTML 提取器: {name}")
+    return extractor_class()
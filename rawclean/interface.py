@@ -1,5 +1,5 @@
 from abc import ABC, abstractmethod
-from typing import Generator, Iterable
+from typing import Any, Dict, Generator, Iterable
 
 class BaseCleaner(ABC):
     """所有清洗器的基类"""
@@ -9,4 +9,11 @@ class BaseCleaner(ABC):
         输入: Parser 解析出的原始对象 (dict, list, str)
         输出: 清洗后的标准化文本
         """
-        pass
\ No newline at end of file
+        pass
+
+    def parser_options(self) -> Dict[str, Any]:
+        """
+        清洗器对解析器的要求（如只读取需要的列、流式读取），
+        由 CleanManager 传给 ParserFactory.get_parser
+        """
+        return {}
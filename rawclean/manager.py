@@ -1,17 +1,16 @@
 from contextlib import closing
 import logging
 import os
-import time
-from typing import Any, Dict, List
-import uuid
+from typing import Any, Dict, List, Optional
 from constants import ChunkMethod
 from database.interfaces import MessageQueueInterface
 from database.message import TaskMessage,QueueMessage
-from files.ContentSaverFactory import ContentSaver
 from files.ContentLoaderFactory import ContentLoader
 from files.DocumentFormat import ContentBody, Node, PipelineInstructions, RAGTaskPayload
 from files.interfaces import BaseParser
 from files.ParserFactory import ParserFactory
+from files.PayloadTransport import PayloadTransport
+from metrics.tracing import current_trace, stamp_message, trace_iter, trace_message, trace_step
 from .CleanerFactory import CleanerFactory
 
 
@@ -24,12 +23,17 @@ class CleanManager:
         self, 
         consumer: MessageQueueInterface,  # 监听队列：接收来自 Clean 的消息
         publisher: MessageQueueInterface, # 发送队列：发送给 Chunk 的消息
-        poll_interval: float = 1.0
+        batch_size: int = 1,
+        block_ms: int = 1000,
+        transport: Optional[PayloadTransport] = None  # 分片载荷内联或落盘的策略
     ):
         self.logger = logging.getLogger(__name__)
         self.consumer = consumer
         self.publisher = publisher
-        self.poll_interval = poll_interval
+        self.batch_size = batch_size
+        # 无消息时由队列服务端阻塞等待的时长（毫秒），Manager 不再额外 sleep
+        self.block_ms = block_ms
+        self.transport = transport or PayloadTransport()
 
     def start(self):
         """启动持续监听循环"""
@@ -38,12 +42,8 @@ class CleanManager:
         
         try:
             while self.running:
-                # 尝试处理单条消息
-                success = self.process_document()
-                
-                # 如果没有消息被处理，则进入休眠，避免 CPU 占用过高
-                if not success:
-                    time.sleep(self.poll_interval)
+                # 拉取并处理一批消息；队列为空时 consume_batch 自身阻塞 block_ms
+                self.process_document()
         except KeyboardInterrupt:
             self.stop()
         except Exception as e:
@@ -57,38 +57,59 @@ class CleanManager:
 
     def process_document(self) -> bool:
         """
-        处理单个文档的完整生命周期
+        拉取一批文档（最多 batch_size 条）并逐个处理
+        返回 True 表示处理了消息，False 表示队列为空
         """
-        message = self.consumer.consume()
-        if not message:
+        messages = self.consumer.consume_batch(self.batch_size, self.block_ms)
+        if not messages:
             return False
 
-        task = TaskMessage.from_json(message.data)
-        self.logger.info(f"监听到新消息，处理路径: {task.file_path}")
+        acked_ids = []
+        for message in messages:
+            # 设置日志 trace_id，记录阶段与子步骤耗时
+            with trace_message("clean", message) as trace:
+                trace.error = self._process_message(message)
+                if trace.error is None:
+                    acked_ids.append(message.id)
+                else:
+                    # 失败消息由队列按投递次数退避重投，超过上限转入死信
+                    self.consumer.nack(message, trace.error, stage="clean")
+        self.consumer.ack_batch(acked_ids)
+        return True
 
+    def _process_message(self, message: QueueMessage) -> Optional[str]:
+        """
+        处理单个文档的完整生命周期，返回 None 表示可以确认该消息，失败时返回错误信息
+        """
         try:
-            # 1. 依赖 Loader 获取原始字节流 (BytesIO)
-            # 根据 storage_type 调用不同的加载逻辑
-            raw_stream = ContentLoader.load_content(task.file_path)
-            target_root, _ = os.path.splitext(task.file_path)
-            target_ext = ".json"
+            task = TaskMessage.from_json(message.data)
+            self.logger.info(f"监听到新消息，处理路径: {task.file_path}")
 
-            # 2. 核心：使用 closing 确保 stream 无论成功失败都会被关闭
+            # 1. 先确定清洗器，解析器按清洗器的要求创建（只读需要的列、流式读取等）
+            source_ext = os.path.splitext(task.file_path)[1].lower()
+            cleaner = CleanerFactory.get_cleaner(source_ext)
+            # Parser 只负责将流转化为 Python 原生对象 (Dict/List)
+            parser = ParserFactory.get_parser(task.file_path, **cleaner.parser_options())
+
+            # 2. 依赖 Loader 获取原始字节流
+            # 根据 storage_type 调用不同的加载逻辑；以流的方式打开，配合流式解析器不整体读入内存
+            with trace_step("clean", "load"):
+                raw_stream = ContentLoader.open_stream(task.file_path, seekable=parser.requires_seekable)
+            fragment_path = None
+
+            # 3. 核心：使用 closing 确保 stream 无论成功失败都会被关闭
             with closing(raw_stream) as stream:
-                
-                # 3. 通过 Factory 获取解析器
-                # Parser 只负责将流转化为 Python 原生对象 (Dict/List)
-                parser = ParserFactory.get_parser(task.file_path)
-                raw_data = parser.parse(stream)
+                with trace_step("clean", "parse"):
+                    raw_data = parser.parse(stream)
                 
                 # 4. 业务逻辑：从解析后的数据中提取并清洗文本
                 # 注意：这里我们假设 raw_data 包含业务需要的字段，或直接是文本
-                source_ext = os.path.splitext(task.file_path)[1].lower()
-                cleaner = CleanerFactory.get_cleaner(source_ext)
             
-                for idx, nodes_data in enumerate(cleaner.clean(raw_data)):
-                    # 构造不同的保存路径，例如 test_part0.json, test_part1.json
-                    fragment_path = f"{target_root}_part{idx}{target_ext}"
+                # 清洗器逐个分片惰性产出，只统计产出分片本身的耗时；流式解析器的读取耗时也计入这里
+                cleaned = trace_iter(cleaner.clean(raw_data), "clean", "clean")
+                for idx, nodes_data in enumerate(cleaned):
+                    # 构造不同的保存路径，例如 test_part0.json, test_part1.json（扩展名随产物格式）
+                    fragment_path = self.transport.artifact_path(task.file_path, f"_part{idx}")
     
                     new_nodes: List[Node] = []
                     for c in nodes_data:
@@ -111,25 +132,23 @@ class CleanManager:
                             }
                     )
                     
-                    # 保存 (ContentSaver 只管存 dict)
-                    #saved_uri = ContentSaver.save_content(payload, fragment_path)
-                    ContentSaver.save_content(
-                        content=payload.model_dump_json(ensure_ascii=False),
-                        path=fragment_path,
-                        metadata=payload.metadata # 传入可选的 metadata
-                    )
-                    
+                    # 保存：小分片内联在消息中，大分片写入 fragment_path
                     # 每一部分都发送一条独立的消息到 MQ
                     # # 下游 Worker 会并行处理这些分片，效率极高
-                    output_message = TaskMessage(
-                        file_path=fragment_path,
-                        stage="clean_complete",
-                        trace_id=str(uuid.uuid4())
-                    )
-    
-                    self.publisher.produce(output_message.to_json())
+                    with trace_step("clean", "publish"):
+                        output_message = self.transport.publish(
+                            payload,
+                            path=fragment_path,
+                            stage="clean_complete",
+                            # 分片沿用源文件的 trace_id 加序号，按前缀即可找到同一文件的全部分片
+                            trace_id=f"{current_trace().trace_id}-{idx}"
+                        )
+                        stamp_message(output_message)
+
+                        self.publisher.produce(output_message)
 
-            self.consumer.ack(message.id)   
             self.logger.info(f"文档处理成功: {task.file_path} -> {fragment_path}")
+            return None
         except Exception as e:
-            self.logger.error(f"处理文档 {task.file_path} 时发生异常: {str(e)}", exc_info=True)
\ No newline at end of file
+            self.logger.error(f"处理文档 {task.file_path if 'task' in locals() else 'unknown'} 时发生异常: {str(e)}", exc_info=True)
+            return f"{type(e).__name__}: {e}"
\ No newline at end of file
@@ -1,37 +1,77 @@
+import itertools
 import os
-from typing import Any, Dict, Generator, Iterable, List
+from collections import deque
+from concurrent.futures import Future, ProcessPoolExecutor
+from typing import Any, Deque, Dict, Generator, Iterable, List, Optional
 from ..interface import BaseCleaner
-from newspaper import Article
+from ..HtmlExtractor import BaseTextExtractor, get_extractor
+
+CONTENT_COLS = ["title", "summary", "content"]
+META_COLS = ["author", "keyWord", "contentMentionRegionList",
+             "publishTime", "collectTime", "insertTime", "insertDate"]
+
+# 按 workers 数量缓存的进程池，跨文件复用，避免每个文件都重新 fork 并导入 newspaper
+_POOLS: Dict[int, ProcessPoolExecutor] = {}
+# 每个进程内按名称缓存提取器实例
+_EXTRACTORS: Dict[str, BaseTextExtractor] = {}
+
+def _get_pool(workers: int) -> ProcessPoolExecutor:
+    pool = _POOLS.get(workers)
+    if pool is None:
+        pool = ProcessPoolExecutor(max_workers=workers)
+        _POOLS[workers] = pool
+    return pool
+
+def _get_extractor(name: str) -> BaseTextExtractor:
+    extractor = _EXTRACTORS.get(name)
+    if extractor is None:
+        extractor = get_extractor(name)
+        _EXTRACTORS[name] = extractor
+    return extractor
+
+def clean_row(row: Dict[str, Any], extractor: str = "newspaper") -> Dict[str, Any]:
+    """清洗单行：拼接正文列并提取纯文本，不含 internal_id"""
+    raw_content = " | ".join([f"{k}: {v}" for k, v in row.items() if k in CONTENT_COLS])
+    return {
+        "page_content": _get_extractor(extractor).extract(raw_content),
+        "metadata": {k: row[k] for k in META_COLS if k in row}
+    }
+
+def clean_rows(rows: List[Dict[str, Any]], extractor: str = "newspaper") -> List[Dict[str, Any]]:
+    """子进程入口：一次处理一批行，减少进程间往返次数"""
+    return [clean_row(row, extractor) for row in rows]
 
 class ExcelCleaner(BaseCleaner):
     """
     Excel 清洗器：负责将原始行数据按分片大小切割。
     注意：它不再负责构建 Payload，只输出原始的 Node 数据字典列表。
+    workers > 1 时按 batch_rows 行一批分发到进程池并行清洗，结果按提交顺序取回，
+    分片顺序与 internal_id 编号和串行模式完全一致。
+    extractor 选择 HTML 正文提取方式："newspaper"（默认）或 "lxml"（轻量、快一个数量级）。
+    切换到 lxml 后，newspaper 提取为空的纯文本、短行会保留文本，差异见 HtmlTextExtractor。
+    streaming 为 True 时要求解析器逐行流式读取，配合生成器式的 clean 内存占用不随表格大小增长。
     """
-    def __init__(self, rows_per_file: int = 50):
+    def __init__(self, rows_per_file: int = 50, workers: int = 1, batch_rows: int = 200,
+                 extractor: str = "newspaper", streaming: bool = False):
+        # 提前校验名称，避免错误配置到子进程里才暴露
+        get_extractor(extractor)
         self.rows_per_file = rows_per_file
+        self.extractor = extractor
+        self.workers = workers if workers > 0 else (os.cpu_count() or 1)
+        self.batch_rows = batch_rows
+        self.streaming = streaming
+
+    def parser_options(self) -> Dict[str, Any]:
+        # 只读取清洗会用到的列
+        return {"streaming": self.streaming, "usecols": CONTENT_COLS + META_COLS}
 
     def clean(self, raw_rows: Iterable) -> Generator:
-        content_cols = ["title", "summary", "content"]
-        meta_cols = ["author", "keyWord", "contentMentionRegionList",
-                     "publishTime", "collectTime", "insertTime", "insertDate"]
-        
         nodes_data = []
-        chunk_idx = 0    
-        for i, row in enumerate(raw_rows):
-            # 1. 构造 Node 字典
-            raw_content = " | ".join([f"{k}: {v}" for k, v in row.items() if k in content_cols])
-            article = Article(url='', language='zh')
-            article.set_html(raw_content)
-            article.parse()
-            
-            nodes_data.append({
-                "page_content": article.text,
-                "metadata": {
-                    **{k: row[k] for k in meta_cols if k in row},
-                    "internal_id": f"part{chunk_idx}_{len(nodes_data)}"
-                }
-            })    
+        chunk_idx = 0
+        for node in self._cleaned_rows(raw_rows):
+            # 1. 编号在主进程中按顺序分配，保证结果确定
+            node["metadata"]["internal_id"] = f"part{chunk_idx}_{len(nodes_data)}"
+            nodes_data.append(node)
             # 2. 达到分片阈值时产出 (yield)
             if len(nodes_data) >= self.rows_per_file:
                 yield nodes_data
@@ -40,4 +80,26 @@ class ExcelCleaner(BaseCleaner):
         
         # 3. 产出剩余不足一个分片的数据
         if nodes_data:
-            yield nodes_data
\ No newline at end of file
+            yield nodes_data
+
+    def _cleaned_rows(self, raw_rows: Iterable) -> Generator:
+        """按原始顺序产出清洗后的行"""
+        if self.workers <= 1:
+            for row in raw_rows:
+                yield clean_row(row, self.extractor)
+            return
+
+        pool = _get_pool(self.workers)
+        rows = iter(raw_rows)
+        # 有界窗口：最多 2 * workers 个批次在途，既让进程池保持忙碌，又不会把整张表读入内存
+        pending: Deque[Future] = deque()
+        max_pending = self.workers * 2
+        while True:
+            while len(pending) < max_pending:
+                batch = list(itertools.islice(rows, self.batch_rows))
+                if not batch:
+                    break
+                pending.append(pool.submit(clean_rows, batch, self.extractor))
+            if not pending:
+                return
+            yield from pending.popleft().result()
@@ -1,24 +1,32 @@
-from typing import Generator, Iterable
+from typing import Any, Dict, Generator, Iterable
 from ..interface import BaseCleaner
 
 class JsonCleaner(BaseCleaner):
-    def __init__(self, nodes_per_file: int = 10):
+    """
+    JSON 清洗器：负责将原始元素按分片大小切割。
+    注意：它不再负责构建 Payload，只输出原始的 Node 数据字典列表。
+    streaming 为 True 时要求解析器逐个产出数组元素，读文件的同时即可产出分片。
+    """
+    def __init__(self, nodes_per_file: int = 10, streaming: bool = False):
         self.nodes_per_file = nodes_per_file
+        self.streaming = streaming
+
+    def parser_options(self) -> Dict[str, Any]:
+        return {"streaming": self.streaming}
 
     def clean(self, raw_rows: Iterable) -> Generator:
-        """
-        Excel 清洗器：负责将原始行数据按分片大小切割。
-        注意：它不再负责构建 Payload，只输出原始的 Node 数据字典列表。
-        """
-        if not isinstance(raw_data, list):
+        if isinstance(raw_rows, (dict, str, bytes)) or not isinstance(raw_rows, Iterable):
             # 如果不是列表，强行包装成列表处理
-            raw_data = [raw_data]
+            raw_rows = [raw_rows]
 
         nodes_data = []
         chunk_idx = 0    
-        for i, row in enumerate(raw_rows):
+        for row in raw_rows:
             # 1. 构造 Node 字典
-            content_str = " ".join([str(v) for v in row.values()])
+            if isinstance(row, dict):
+                content_str = " ".join([str(v) for v in row.values()])
+            else:
+                content_str = str(row)
             
             nodes_data.append({
                 "page_content": content_str,
@@ -34,4 +42,4 @@ class JsonCleaner(BaseCleaner):
         
         # 3. 产出剩余不足一个分片的数据
         if nodes_data:
-            yield nodes_data
\ No newline at end of file
+            yield nodes_data
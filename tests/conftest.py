@@ -0,0 +1,43 @@
+import fakeredis
+import pytest
+
+from database.asyncRedisMessageQueue import AsyncRedisMessageQueue
+from database.redisMemoryMessageQueue import RedisMessageQueue
+
+QUEUE_CONFIG = {"topic": "tasks", "group": "workers", "consumer_name": "worker_1", "block_ms": 10}
+
+
+@pytest.fixture
+def redis_server():
+    return fakeredis.FakeServer()
+
+
+@pytest.fixture
+def make_queue(redis_server, monkeypatch):
+    """创建连接到同一个 fakeredis 的 RedisMessageQueue；多个实例即同组内的多个消费者"""
+    monkeypatch.setattr(
+        "database.redisMemoryMessageQueue.redis.Redis",
+        lambda **kwargs: fakeredis.FakeRedis(server=redis_server, decode_responses=True)
+    )
+
+    def make(**config) -> RedisMessageQueue:
+        queue = RedisMessageQueue()
+        queue.connect({**QUEUE_CONFIG, **config})
+        return queue
+    return make
+
+
+@pytest.fixture
+def make_async_queue(redis_server, monkeypatch):
+    """AsyncRedisMessageQueue 版本的 make_queue，需在 asyncio.run 的事件循环内调用"""
+    monkeypatch.setattr(AsyncRedisMessageQueue, "_get_pool", classmethod(lambda cls, config: None))
+    monkeypatch.setattr(
+        "database.asyncRedisMessageQueue.aioredis.Redis",
+        lambda **kwargs: fakeredis.FakeAsyncRedis(server=redis_server, decode_responses=True)
+    )
+
+    async def make(**config) -> AsyncRedisMessageQueue:
+        queue = AsyncRedisMessageQueue()
+        await queue.connect({**QUEUE_CONFIG, **config})
+        return queue
+    return make
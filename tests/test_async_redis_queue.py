@@ -0,0 +1,226 @@
+import asyncio
+from unittest import mock
+
+import redis
+
+
+async def pending_ids(queue):
+    entries = await queue.client.xpending_range(queue.stream, queue.group, min="-", max="+", count=100)
+    return [e["message_id"] for e in entries]
+
+
+def test_consume_batch_and_multi_id_ack(make_async_queue):
+    async def scenario():
+        queue = await make_async_queue()
+        for i in range(5):
+            await queue.produce({"n": i})
+
+        first = await queue.consume_batch(3)
+        second = await queue.consume_batch(10, 0)
+        assert [m.data["n"] for m in first + second] == [0, 1, 2, 3, 4]
+
+        with mock.patch.object(queue.client, "xack", wraps=queue.client.xack) as xack:
+            assert await queue.ack_batch([m.id for m in first + second]) == 5
+        xack.assert_called_once()
+        assert await pending_ids(queue) == []
+        assert queue._pel.delivered == set()
+        assert await queue.consume_batch(10, 0) == []
+
+    asyncio.run(scenario())
+
+
+def test_in_flight_messages_not_redelivered(make_async_queue):
+    async def scenario():
+        queue = await make_async_queue(retry_backoff_ms=0)
+        for i in range(3):
+            await queue.produce({"n": i})
+
+        first = await queue.consume_batch(2)
+        # 前两条仍在处理中，退避已到期也不会从 PEL 重投
+        queue._pel.check_pending = True
+        (third,) = await queue.consume_batch(10, 0)
+        assert third.data["n"] == 2
+
+        assert await queue.ack(first[0].id)
+        assert await queue.ack_batch([first[1].id, third.id]) == 2
+        assert await queue.consume_batch(10, 0) == []
+
+    asyncio.run(scenario())
+
+
+def test_unacked_messages_redelivered_after_restart(make_async_queue):
+    async def scenario():
+        queue = await make_async_queue()
+        await queue.produce({"n": 0})
+        (message,) = await queue.consume_batch(10)
+
+        restarted = await make_async_queue(retry_backoff_ms=0)
+        (again,) = await restarted.consume_batch(10, 0)
+        assert again.id == message.id
+        assert again.delivery_count == 2
+
+    asyncio.run(scenario())
+
+
+
+def test_reclaims_messages_stranded_on_dead_consumer(make_async_queue):
+    async def scenario():
+        dead = await make_async_queue(consumer_name="worker_old")
+        for i in range(2):
+            await dead.produce({"n": i})
+        stranded = await dead.consume_batch(10)
+
+        live = await make_async_queue(reclaim_idle_ms=50, reclaim_interval_ms=0)
+        assert await live.consume_batch(10, 0) == []
+        await asyncio.sleep(0.06)
+
+        reclaimed = await live.consume_batch(10, 0)
+        assert [m.id for m in reclaimed] == [m.id for m in stranded]
+        assert all(m.delivery_count == 2 for m in reclaimed)
+        assert live.reclaimed_total == 2
+        assert await live.ack_batch([m.id for m in reclaimed]) == 2
+        assert await pending_ids(live) == []
+
+    asyncio.run(scenario())
+
+
+def test_reclaim_skips_own_in_flight_messages(make_async_queue):
+    async def scenario():
+        queue = await make_async_queue(reclaim_idle_ms=50, reclaim_interval_ms=0)
+        await queue.produce({"n": 0})
+        (message,) = await queue.consume_batch(10)
+        await asyncio.sleep(0.06)
+
+        assert await queue.consume_batch(10, 0) == []
+        assert queue.reclaimed_total == 0
+        assert await queue.ack(message.id)
+
+    asyncio.run(scenario())
+
+
+def test_failed_message_backs_off_then_dead_letters(make_async_queue):
+    async def scenario():
+        queue = await make_async_queue(max_deliveries=2, retry_backoff_ms=50)
+        await queue.produce({"n": 0})
+        (failed,) = await queue.consume_batch(10)
+        assert not await queue.nack(failed, "first", stage="enrich")
+
+        await queue.produce({"n": 1})
+        (healthy,) = await queue.consume_batch(10, 0)
+        assert healthy.data["n"] == 1
+        await queue.ack(healthy.id)
+
+        await asyncio.sleep(0.06)
+        (retried,) = await queue.consume_batch(10, 0)
+        assert retried.id == failed.id
+        assert retried.delivery_count == 2
+
+        with mock.patch.object(queue.client, "pipeline", wraps=queue.client.pipeline) as pipeline:
+            assert await queue.nack(retried, "second", stage="enrich")
+        pipeline.assert_called_once_with(transaction=True)
+
+        ((_, entry),) = await queue.client.xrange(queue.dlq_topic)
+        assert (entry["error"], entry["stage"], entry["source_id"]) == ("second", "enrich", failed.id)
+        assert await pending_ids(queue) == []
+        assert queue.dead_lettered_total == 1
+
+    asyncio.run(scenario())
+
+
+def test_ack_keeps_scanning_while_retry_is_waiting(make_async_queue):
+    async def scenario():
+        queue = await make_async_queue(retry_backoff_ms=50)
+        await queue.produce({"n": 0})
+        (failed,) = await queue.consume_batch(10)
+        assert not await queue.nack(failed, "boom", stage="enrich")
+
+        await queue.produce({"n": 1})
+        (healthy,) = await queue.consume_batch(10, 0)
+        assert await queue.ack(healthy.id)
+        # 确认健康消息后仍有退避中的失败消息，继续检查 PEL
+        assert queue._pel.check_pending
+
+        await asyncio.sleep(0.06)
+        (retried,) = await queue.consume_batch(10, 0)
+        assert retried.id == failed.id
+
+    asyncio.run(scenario())
+
+
+def test_unacked_message_past_limit_is_dead_lettered(make_async_queue):
+    async def scenario():
+        crashed = await make_async_queue(max_deliveries=1)
+        await crashed.produce({"n": 0})
+        (message,) = await crashed.consume_batch(10)
+
+        restarted = await make_async_queue(max_deliveries=1, retry_backoff_ms=0)
+        assert await restarted.consume_batch(10, 0) == []
+        ((_, entry),) = await restarted.client.xrange(restarted.dlq_topic)
+        assert entry["source_id"] == message.id
+
+    asyncio.run(scenario())
+
+
+def test_produce_pauses_without_blocking_event_loop(make_async_queue):
+    async def scenario():
+        producer = await make_async_queue(high_water=3, low_water=1, flow_check_interval_ms=10)
+        consumer = await make_async_queue()
+        for i in range(3):
+            await producer.produce({"n": i})
+
+        async def drain():
+            await asyncio.sleep(0.05)
+            await consumer.ack_batch([m.id for m in await consumer.consume_batch(10, 0)])
+
+        # 暂停期间同一事件循环里的消费者照常推进
+        await asyncio.gather(producer.produce({"n": 3}), drain())
+        assert producer.throttled_seconds >= 0.04
+        assert await producer.client.xlen(producer.stream) == 4
+        assert await producer.downstream_depth() == 1
+
+    asyncio.run(scenario())
+
+
+def test_pause_is_capped_by_max_pause_ms(make_async_queue):
+    async def scenario():
+        producer = await make_async_queue(high_water=2, flow_check_interval_ms=10, max_pause_ms=50)
+        for i in range(2):
+            await producer.produce({"n": i})
+        await producer.produce({"n": 2})
+        assert 0.05 <= producer.throttled_seconds < 1
+        assert await producer.client.xlen(producer.stream) == 3
+
+    asyncio.run(scenario())
+
+
+def test_trim_acked_removes_entries_below_oldest_pending(make_async_queue):
+    async def scenario():
+        producer = await make_async_queue(trim_acked=True, flow_check_interval_ms=0)
+        consumer = await make_async_queue()
+        ids = [await producer.client.xadd(producer.stream, {"payload": str(i)}) for i in range(250)]
+
+        consumed = await consumer.consume_batch(150)
+        await consumer.ack_batch([m.id for m in consumed[:120]])
+        await producer.produce({"n": 250})
+        entries = await producer.client.xrange(producer.stream)
+        assert entries[0][0] == ids[100]
+        assert len(entries) == 151
+
+    asyncio.run(scenario())
+
+
+def test_failed_ack_releases_in_flight_id_for_redelivery(make_async_queue):
+    async def scenario():
+        queue = await make_async_queue(retry_backoff_ms=0)
+        await queue.produce({"n": 0})
+        (message,) = await queue.consume_batch(10)
+
+        with mock.patch.object(queue.client, "xack", side_effect=redis.exceptions.ConnectionError("down")):
+            assert await queue.ack_batch([message.id]) == 0
+        # 失败的 ID 不再视为处理中，留在 PEL 中按退避规则重投
+        assert queue._pel.delivered == set()
+
+        (again,) = await queue.consume_batch(10, 0)
+        assert again.id == message.id
+
+    asyncio.run(scenario())
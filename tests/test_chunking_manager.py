@@ -0,0 +1,73 @@
+import pytest
+
+from chunking.manager import ChunkingManager
+from constants import ChunkMethod
+from database.MemoryMessageQueue import MemoryMessageQueue
+from database.message import TaskMessage
+from files.DocumentFormat import ContentBody, Node, PipelineInstructions, RAGTaskPayload
+from files.PayloadTransport import PayloadTransport
+from index.manager import IngestionManager
+
+
+class FakeEmbedService:
+    def get_embeddings(self, texts):
+        return [[float(len(t)), 1.0] for t in texts]
+
+
+@pytest.fixture
+def queues(monkeypatch):
+    monkeypatch.setattr(MemoryMessageQueue, "_topic_queues", {})
+    consumer, publisher = MemoryMessageQueue(), MemoryMessageQueue()
+    consumer.connect({"topic": "clean"})
+    publisher.connect({"topic": "chunk"})
+    return consumer, publisher
+
+
+def chunk_payload(consumer, publisher, nodes, method=ChunkMethod.FIXED_SIZE, embed_service=None):
+    transport = PayloadTransport(in_memory=True)
+    payload = RAGTaskPayload(content=ContentBody(
+        pipeline_instructions=PipelineInstructions(chunk_method=method, chunk_size=50, chunk_overlap=0),
+        nodes=nodes
+    ))
+    consumer.produce(transport.publish(payload, path="/data/a_part0.json", stage="clean", trace_id=None))
+
+    manager = ChunkingManager(consumer, publisher, block_ms=0, embed_service=embed_service, transport=transport)
+    assert manager.process_task()
+    task = TaskMessage.from_json(publisher.consume().data)
+    return task, transport.load(task)
+
+
+def test_each_chunk_gets_its_own_internal_id(queues):
+    long_row = "".join(f"第{i}句话说明一些情况。" for i in range(300))
+    nodes = [
+        Node(page_content=long_row, metadata={"internal_id": "part0_0", "author": "a"}),
+        Node(page_content="短句。", metadata={"internal_id": "part0_1"}),
+    ]
+    task, payload = chunk_payload(*queues, nodes)
+
+    ids = [n.metadata["internal_id"] for n in payload.content.nodes]
+    assert len(ids) > 2
+    assert len(set(ids)) == len(ids)
+    # 切成多块的节点按块编号，只有一块的保持原 ID
+    assert ids[:-1] == [f"part0_0_c{j}" for j in range(len(ids) - 1)]
+    assert ids[-1] == "part0_1"
+    assert all(n.metadata["author"] == "a" for n in payload.content.nodes[:-1])
+
+    # 入库阶段由 file_path:internal_id 得到的 chunk_id 互不相同
+    indexer = IngestionManager(mq=None, embed_service=FakeEmbedService())
+    text_nodes = indexer._build_nodes(payload, task)
+    assert len({n.id_ for n in text_nodes}) == len(payload.content.nodes)
+
+
+def test_semantic_chunks_are_embedded_from_text_at_index_time(queues):
+    text = "".join(f"第{i}句话{'说明' * (i % 5)}一些情况。" for i in range(60))
+    embed = FakeEmbedService()
+    task, payload = chunk_payload(*queues, [Node(page_content=text, metadata={"internal_id": "part0_0"})],
+                                  method=ChunkMethod.SEMANTIC, embed_service=embed)
+
+    assert len(payload.content.nodes) > 1
+    # 句子向量只用于断句，不随载荷下发
+    assert all(set(n.metadata) == {"internal_id", "strategy"} for n in payload.content.nodes)
+
+    text_nodes = IngestionManager(mq=None, embed_service=embed)._build_nodes(payload, task)
+    assert [n.embedding for n in text_nodes] == embed.get_embeddings([n.text for n in text_nodes])
@@ -0,0 +1,112 @@
+import sqlite3
+import time
+
+import pytest
+
+from enrich.Deduplicator import NearDuplicateDetector
+from files.DocumentFormat import Node
+
+TEXT = "".join(f"第{i}条新闻报道了城市交通建设的最新进展和居民的反馈意见。" for i in range(20))
+OTHER = "".join(f"第{i}场比赛中主队凭借出色的防守赢得了胜利。" for i in range(20))
+
+
+def enrich(nodes, ok=True):
+    """模拟 EnrichmentMaster：成功时写入 summary，失败时保持原样"""
+    for node in nodes:
+        if ok:
+            node.metadata["summary"] = f"摘要:{node.page_content[:4]}"
+
+
+def run(detector, nodes, ok=True, scope="a_part0.json"):
+    plan = detector.plan(nodes, scope)
+    enrich(plan.to_enrich, ok)
+    dropped = detector.commit(plan)
+    return plan, dropped
+
+
+def test_copy_mode_reuses_canonical_result():
+    detector = NearDuplicateDetector(mode="copy")
+    first, dup = Node(page_content=TEXT), Node(page_content=TEXT)
+    plan, dropped = run(detector, [first, dup])
+
+    assert plan.to_enrich == [first]
+    assert dropped == [] and plan.retry == []
+    assert dup.metadata["summary"] == first.metadata["summary"]
+    assert "duplicate_of" in dup.metadata
+
+
+@pytest.mark.parametrize("mode", ["copy", "drop"])
+def test_duplicate_of_failed_canonical_is_retried(mode):
+    detector = NearDuplicateDetector(mode=mode)
+    first, dup = Node(page_content=TEXT), Node(page_content=TEXT)
+    plan, dropped = run(detector, [first, dup], ok=False)
+
+    # 规范节点没有结果：重复节点既不剔除也不复制，交给调用方单独丰富化
+    assert dropped == []
+    assert plan.retry == [dup]
+    assert "duplicate_of" not in dup.metadata
+
+
+def test_drop_mode_drops_duplicates_of_enriched_canonical():
+    detector = NearDuplicateDetector(mode="drop")
+    first, dup = Node(page_content=TEXT), Node(page_content=TEXT)
+    _, dropped = run(detector, [first, dup])
+    assert dropped == [dup]
+
+    # 其它分片中的相同内容命中已登记的规范节点
+    later = Node(page_content=TEXT)
+    plan, dropped = run(detector, [later, Node(page_content=OTHER)], scope="b_part0.json")
+    assert dropped == [later]
+    assert len(plan.to_enrich) == 1
+
+
+@pytest.mark.parametrize("mode", ["copy", "drop"])
+def test_replayed_fragment_does_not_match_itself(mode):
+    detector = NearDuplicateDetector(mode=mode)
+    run(detector, [Node(page_content=TEXT), Node(page_content=OTHER)])
+
+    # 同一分片重投：每个节点都与自己上次登记的签名相同，不能被当作重复剔除
+    replay = [Node(page_content=TEXT), Node(page_content=OTHER)]
+    plan, dropped = run(detector, replay)
+    assert plan.to_enrich == replay
+    assert dropped == [] and plan.duplicates == []
+
+
+def count(detector, table):
+    return detector._db.execute(f"SELECT COUNT(*) FROM {table}").fetchone()[0]
+
+
+def test_index_is_bounded_by_max_entries():
+    detector = NearDuplicateDetector(mode="drop", max_entries=2, evict_every=1)
+    texts = [TEXT, OTHER, "".join(f"第{i}届展会吸引了大量海外采购商前来洽谈合作。" for i in range(20))]
+    for i, text in enumerate(texts):
+        run(detector, [Node(page_content=text)], scope=f"part{i}")
+
+    assert count(detector, "signatures") == 2
+    assert count(detector, "lsh_bands") == 2 * detector.bands
+    # 最早登记的规范节点被淘汰，同样的内容重新丰富化
+    plan, dropped = run(detector, [Node(page_content=TEXT)], scope="part3")
+    assert dropped == [] and len(plan.to_enrich) == 1
+
+
+def test_index_entries_expire_after_ttl():
+    detector = NearDuplicateDetector(mode="drop", ttl_seconds=60, evict_every=1)
+    run(detector, [Node(page_content=TEXT)])
+    detector._db.execute("UPDATE signatures SET used_at = ?", (time.time() - 120,))
+
+    run(detector, [Node(page_content=OTHER)])
+    assert count(detector, "signatures") == 1
+    assert count(detector, "lsh_bands") == detector.bands
+
+
+def test_upgrades_index_without_used_at(tmp_path):
+    path = str(tmp_path / "dedup.db")
+    db = sqlite3.connect(path)
+    db.execute("CREATE TABLE signatures (node_key TEXT PRIMARY KEY, signature BLOB NOT NULL, metadata TEXT)")
+    db.execute("INSERT INTO signatures VALUES ('k', x'00', NULL)")
+    db.commit()
+    db.close()
+
+    detector = NearDuplicateDetector(db_path=path)
+    used_at = detector._db.execute("SELECT used_at FROM signatures").fetchone()[0]
+    assert used_at > 0
@@ -0,0 +1,54 @@
+import asyncio
+import time
+
+import fakeredis
+import pytest
+
+from enrich.EnrichmentCache import RedisEnrichmentCache
+
+
+@pytest.fixture
+def make_cache(redis_server, monkeypatch):
+    monkeypatch.setattr(
+        "enrich.EnrichmentCache.aioredis.Redis",
+        lambda **kwargs: fakeredis.FakeAsyncRedis(server=redis_server, decode_responses=True)
+    )
+    return lambda **kwargs: RedisEnrichmentCache({}, **kwargs)
+
+
+async def members(cache):
+    return await cache.client.zrange(cache._index_key, 0, -1)
+
+
+def test_eviction_follows_recent_reads(make_cache):
+    async def scenario():
+        cache = make_cache(max_entries=2)
+        await cache.set("a", {"summary": "a"})
+        await cache.set("b", {"summary": "b"})
+        # 读取 a 后 b 成为最久未访问的条目
+        assert await cache.get("a") == {"summary": "a"}
+        await cache.set("c", {"summary": "c"})
+
+        assert await cache.get("b") is None
+        assert await cache.get("a") == {"summary": "a"}
+        assert sorted(await members(cache)) == ["a", "c"]
+
+    asyncio.run(scenario())
+
+
+def test_members_of_expired_keys_are_dropped(make_cache):
+    async def scenario():
+        cache = make_cache(ttl_seconds=60)
+        await cache.set("stale", {"summary": "s"})
+        await cache.set("gone", {"summary": "g"})
+        # 模拟 EX 过期：键已不存在，ZSET 成员仍在
+        await cache.client.delete("enrich_cache:stale", "enrich_cache:gone")
+        await cache.client.zadd(cache._index_key, {"stale": time.time() - 120})
+
+        # 未命中时删除残留成员
+        assert await cache.get("gone") is None
+        # 写入时清理超过 ttl 未被访问的成员
+        await cache.set("fresh", {"summary": "f"})
+        assert await members(cache) == ["fresh"]
+
+    asyncio.run(scenario())
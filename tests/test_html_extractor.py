@@ -0,0 +1,82 @@
+import pytest
+
+from benchmarks.bench_clean import excel_rows
+from rawclean.HtmlExtractor import HtmlTextExtractor, get_extractor
+from rawclean.strategies.ExcelClean import clean_row
+
+pytest.importorskip("newspaper")
+
+P1 = "记者从市政府新闻发布会上了解到，今年全市将继续加大对老旧小区改造的投入力度，计划完成改造项目一百二十个。"
+P2 = "据介绍，改造内容主要包括外墙保温、管网更新以及加装电梯等，惠及居民约三万户，预计年底前全部完工。"
+P3 = "有关负责人表示，将在改造过程中充分听取居民意见，确保工程质量和施工安全，切实提升群众的获得感。"
+
+# newspaper 能识别出正文的行：两种提取器输出应完全相同
+BODY_ROWS = [
+    {"title": "老旧小区改造", "summary": "全市推进改造", "content": f"<p>{P1}</p><p>{P2}</p>"},
+    {"title": "老旧小区改造", "content": (
+        "<html><body><article><h2>小标题</h2>"
+        f"<p>{P1}</p><p>{P2}<br>{P3}</p>"
+        "</article></body></html>"
+    )},
+    {"title": "老旧小区改造", "content": (
+        f"<script>var a = 1;</script><style>p {{color: red}}</style><!-- 广告 --><p>{P1}</p><p>{P3}</p>"
+    )},
+]
+
+# newspaper 判定为非正文、提取为空串的行：lxml 保留文本
+NON_BODY_ROWS = [
+    {"title": "通知", "content": "<p>详见附件。</p>"},
+    {"title": "通知", "summary": "简讯", "content": P1},
+    {"title": "t", "content": f"<ul><li>{P1}</li><li>{P2}</li></ul>"},
+    {"title": "今日天气"},
+]
+
+
+def extract_both(row):
+    return clean_row(row, "newspaper")["page_content"], clean_row(row, "lxml")["page_content"]
+
+
+@pytest.mark.parametrize("row", BODY_ROWS)
+def test_lxml_matches_newspaper_on_body_rows(row):
+    newspaper_text, lxml_text = extract_both(row)
+    assert newspaper_text
+    assert lxml_text == newspaper_text
+
+
+def test_lxml_matches_newspaper_on_generated_rows():
+    for row in excel_rows(50):
+        newspaper_text, lxml_text = extract_both(row)
+        assert lxml_text == newspaper_text
+
+
+@pytest.mark.parametrize("row", NON_BODY_ROWS)
+def test_lxml_keeps_rows_newspaper_drops(row):
+    newspaper_text, lxml_text = extract_both(row)
+    assert newspaper_text == ""
+    assert lxml_text
+
+
+def test_lxml_strips_boilerplate_inside_body():
+    row = {"title": "老旧小区改造", "content": (
+        "<div><nav>首页 | 新闻 | 联系我们</nav>"
+        f"<p>{P1}</p><p>{P2}</p>"
+        "<footer>版权所有 © 2026 本网站</footer></div>"
+    )}
+    newspaper_text, lxml_text = extract_both(row)
+
+    assert lxml_text == f"{P1}\n\n{P2}"
+    # newspaper 把正文容器内的导航、页脚文字也当作正文
+    assert "首页" in newspaper_text and "版权所有" in newspaper_text
+    assert set(lxml_text.split("\n\n")) < set(newspaper_text.split("\n\n"))
+
+
+def test_lxml_edge_inputs():
+    extractor = HtmlTextExtractor()
+    assert extractor.extract("") == ""
+    assert extractor.extract("   ") == ""
+    assert extractor.extract("a  <b>bold</b>   text") == "a bold text"
+
+
+def test_unknown_extractor():
+    with pytest.raises(ValueError):
+        get_extractor("readability")
@@ -0,0 +1,52 @@
+import io
+import json
+
+import pytest
+
+from files.JsonFileParser import JsonParser
+
+VALUES = ["12e5", "12.5", "-1.25E+3", "0", "-7", '"ab\\"c\\u4e2d"', '"中文字符串"', "true", "false", "null",
+          '{"k": [1, 2.5e-3, {"n": null}]}', "[]"]
+
+
+def parse_streaming(text: str):
+    return list(JsonParser(streaming=True).parse(io.BytesIO(text.encode("utf-8"))))
+
+
+@pytest.fixture
+def small_reads(monkeypatch):
+    monkeypatch.setattr(JsonParser, "READ_SIZE", 7)
+
+
+@pytest.mark.parametrize("value", VALUES)
+def test_value_split_at_every_read_boundary(small_reads, value):
+    # 用不同长度的前缀把值滑过每一个读取边界
+    for pad in range(JsonParser.READ_SIZE + len(value)):
+        text = f'["{"x" * pad}", {value}, {value},3]'
+        assert parse_streaming(text) == json.loads(text), pad
+
+
+def test_default_read_size_number_at_boundary():
+    for value in ("12e5", "12.5", "-1.25E+3"):
+        for pad in range(JsonParser.READ_SIZE - 12, JsonParser.READ_SIZE):
+            text = f'["{"x" * pad}", {value}, 3]'
+            assert parse_streaming(text) == json.loads(text)
+
+
+def test_streaming_matches_json_load(small_reads):
+    rows = [{"id": i, "score": i / 3, "tags": ["a", "b"], "ok": i % 2 == 0} for i in range(50)]
+    text = json.dumps(rows, ensure_ascii=False, indent=2)
+    assert parse_streaming(text) == rows
+    assert JsonParser().parse(io.BytesIO(text.encode("utf-8"))) == rows
+
+
+def test_non_array_top_level_yields_single_element(small_reads):
+    assert parse_streaming(' {"a": 1} ') == [{"a": 1}]
+    assert parse_streaming("[]") == []
+    assert parse_streaming("") == []
+
+
+@pytest.mark.parametrize("text", ["[1, 2", "[1,, 2]", "[1, 2,]", "[1 2]", "[1x, 2]", "[tru]"])
+def test_invalid_array_raises(small_reads, text):
+    with pytest.raises(ValueError):
+        parse_streaming(text)
@@ -0,0 +1,73 @@
+import asyncio
+import time
+
+import pytest
+
+from database.MemoryMessageQueue import MemoryMessageQueue
+from database.asyncMemoryMessageQueue import AsyncMemoryMessageQueue
+
+
+@pytest.fixture(autouse=True)
+def isolated_topics(monkeypatch):
+    monkeypatch.setattr(MemoryMessageQueue, "_topic_queues", {})
+
+
+def make_queue(**config) -> MemoryMessageQueue:
+    queue = MemoryMessageQueue()
+    queue.connect({"topic": "tasks", **config})
+    return queue
+
+
+def test_nack_without_max_deliveries_drops_message():
+    queue = make_queue()
+    queue.produce({"n": 0})
+    (message,) = queue.consume_batch(10)
+    assert queue.nack(message, "boom", stage="chunk")
+    assert queue.consume_batch(10, 0) == [] and queue.qsize() == 0
+
+
+def test_failed_message_backs_off_then_is_dropped():
+    queue = make_queue(max_deliveries=2, retry_backoff_ms=50)
+    queue.produce({"n": 0})
+    (failed,) = queue.consume_batch(10)
+    assert not queue.nack(failed, "first", stage="chunk")
+    assert queue.qsize() == 1
+
+    # 退避期间其它消息照常消费
+    queue.produce({"n": 1})
+    (healthy,) = queue.consume_batch(10, 0)
+    assert healthy.data["n"] == 1
+    assert queue.consume_batch(10, 0) == []
+
+    # 阻塞等待在重投到期时返回，不必等满 block_ms
+    start = time.monotonic()
+    (retried,) = queue.consume_batch(10, 5000)
+    assert time.monotonic() - start < 1
+    assert (retried.id, retried.data, retried.delivery_count) == (failed.id, failed.data, 2)
+
+    assert queue.nack(retried, "second", stage="chunk")
+    assert queue.qsize() == 0
+
+
+def test_bounded_queue_nack_does_not_block_when_full():
+    queue = make_queue(max_size=1, max_deliveries=3, retry_backoff_ms=0)
+    queue.produce({"n": 0})
+    (failed,) = queue.consume_batch(1)
+    queue.produce({"n": 1})
+
+    assert not queue.nack(failed, "boom", stage="index")
+    assert [m.data["n"] for m in queue.consume_batch(10, 0)] == [0, 1]
+
+
+def test_async_adapter_redelivers_nacked_message():
+    async def scenario():
+        queue = AsyncMemoryMessageQueue()
+        await queue.connect({"topic": "tasks", "max_deliveries": 2, "retry_backoff_ms": 20})
+        await queue.produce({"n": 0})
+        (failed,) = await queue.consume_batch(10)
+        assert not await queue.nack(failed, "boom", stage="enrich")
+
+        (retried,) = await queue.consume_batch(10, 1000)
+        assert retried.id == failed.id and retried.delivery_count == 2
+
+    asyncio.run(scenario())
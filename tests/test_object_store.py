@@ -0,0 +1,151 @@
+import json
+
+import pytest
+from moto import mock_aws
+
+from files.ContentLoaderFactory import ContentLoader
+from files.ContentSaverFactory import ContentSaver
+from files.JsonFileParser import JsonParser
+from files.ObjectStore import ObjectPrefetcher, S3ClientPool, split_s3_path
+
+BUCKET = "rag-test"
+# moto 与 S3 一样要求除最后一片外每片不小于 5 MB
+PART_SIZE = 5 * 1024 * 1024
+
+
+@pytest.fixture
+def s3(monkeypatch):
+    monkeypatch.setenv("AWS_ACCESS_KEY_ID", "testing")
+    monkeypatch.setenv("AWS_SECRET_ACCESS_KEY", "testing")
+    monkeypatch.setenv("AWS_DEFAULT_REGION", "us-east-1")
+    options = dict(S3ClientPool._options)
+    monkeypatch.setattr(ContentLoader, "prefetcher", ObjectPrefetcher())
+    with mock_aws():
+        S3ClientPool.configure(
+            region_name="us-east-1",
+            multipart_threshold=PART_SIZE,
+            multipart_chunksize=PART_SIZE,
+            max_concurrency=2,
+        )
+        client = S3ClientPool.get_client()
+        client.create_bucket(Bucket=BUCKET)
+        yield client
+    S3ClientPool.configure(**options)
+
+
+def s3_path(key: str) -> str:
+    return f"s3://{BUCKET}/{key}"
+
+
+def test_round_trip_text_and_bytes(s3):
+    ContentSaver.save_content("中文内容", s3_path("a/text.json"))
+    ContentSaver.save_content(b"\x00\x01binary", s3_path("a/blob.bin"))
+
+    assert ContentLoader.load_content(s3_path("a/text.json")).getvalue() == "中文内容".encode("utf-8")
+    assert ContentLoader.load_content(s3_path("a/blob.bin")).getvalue() == b"\x00\x01binary"
+
+
+def test_multipart_upload_and_download(s3):
+    data = bytes(range(256)) * (PART_SIZE * 2 // 256 + 1000)
+    path = s3_path("big/object.bin")
+    ContentSaver.save_content(data, path)
+
+    # 分片上传的 ETag 形如 "<md5>-<分片数>"
+    etag = s3.head_object(Bucket=BUCKET, Key="big/object.bin")["ETag"].strip('"')
+    assert etag.endswith("-3")
+
+    assert ContentLoader.load_content(path).getvalue() == data
+    with ContentLoader.open_stream(path, seekable=True) as stream:
+        assert stream.read() == data
+    with ContentLoader.open_stream(path) as stream:
+        assert stream.read() == data
+
+
+def test_failed_multipart_upload_is_aborted(s3):
+    def fail_upload_part(**kwargs):
+        raise ConnectionError("network down")
+
+    s3.meta.events.register("before-call.s3.UploadPart", fail_upload_part)
+    try:
+        with pytest.raises(Exception):
+            ContentSaver.save_content(b"x" * (PART_SIZE * 2), s3_path("big/failed.bin"))
+    finally:
+        s3.meta.events.unregister("before-call.s3.UploadPart", fail_upload_part)
+
+    # 失败的分片上传已中止，不会在桶里留下未完成的上传或残缺对象
+    assert not s3.list_multipart_uploads(Bucket=BUCKET).get("Uploads")
+    assert "Contents" not in s3.list_objects_v2(Bucket=BUCKET)
+
+
+def test_missing_object_raises_file_not_found(s3):
+    path = s3_path("missing.json")
+    with pytest.raises(FileNotFoundError):
+        ContentLoader.load_content(path)
+    with pytest.raises(FileNotFoundError):
+        ContentLoader.open_stream(path)
+    with pytest.raises(FileNotFoundError):
+        ContentLoader.open_stream(path, seekable=True)
+
+
+def test_open_stream_feeds_streaming_parser(s3):
+    rows = [{"id": i, "text": f"第 {i} 段"} for i in range(1000)]
+    path = s3_path("docs/rows.json")
+    ContentSaver.save_content(json.dumps(rows, ensure_ascii=False), path)
+
+    # 解析器直接读取 get_object 的响应体，不经过整体下载
+    with ContentLoader.open_stream(path) as stream:
+        assert list(JsonParser(streaming=True).parse(stream)) == rows
+
+
+def test_prefetch_is_taken_by_load(s3):
+    path = s3_path("docs/next.json")
+    ContentSaver.save_content(b"{}", path)
+
+    ContentLoader.prefetch(path)
+    assert ContentLoader.load_content(path).getvalue() == b"{}"
+    assert ContentLoader.prefetcher.hits == 1
+
+    # 预取结果只取用一次，之后直接下载
+    assert ContentLoader.load_content(path).getvalue() == b"{}"
+    assert ContentLoader.prefetcher.misses == 1
+
+
+def test_prefetch_error_surfaces_on_load(s3):
+    path = s3_path("docs/gone.json")
+    ContentLoader.prefetch(path)
+    with pytest.raises(FileNotFoundError):
+        ContentLoader.load_content(path)
+
+
+def test_prefetch_skips_local_paths(tmp_path):
+    assert not ContentLoader.can_prefetch(str(tmp_path / "a.json"))
+    assert ContentLoader.can_prefetch("s3://bucket/a.json")
+
+
+def test_prefetcher_evicts_oldest_pending():
+    prefetcher = ObjectPrefetcher(max_workers=1, max_pending=2)
+    for name in ("a", "b", "c"):
+        prefetcher.submit(name, lambda path: path.upper())
+
+    assert prefetcher.take("a") is None
+    assert prefetcher.take("b") == "B"
+    assert prefetcher.take("c") == "C"
+    assert (prefetcher.hits, prefetcher.misses) == (2, 1)
+
+
+def test_client_pool_shares_and_rebuilds_client(s3):
+    client = S3ClientPool.get_client()
+    assert S3ClientPool.get_client() is client
+
+    S3ClientPool.configure(max_pool_connections=4)
+    assert S3ClientPool.get_client() is not client
+
+    with pytest.raises(ValueError):
+        S3ClientPool.configure(unknown_option=1)
+
+
+def test_split_s3_path():
+    assert split_s3_path("s3://bucket/a/b.json") == ("bucket", "a/b.json")
+    for bad in ("/local/a.json", "s3://bucket", "s3:///key"):
+        with pytest.raises(ValueError):
+            split_s3_path(bad)
@@ -0,0 +1,322 @@
+import threading
+import time
+from unittest import mock
+
+import redis
+
+from database.retryPolicy import PendingTracker
+
+
+def pending_ids(queue):
+    entries = queue.client.xpending_range(queue.stream, queue.group, min="-", max="+", count=100)
+    return [e["message_id"] for e in entries]
+
+
+def test_consume_batch_and_multi_id_ack(make_queue):
+    queue = make_queue()
+    for i in range(5):
+        queue.produce({"n": i})
+
+    first = queue.consume_batch(3)
+    second = queue.consume_batch(10, 0)
+    assert [m.data["n"] for m in first + second] == [0, 1, 2, 3, 4]
+    assert all(m.delivery_count == 1 for m in first + second)
+
+    with mock.patch.object(queue.client, "xack", wraps=queue.client.xack) as xack:
+        assert queue.ack_batch([m.id for m in first + second]) == 5
+    # 一次 XACK 确认整批
+    xack.assert_called_once()
+    assert pending_ids(queue) == []
+    assert queue.consume_batch(10, 0) == []
+
+
+def test_ack_batch_empty_and_partial(make_queue):
+    queue = make_queue()
+    queue.produce({"n": 0})
+    (message,) = queue.consume_batch(10)
+
+    assert queue.ack_batch([]) == 0
+    assert queue.ack(message.id)
+    # 已确认过的 ID 不再计数，回到优先检查 PEL 的状态
+    assert queue.ack_batch([message.id]) == 0
+    assert queue._pel.check_pending
+
+
+def test_unacked_messages_redelivered_after_restart(make_queue):
+    queue = make_queue()
+    queue.produce({"n": 0})
+    queue.produce({"n": 1})
+    delivered = queue.consume_batch(10)
+    queue.ack(delivered[0].id)
+
+    restarted = make_queue(retry_backoff_ms=0)
+    (message,) = restarted.consume_batch(10, 0)
+    assert message.id == delivered[1].id
+    assert message.delivery_count == 2
+
+
+def test_zero_block_does_not_wait(make_queue):
+    queue = make_queue(block_ms=60000)
+    with mock.patch.object(queue.client, "xreadgroup", wraps=queue.client.xreadgroup) as xreadgroup:
+        assert queue.consume_batch(10, 0) == []
+    assert xreadgroup.call_args.kwargs["block"] is None
+
+
+def test_read_ahead_skips_messages_still_in_flight(make_queue):
+    queue = make_queue(retry_backoff_ms=0)
+    for i in range(3):
+        queue.produce({"n": i})
+
+    (current,) = queue.consume_batch(1)
+    # 预读时 current 仍在 PEL 中且退避已到期，不能被当作失败消息重投
+    (ahead,) = queue.consume_batch(1, 0)
+    assert (current.data["n"], ahead.data["n"]) == (0, 1)
+
+    queue.ack_batch([current.id])
+    (next_ahead,) = queue.consume_batch(1, 0)
+    assert next_ahead.data["n"] == 2
+
+
+def test_failed_ack_keeps_message_for_redelivery(make_queue):
+    queue = make_queue(retry_backoff_ms=0)
+    queue.produce({"n": 0})
+    (message,) = queue.consume_batch(10)
+
+    with mock.patch.object(queue.client, "xack", side_effect=redis.exceptions.ConnectionError("down")):
+        assert queue.ack_batch([message.id]) == 0
+
+    (again,) = queue.consume_batch(10, 0)
+    assert again.id == message.id
+    assert again.delivery_count == 2
+
+
+def test_reclaims_messages_stranded_on_dead_consumer(make_queue):
+    dead = make_queue(consumer_name="worker_old")
+    for i in range(2):
+        dead.produce({"n": i})
+    stranded = dead.consume_batch(10)
+
+    live = make_queue(reclaim_idle_ms=50, reclaim_interval_ms=0)
+    # 空闲时间未到，不接管
+    assert live.consume_batch(10, 0) == []
+    time.sleep(0.06)
+
+    reclaimed = live.consume_batch(10, 0)
+    assert [m.id for m in reclaimed] == [m.id for m in stranded]
+    assert all(m.delivery_count == 2 for m in reclaimed)
+    assert live.reclaimed_total == 2
+
+    assert live.ack_batch([m.id for m in reclaimed]) == 2
+    assert pending_ids(live) == []
+
+
+def test_reclaim_pages_through_pending_counts(make_queue, monkeypatch):
+    monkeypatch.setattr(PendingTracker, "SCAN_COUNT", 2)
+    dead = make_queue(consumer_name="worker_old")
+    for i in range(5):
+        dead.produce({"n": i})
+    stranded = dead.consume_batch(10)
+
+    live = make_queue(reclaim_idle_ms=50, reclaim_interval_ms=0)
+    time.sleep(0.06)
+    # 区间内的条目多于一页 XPENDING，仍按各自认领前的投递次数标注
+    reclaimed = live.consume_batch(10, 0)
+    assert [m.id for m in reclaimed] == [m.id for m in stranded]
+    assert all(m.delivery_count == 2 for m in reclaimed)
+
+
+def test_new_reads_do_not_rescan_pending(make_queue):
+    queue = make_queue()
+    for i in range(3):
+        queue.produce({"n": i})
+    queue.consume_batch(1)
+
+    # 新读到的消息记录为处理中，之后的读取不再扫描 PEL
+    with mock.patch.object(queue.client, "xpending_range", wraps=queue.client.xpending_range) as xpending:
+        assert [m.data["n"] for m in queue.consume_batch(1, 0) + queue.consume_batch(1, 0)] == [1, 2]
+    xpending.assert_not_called()
+
+
+def test_reclaim_skips_own_in_flight_messages(make_queue):
+    queue = make_queue(reclaim_idle_ms=50, reclaim_interval_ms=0)
+    queue.produce({"n": 0})
+    (message,) = queue.consume_batch(10)
+    time.sleep(0.06)
+
+    # 处理时间超过 reclaim_idle_ms 的本地消息不会被自己重复接管
+    assert queue.consume_batch(10, 0) == []
+    assert queue.reclaimed_total == 0
+    assert queue.ack(message.id)
+
+
+def test_reclaim_disabled_by_default(make_queue):
+    dead = make_queue(consumer_name="worker_old")
+    dead.produce({"n": 0})
+    dead.consume_batch(10)
+    time.sleep(0.02)
+
+    live = make_queue()
+    assert live.consume_batch(10, 0) == []
+    assert live.reclaimed_total == 0
+
+
+def dead_letters(queue):
+    return [fields for _, fields in queue.client.xrange(queue.dlq_topic)]
+
+
+def test_failed_message_backs_off_without_blocking_new_messages(make_queue):
+    queue = make_queue(retry_backoff_ms=50)
+    queue.produce({"n": 0})
+    (failed,) = queue.consume_batch(10)
+    assert not queue.nack(failed, "boom", stage="chunk")
+
+    # 退避期内只读到新消息
+    queue.produce({"n": 1})
+    (healthy,) = queue.consume_batch(10, 0)
+    assert healthy.data["n"] == 1
+    queue.ack(healthy.id)
+
+    time.sleep(0.06)
+    (retried,) = queue.consume_batch(10, 0)
+    assert retried.id == failed.id
+    assert retried.delivery_count == 2
+
+    # 第二次失败后退避时间翻倍
+    queue.nack(retried, "boom", stage="chunk")
+    time.sleep(0.06)
+    assert queue.consume_batch(10, 0) == []
+    time.sleep(0.05)
+    (retried,) = queue.consume_batch(10, 0)
+    assert retried.delivery_count == 3
+
+
+def test_exhausted_message_moves_to_dead_letter_stream(make_queue):
+    queue = make_queue(max_deliveries=2, retry_backoff_ms=0)
+    queue.produce({"n": 0})
+    (message,) = queue.consume_batch(10)
+    assert not queue.nack(message, "first", stage="chunk")
+
+    (message,) = queue.consume_batch(10, 0)
+    assert message.delivery_count == 2
+    with mock.patch.object(queue.client, "pipeline", wraps=queue.client.pipeline) as pipeline:
+        assert queue.nack(message, "second", stage="chunk")
+    # 写死信与 XACK 在同一个 MULTI/EXEC 中
+    pipeline.assert_called_once_with(transaction=True)
+
+    (entry,) = dead_letters(queue)
+    assert entry["error"] == "second"
+    assert entry["stage"] == "chunk"
+    assert entry["source_id"] == message.id
+    assert entry["delivery_count"] == "2"
+    assert pending_ids(queue) == []
+    assert queue.dead_lettered_total == 1
+
+    # 死信条目保留原始 payload，可直接 XADD 回原 Stream 重放
+    queue.client.xadd(queue.stream, {"payload": entry["payload"]})
+    (replayed,) = queue.consume_batch(10, 0)
+    assert replayed.data == {"n": 0}
+
+
+def test_dead_letter_failure_keeps_message_pending(make_queue):
+    queue = make_queue(max_deliveries=1)
+    queue.produce({"n": 0})
+    (message,) = queue.consume_batch(10)
+
+    with mock.patch.object(queue.client, "pipeline", side_effect=redis.exceptions.ConnectionError("down")):
+        assert not queue.nack(message, "boom", stage="chunk")
+    assert dead_letters(queue) == []
+    assert pending_ids(queue) == [message.id]
+
+
+def test_unacked_message_past_limit_is_dead_lettered(make_queue):
+    crashed = make_queue(max_deliveries=1)
+    crashed.produce({"n": 0})
+    (message,) = crashed.consume_batch(10)
+
+    # 处理过程中进程退出：重启后不再投递，直接转入死信
+    restarted = make_queue(max_deliveries=1, retry_backoff_ms=0)
+    assert restarted.consume_batch(10, 0) == []
+    (entry,) = dead_letters(restarted)
+    assert entry["source_id"] == message.id
+    assert entry["stage"] == restarted.group
+
+
+def test_reclaimed_message_past_limit_is_dead_lettered(make_queue):
+    dead = make_queue(consumer_name="worker_old")
+    dead.produce({"n": 0})
+    (message,) = dead.consume_batch(10)
+    time.sleep(0.06)
+
+    live = make_queue(max_deliveries=1, reclaim_idle_ms=50, reclaim_interval_ms=0)
+    assert live.consume_batch(10, 0) == []
+    assert [e["source_id"] for e in dead_letters(live)] == [message.id]
+    assert pending_ids(live) == []
+
+
+def test_downstream_depth_counts_lag_and_pending(make_queue):
+    producer = make_queue(topic="fresh", group="absent")
+    for i in range(3):
+        producer.produce({"n": i})
+    # 下游消费者组尚未创建时按 XLEN 计
+    producer.client.xgroup_destroy("fresh", "absent")
+    assert producer.downstream_depth() == 3
+
+    queue = make_queue()
+    for i in range(5):
+        queue.produce({"n": i})
+    consumed = queue.consume_batch(2)
+    assert queue.downstream_depth() == 5
+    queue.ack_batch([m.id for m in consumed])
+    assert queue.downstream_depth() == 3
+
+
+def test_produce_pauses_until_downstream_drains(make_queue):
+    producer = make_queue(high_water=3, low_water=1, flow_check_interval_ms=10)
+    consumer = make_queue()
+    for i in range(3):
+        producer.produce({"n": i})
+
+    def drain():
+        consumer.ack_batch([m.id for m in consumer.consume_batch(10)])
+
+    timer = threading.Timer(0.05, drain)
+    timer.start()
+    start = time.monotonic()
+    producer.produce({"n": 3})
+    timer.join()
+
+    assert time.monotonic() - start >= 0.05
+    assert producer.throttled_seconds >= 0.05
+    assert producer.client.xlen(producer.stream) == 4
+
+
+def test_pause_is_capped_by_max_pause_ms(make_queue):
+    producer = make_queue(high_water=2, flow_check_interval_ms=10, max_pause_ms=50)
+    for i in range(2):
+        producer.produce({"n": i})
+
+    start = time.monotonic()
+    producer.produce({"n": 2})
+    assert 0.05 <= time.monotonic() - start < 1
+    assert producer.client.xlen(producer.stream) == 3
+
+
+def test_trim_acked_removes_entries_below_oldest_pending(make_queue):
+    producer = make_queue(trim_acked=True, flow_check_interval_ms=0)
+    consumer = make_queue()
+    ids = [producer.client.xadd(producer.stream, {"payload": str(i)}) for i in range(250)]
+
+    consumed = consumer.consume_batch(150)
+    consumer.ack_batch([m.id for m in consumed[:120]])
+    producer.produce({"n": 250})
+    # XTRIM MINID ~ 只删除整个 Stream 节点（每个 100 条）：最老的未确认条目所在节点及之后的条目保留
+    entries = producer.client.xrange(producer.stream)
+    assert entries[0][0] == ids[100]
+    assert len(entries) == 151
+
+    consumer.ack_batch([m.id for m in consumed[120:]])
+    rest = consumer.consume_batch(200)
+    consumer.ack_batch([m.id for m in rest])
+    # 没有未确认条目时以 last-delivered-id 为界
+    assert producer.downstream_depth() == 0
+    assert producer.client.xlen(producer.stream) < 100
@@ -0,0 +1,108 @@
+import sqlite3
+
+import fakeredis
+import pytest
+
+from database.memoryRegistry_impl import MemoryStatusRegistry
+from database.message import QueueMessage
+from database.redisRegistry_impl import RedisStatusRegistry
+from database.sqliteRegistry_impl import SqliteStatusRegistry
+from files.DocumentFormat import ContentBody, Node, PipelineInstructions, RAGTaskPayload
+from files.PayloadTransport import PayloadTransport
+from index.manager import IngestionManager
+
+FILE = "/data/a_part0.json"
+
+
+@pytest.fixture(params=["memory", "sqlite", "redis"])
+def make_registry(request, tmp_path, redis_server, monkeypatch):
+    """同一后端的多个实例共享存储，模拟重启或多个 index worker"""
+    monkeypatch.setattr(
+        "database.redisRegistry_impl.redis.Redis",
+        lambda **kwargs: fakeredis.FakeRedis(server=redis_server, decode_responses=True)
+    )
+    shared = MemoryStatusRegistry()
+
+    def make():
+        if request.param == "sqlite":
+            return SqliteStatusRegistry(str(tmp_path / "registry.db"))
+        if request.param == "redis":
+            return RedisStatusRegistry({})
+        return shared
+    return make
+
+
+def test_completion_is_per_content_version(make_registry):
+    registry = make_registry()
+    registry.mark_chunks_processed(FILE, "v1", ["c0", "c1"])
+    assert registry.get_processed_chunks(FILE, "v1") == {"c0", "c1"}
+    registry.mark_file_complete(FILE, "v1")
+
+    restarted = make_registry()
+    assert restarted.is_file_processed(FILE, "v1")
+    # 同名文件重新上传、内容变化：不视为已完成，也不继承旧版本的 chunk 进度
+    assert not restarted.is_file_processed(FILE, "v2")
+    assert restarted.get_processed_chunks(FILE, "v2") == set()
+
+    restarted.mark_chunks_processed(FILE, "v2", ["c0"])
+    restarted.mark_file_complete(FILE, "v2")
+    assert make_registry().is_file_processed(FILE, "v2")
+
+
+def test_progress_of_superseded_version_is_not_reused(make_registry):
+    registry = make_registry()
+    registry.mark_chunks_processed(FILE, "v1", ["c0", "c1"])
+
+    registry.mark_chunks_processed(FILE, "v2", ["c0"])
+    assert make_registry().get_processed_chunks(FILE, "v2") == {"c0"}
+    assert not make_registry().is_file_processed(FILE, "v2")
+
+
+def test_sqlite_upgrades_chunk_table_without_file_hash(tmp_path):
+    path = str(tmp_path / "registry.db")
+    db = sqlite3.connect(path)
+    db.execute("CREATE TABLE processed_chunks (file_name TEXT NOT NULL, chunk_id TEXT NOT NULL, "
+               "PRIMARY KEY (file_name, chunk_id)) WITHOUT ROWID")
+    db.execute("INSERT INTO processed_chunks VALUES (?, 'c0')", (FILE,))
+    db.commit()
+    db.close()
+
+    registry = SqliteStatusRegistry(path)
+    # 无法确认旧进度属于哪个版本，从头续传
+    assert registry.get_processed_chunks(FILE, "v1") == set()
+    registry.mark_chunks_processed(FILE, "v1", ["c0", "c1"])
+    assert registry.get_processed_chunks(FILE, "v1") == {"c0", "c1"}
+
+
+class FakeEmbedService:
+    def get_embeddings(self, texts):
+        return [[1.0] for _ in texts]
+
+
+class RecordingStore:
+    def __init__(self):
+        self.inserted = []
+
+    def insert(self, nodes):
+        self.inserted.extend(n.text for n in nodes)
+        return True
+
+
+def test_reuploaded_file_with_new_content_is_reindexed():
+    transport = PayloadTransport(inline_max_bytes=1 << 20)
+    store = RecordingStore()
+    indexer = IngestionManager(mq=None, embed_service=FakeEmbedService(), vector_store=store,
+                               registry=MemoryStatusRegistry(), transport=transport)
+
+    def index(text):
+        payload = RAGTaskPayload(content=ContentBody(
+            pipeline_instructions=PipelineInstructions(), nodes=[Node(page_content=text, metadata={"internal_id": "0"})]
+        ))
+        task = transport.publish(payload, path=FILE, stage="enrich", trace_id=None)
+        assert indexer._handle_task(QueueMessage(id="1", data=task.to_json())) is None
+
+    index("第一版")
+    index("第一版")
+    index("第二版")
+    # 相同内容的重投直接跳过，同名文件的新内容重新入库
+    assert store.inserted == ["第一版", "第二版"]